@@ -4,17 +4,31 @@ TS_Tool_Routier - Éditeur Transport Fever 2
 Développé par ROUTIER87
 """
 
+import time
+
+# Début du démarrage (mesure du temps jusqu'à la fenêtre interactive)
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
 import struct
-import json
 import traceback
-import shutil
-from pathlib import Path
 from datetime import datetime
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
-from PyQt6.QtGui import *
+
+# Les modules lourds ou rarement utilisés (platform, json, shutil, NumPy,
+# vue hex, dialogues) sont importés à la première utilisation
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QFrame, QLabel, QPushButton,
+                             QLineEdit, QSpinBox, QTextEdit, QGroupBox, QTabWidget, QStatusBar,
+                             QDialog, QMessageBox, QFileDialog, QVBoxLayout, QHBoxLayout,
+                             QGridLayout, QFormLayout)
+from PyQt6.QtCore import Qt, QThread, QTimer
+from PyQt6.QtGui import QAction
+
+import settings
+import app_log
+from edit_history import EditHistory
+from hex_format import format_dump
+from save_loader import LoadProgressWidget, SaveLoader, start_loader
 
 # ============================================================================
 # CONFIGURATION
@@ -35,8 +49,13 @@ class TS_Tool_Routier(QMainWindow):
         # Variables
         self.current_file = None
         self.file_data = None
-        self.money_offset = 1048600  # À CHANGER APRÈS TES TESTS !
+        self.money_offset = settings.get_int('Game', 'money_offset', 1048600)
         self.modified = False
+        self.search_results = None
+        self.history = EditHistory()
+        self.load_started = time.perf_counter()
+        self.loader = None
+        self.scan_dialog = None
         
         # Setup
         self.setup_ui()
@@ -47,9 +66,6 @@ class TS_Tool_Routier(QMainWindow):
         # Style
         self.apply_style()
         
-        # Créer le dossier logs
-        Path("logs").mkdir(exist_ok=True)
-        
         # Journal
         self.log("Application démarrée")
     
@@ -125,6 +141,20 @@ class TS_Tool_Routier(QMainWindow):
                 font-size: 11px;
                 border: 1px solid #555;
             }
+            QTableView {
+                background-color: #1a1a1a;
+                color: #00ff00;
+                gridline-color: #333;
+                selection-background-color: #3498db;
+                selection-color: white;
+                border: 1px solid #555;
+            }
+            QHeaderView::section {
+                background-color: #2c3e50;
+                color: #bdc3c7;
+                border: none;
+                padding: 2px;
+            }
             QTabWidget::pane {
                 border: 1px solid #444;
                 background-color: #34495e;
@@ -159,18 +189,13 @@ class TS_Tool_Routier(QMainWindow):
             }
         """)
     
-    def log(self, message):
-        """Écrit un message dans le journal"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_msg = f"[{timestamp}] {message}"
-        
+    def log(self, message, level="INFO", **fields):
+        """Écrit un message dans le journal (écriture différée, en arrière-plan)"""
         # Afficher dans la barre de statut
         self.status_bar.showMessage(message, 3000)
         
-        # Écrire dans le fichier log
-        log_file = Path("logs") / f"app_{datetime.now().strftime('%Y%m%d')}.log"
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_msg + "\n")
+        # Champs supplémentaires enregistrés tels quels (durées, tailles...)
+        app_log.log(message, level, **fields)
     
     def setup_ui(self):
         """Configure l'interface"""
@@ -305,8 +330,88 @@ class TS_Tool_Routier(QMainWindow):
         
         editor_layout.addStretch()
         
-        # ===== ONGLET 2 : HEXADÉCIMAL =====
-        hex_tab = QWidget()
+        # ===== ONGLETS 2 À 4 : construits à la première ouverture =====
+        self.hex_tab = QWidget()
+        self.tools_tab = QWidget()
+        self.library_tab = QWidget()
+        self.library = None
+        self.lazy_tabs = {
+            self.hex_tab: self.build_hex_tab,
+            self.tools_tab: self.build_tools_tab,
+            self.library_tab: self.build_library_tab,
+        }
+        
+        # ===== ONGLET 5 : À PROPOS =====
+        about_tab = QWidget()
+        self.about_tab = about_tab
+        about_layout = QVBoxLayout(about_tab)
+        
+        about_text = f"""
+        <div style='text-align: center; padding: 20px;'>
+            <h1 style='color: #3498db;'>🚚 {APP_NAME}</h1>
+            <h3>Version {VERSION}</h3>
+            <p>Éditeur de sauvegardes Transport Fever 2</p>
+            
+            <hr style='border: 1px solid #555; margin: 20px;'>
+            
+            <h3>👨‍💻 Développeur</h3>
+            <p style='font-size: 16px; color: #2ecc71;'>{AUTHOR}</p>
+            
+            <h3>🎯 Fonctionnalités</h3>
+            <ul style='text-align: left; margin: 20px;'>
+                <li>Modification de l'argent du joueur</li>
+                <li>Éditeur hexadécimal intégré</li>
+                <li>Sauvegarde automatique des fichiers</li>
+                <li>Configuration des offsets</li>
+                <li>Export des données en JSON</li>
+                <li>Système de logging complet</li>
+            </ul>
+            
+            <h3>⚠️ Important</h3>
+            <p style='color: #e74c3c; font-weight: bold;'>
+                ⚠️ Toujours faire des sauvegardes de vos fichiers originaux !
+            </p>
+            
+            <hr style='border: 1px solid #555; margin: 20px;'>
+            
+            <p>Développé avec Python 3 et PyQt6</p>
+            <p>© 2024 {AUTHOR} - Tous droits réservés</p>
+        </div>
+        """
+        
+        about_label = QLabel(about_text)
+        about_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        about_label.setWordWrap(True)
+        about_layout.addWidget(about_label)
+        
+        about_layout.addStretch()
+        
+        # Ajouter les onglets
+        self.tab_widget.addTab(editor_tab, "🏠 Éditeur")
+        self.tab_widget.addTab(self.hex_tab, "🔧 Hexadécimal")
+        self.tab_widget.addTab(self.tools_tab, "🛠️ Outils")
+        self.tab_widget.addTab(self.library_tab, "📚 Bibliothèque")
+        self.tab_widget.addTab(about_tab, "ℹ️ À propos")
+        self.tab_widget.currentChanged.connect(self.ensure_tab_built)
+        
+        # Barre de statut
+        self.status_bar = QStatusBar()
+        self.setStatusBar(self.status_bar)
+        self.status_bar.showMessage("Prêt")
+        
+        # Progression du chargement
+        self.load_progress = LoadProgressWidget()
+        self.status_bar.addPermanentWidget(self.load_progress)
+        
+        # Indicateur de modification
+        self.modified_label = QLabel()
+        self.status_bar.addPermanentWidget(self.modified_label)
+    
+    def build_hex_tab(self, hex_tab):
+        """Construit l'onglet hexadécimal (à sa première ouverture)"""
+        from hex_view import HexView
+        from minimap import HexMinimap
+        
         hex_layout_main = QVBoxLayout(hex_tab)
         
         # Toolbar hex
@@ -319,10 +424,25 @@ class TS_Tool_Routier(QMainWindow):
         hex_toolbar.addWidget(self.hex_offset_input)
         
         self.btn_goto = QPushButton("Aller à")
-        self.btn_goto.clicked.connect(self.goto_hex_offset)
+        self.btn_goto.clicked.connect(lambda: self.goto_hex_offset())
         self.btn_goto.setEnabled(False)
         hex_toolbar.addWidget(self.btn_goto)
         
+        # Historique des positions visitées
+        self.btn_hex_back = QPushButton("⟵")
+        self.btn_hex_back.setToolTip("Position précédente (Alt+Gauche)")
+        self.btn_hex_back.setShortcut("Alt+Left")
+        self.btn_hex_back.clicked.connect(lambda: self.navigate_hex_history(-1))
+        self.btn_hex_back.setEnabled(False)
+        hex_toolbar.addWidget(self.btn_hex_back)
+        
+        self.btn_hex_forward = QPushButton("⟶")
+        self.btn_hex_forward.setToolTip("Position suivante (Alt+Droite)")
+        self.btn_hex_forward.setShortcut("Alt+Right")
+        self.btn_hex_forward.clicked.connect(lambda: self.navigate_hex_history(1))
+        self.btn_hex_forward.setEnabled(False)
+        hex_toolbar.addWidget(self.btn_hex_forward)
+        
         hex_toolbar.addStretch()
         
         hex_toolbar.addWidget(QLabel("Rechercher:"))
@@ -336,12 +456,38 @@ class TS_Tool_Routier(QMainWindow):
         self.btn_search.setEnabled(False)
         hex_toolbar.addWidget(self.btn_search)
         
+        self.btn_search_prev = QPushButton("◀")
+        self.btn_search_prev.clicked.connect(lambda: self.goto_search_hit(-1))
+        self.btn_search_prev.setEnabled(False)
+        hex_toolbar.addWidget(self.btn_search_prev)
+        
+        self.btn_search_next = QPushButton("▶")
+        self.btn_search_next.clicked.connect(lambda: self.goto_search_hit(1))
+        self.btn_search_next.setEnabled(False)
+        hex_toolbar.addWidget(self.btn_search_next)
+        
+        self.lbl_search_hits = QLabel("")
+        hex_toolbar.addWidget(self.lbl_search_hits)
+        
         hex_layout_main.addLayout(hex_toolbar)
         
-        # Affichage hex principal
-        self.hex_display = QTextEdit()
-        self.hex_display.setReadOnly(True)
-        hex_layout_main.addWidget(self.hex_display)
+        # Affichage hex principal (virtualisé : seules les lignes visibles sont formatées)
+        hex_view_layout = QHBoxLayout()
+        self.hex_display = HexView()
+        self.hex_display.offset_selected.connect(self.on_hex_offset_selected)
+        self.hex_display.history_changed.connect(self.btn_hex_back.setEnabled)
+        self.hex_display.history_changed.connect(
+            lambda back, forward: self.btn_hex_forward.setEnabled(forward))
+        hex_view_layout.addWidget(self.hex_display)
+        
+        # Minimap : entropie et zéros sur tout le fichier, clic pour s'y rendre
+        # (les glissements ne remplissent pas l'historique)
+        self.hex_minimap = HexMinimap()
+        self.hex_minimap.offset_clicked.connect(
+            lambda offset: self.show_hex_offset(offset, remember=False))
+        self.hex_display.viewport_changed.connect(self.hex_minimap.set_viewport)
+        hex_view_layout.addWidget(self.hex_minimap)
+        hex_layout_main.addLayout(hex_view_layout)
         
         # Info hex
         hex_info_layout = QHBoxLayout()
@@ -357,15 +503,17 @@ class TS_Tool_Routier(QMainWindow):
         
         hex_layout_main.addLayout(hex_info_layout)
         
-        # ===== ONGLET 3 : OUTILS =====
-        tools_tab = QWidget()
+        self.update_hex_display()
+    
+    def build_tools_tab(self, tools_tab):
+        """Construit l'onglet outils (à sa première ouverture)"""
         tools_layout = QVBoxLayout(tools_tab)
         
         # Configuration offsets
         offset_group = QGroupBox("⚙️ Configuration des offsets")
         offset_layout = QFormLayout()
         
-        self.offset_money_input = QLineEdit("1048600")
+        self.offset_money_input = QLineEdit(str(self.money_offset))
         self.offset_money_input.setPlaceholderText("Offset de l'argent")
         offset_layout.addRow("Offset argent:", self.offset_money_input)
         
@@ -383,6 +531,8 @@ class TS_Tool_Routier(QMainWindow):
         tools_buttons = [
             ("📊 Analyser fichier", self.analyze_file),
             ("🔍 Comparer sauvegardes", self.compare_saves),
+            ("🎯 Recherche itérative", self.scan_session),
+            ("🧬 Différences binaires", self.diff_saves),
             ("📤 Exporter JSON", self.export_json),
             ("🔄 Restaurer backup", self.restore_backup),
             ("🧹 Nettoyer logs", self.clean_logs),
@@ -404,65 +554,28 @@ class TS_Tool_Routier(QMainWindow):
         tools_layout.addWidget(tools_group)
         
         tools_layout.addStretch()
-        
-        # ===== ONGLET 4 : À PROPOS =====
-        about_tab = QWidget()
-        about_layout = QVBoxLayout(about_tab)
-        
-        about_text = f"""
-        <div style='text-align: center; padding: 20px;'>
-            <h1 style='color: #3498db;'>🚚 {APP_NAME}</h1>
-            <h3>Version {VERSION}</h3>
-            <p>Éditeur de sauvegardes Transport Fever 2</p>
-            
-            <hr style='border: 1px solid #555; margin: 20px;'>
-            
-            <h3>👨‍💻 Développeur</h3>
-            <p style='font-size: 16px; color: #2ecc71;'>{AUTHOR}</p>
-            
-            <h3>🎯 Fonctionnalités</h3>
-            <ul style='text-align: left; margin: 20px;'>
-                <li>Modification de l'argent du joueur</li>
-                <li>Éditeur hexadécimal intégré</li>
-                <li>Sauvegarde automatique des fichiers</li>
-                <li>Configuration des offsets</li>
-                <li>Export des données en JSON</li>
-                <li>Système de logging complet</li>
-            </ul>
-            
-            <h3>⚠️ Important</h3>
-            <p style='color: #e74c3c; font-weight: bold;'>
-                ⚠️ Toujours faire des sauvegardes de vos fichiers originaux !
-            </p>
-            
-            <hr style='border: 1px solid #555; margin: 20px;'>
-            
-            <p>Développé avec Python 3 et PyQt6</p>
-            <p>© 2024 {AUTHOR} - Tous droits réservés</p>
-        </div>
-        """
-        
-        about_label = QLabel(about_text)
-        about_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        about_label.setWordWrap(True)
-        about_layout.addWidget(about_label)
-        
-        about_layout.addStretch()
-        
-        # Ajouter les onglets
-        self.tab_widget.addTab(editor_tab, "🏠 Éditeur")
-        self.tab_widget.addTab(hex_tab, "🔧 Hexadécimal")
-        self.tab_widget.addTab(tools_tab, "🛠️ Outils")
-        self.tab_widget.addTab(about_tab, "ℹ️ À propos")
-        
-        # Barre de statut
-        self.status_bar = QStatusBar()
-        self.setStatusBar(self.status_bar)
-        self.status_bar.showMessage("Prêt")
-        
-        # Indicateur de modification
-        self.modified_label = QLabel()
-        self.status_bar.addPermanentWidget(self.modified_label)
+    
+    def build_library_tab(self, library_tab):
+        """Construit la bibliothèque (indexation du dossier des sauvegardes)"""
+        from save_library import SaveLibraryPane
+        from field_locator import load_locator
+        
+        layout = QVBoxLayout(library_tab)
+        self.library = SaveLibraryPane(library_tab, locator=load_locator())
+        self.library.file_activated.connect(self.open_from_library)
+        layout.addWidget(self.library)
+    
+    def open_from_library(self, filepath):
+        """Charge la sauvegarde choisie dans la bibliothèque"""
+        self.tab_widget.setCurrentIndex(0)
+        self.load_file(filepath)
+    
+    def ensure_tab_built(self, index):
+        """Construit un onglet différé la première fois qu'il est affiché"""
+        tab = self.tab_widget.widget(index)
+        builder = self.lazy_tabs.pop(tab, None)
+        if builder is not None:
+            builder(tab)
     
     def create_menu_bar(self):
         """Crée la barre de menu"""
@@ -500,6 +613,22 @@ class TS_Tool_Routier(QMainWindow):
         # Menu Édition
         edit_menu = menubar.addMenu("✏️ Édition")
         
+        undo_action = QAction("↩️ Annuler", self)
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo_edit)
+        undo_action.setEnabled(False)
+        self.undo_action = undo_action
+        edit_menu.addAction(undo_action)
+        
+        redo_action = QAction("↪️ Rétablir", self)
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(self.redo_edit)
+        redo_action.setEnabled(False)
+        self.redo_action = redo_action
+        edit_menu.addAction(redo_action)
+        
+        edit_menu.addSeparator()
+        
         money_action = QAction("💰 Éditeur d'argent...", self)
         money_action.triggered.connect(self.show_money_editor)
         edit_menu.addAction(money_action)
@@ -519,6 +648,10 @@ class TS_Tool_Routier(QMainWindow):
         analyze_action.triggered.connect(self.analyze_file)
         tools_menu.addAction(analyze_action)
         
+        diff_action = QAction("🧬 Différences binaires...", self)
+        diff_action.triggered.connect(self.diff_saves)
+        tools_menu.addAction(diff_action)
+        
         tools_menu.addSeparator()
         
         backup_action = QAction("🔄 Gérer backups", self)
@@ -529,7 +662,7 @@ class TS_Tool_Routier(QMainWindow):
         help_menu = menubar.addMenu("❓ Aide")
         
         about_action = QAction("ℹ️ À propos", self)
-        about_action.triggered.connect(lambda: self.tab_widget.setCurrentIndex(3))
+        about_action.triggered.connect(lambda: self.tab_widget.setCurrentWidget(self.about_tab))
         help_menu.addAction(about_action)
         
         docs_action = QAction("📚 Documentation", self)
@@ -542,10 +675,17 @@ class TS_Tool_Routier(QMainWindow):
     
     def open_file(self):
         """Ouvre un fichier de sauvegarde"""
+        # Dossier affiché par la bibliothèque, sinon celui de config.ini
+        if self.library is not None:
+            folder = self.library.folder
+        else:
+            from save_library import default_save_dir
+            folder = str(default_save_dir())
+        
         filepath, _ = QFileDialog.getOpenFileName(
             self,
             "Ouvrir une sauvegarde Transport Fever 2",
-            str(Path.home() / "Documents" / "Transport Fever 2" / "save"),
+            folder,
             "Fichiers de sauvegarde (*.save);;Tous les fichiers (*.*)"
         )
         
@@ -553,52 +693,116 @@ class TS_Tool_Routier(QMainWindow):
             self.load_file(filepath)
     
     def load_file(self, filepath):
-        """Charge un fichier de sauvegarde"""
-        try:
-            # Lire le fichier
-            with open(filepath, 'rb') as f:
-                self.file_data = bytearray(f.read())
-            
-            self.current_file = filepath
-            self.modified = False
-            
-            # Mettre à jour les infos
-            filename = os.path.basename(filepath)
-            filesize = len(self.file_data)
-            
-            self.lbl_filename.setText(filename)
-            self.lbl_filesize.setText(f"Taille: {filesize:,} octets")
-            self.lbl_offset.setText(f"Offset argent: 0x{self.money_offset:X}")
-            
-            # Lire l'argent
+        """Charge un fichier de sauvegarde (en arrière-plan)"""
+        from field_locator import load_locator
+        
+        # Un seul chargement à la fois
+        if self.loader is not None:
+            self.loader.cancel()
+        
+        self.loader = SaveLoader(filepath, self.money_offset, locator=load_locator())
+        self.loader.money_ready.connect(self.on_money_ready)
+        self.loader.finished.connect(self.on_file_loaded)
+        self.loader.failed.connect(self.on_load_failed)
+        self.loader.cancelled.connect(self.on_load_cancelled)
+        self.load_progress.attach(self.loader)
+        
+        self.status_bar.showMessage(f"Chargement: {os.path.basename(filepath)}...")
+        self.load_started = time.perf_counter()
+        self.loader_thread = start_loader(self.loader, self)
+    
+    def on_file_loaded(self, buffer):
+        """Quand le chargement en arrière-plan est terminé"""
+        if self.sender() is not self.loader:
+            # Chargement remplacé par un plus récent
+            buffer.close()
+            return
+        self.loader = None
+        
+        # Mapper le fichier (lectures directes, modifications en surcouche)
+        if self.file_data is not None:
+            self.file_data.close()
+        self.file_data = buffer
+        
+        filepath = buffer.filepath
+        self.current_file = filepath
+        self.modified = False
+        self.modified_label.setText("")
+        self.reset_search()
+        self.history.clear()
+        self.update_undo_actions()
+        
+        # Mettre à jour les infos
+        filename = os.path.basename(filepath)
+        filesize = len(self.file_data)
+        
+        self.lbl_filename.setText(filename)
+        self.lbl_filesize.setText(f"Taille: {filesize:,} octets")
+        # Argent repéré par signature : l'offset suit la sauvegarde
+        located = getattr(buffer, 'located', None) or {}
+        if located.get('money') is not None and located['money'] != self.money_offset:
+            self.money_offset = located['money']
+            if self.tools_tab not in self.lazy_tabs:
+                # Onglet outils déjà construit (sinon il lira money_offset)
+                self.offset_money_input.setText(str(self.money_offset))
+            self.log(f"Offset argent localisé par signature: 0x{self.money_offset:X}")
+        self.lbl_offset.setText(f"Offset argent: 0x{self.money_offset:X}")
+        
+        # Lire l'argent
+        self.read_money()
+        
+        # Activer les contrôles
+        self.money_spinbox.setEnabled(True)
+        self.btn_save.setEnabled(True)
+        self.btn_save_as.setEnabled(True)
+        self.save_action.setEnabled(True)
+        self.save_as_action.setEnabled(True)
+        
+        # Mettre à jour l'affichage hex
+        self.update_hex_preview()
+        self.update_hex_display()
+        
+        # Journal
+        self.log(f"Fichier chargé: {filename} ({filesize:,} octets)",
+                 size=filesize, duration_ms=round((time.perf_counter() - self.load_started) * 1000, 1))
+        
+        QMessageBox.information(self, "Succès", 
+                              f"Fichier chargé avec succès !\n\n"
+                              f"📁 {filename}\n"
+                              f"📊 {filesize:,} octets\n"
+                              f"💰 {self.money_spinbox.value():,} €")
+    
+    def on_load_failed(self, error):
+        """Quand le chargement a échoué"""
+        if self.sender() is not self.loader:
+            return
+        self.loader = None
+        self.read_money()
+        self.log(f"Erreur chargement: {error}", level="ERROR")
+        QMessageBox.critical(self, "Erreur", 
+                           f"Impossible de charger le fichier:\n{error}")
+    
+    def on_load_cancelled(self):
+        """Quand le chargement a été annulé"""
+        if self.sender() is self.loader:
+            self.loader = None
+            # Remettre l'argent du fichier encore ouvert
             self.read_money()
-            
-            # Activer les contrôles
-            self.money_spinbox.setEnabled(True)
-            self.btn_save.setEnabled(True)
-            self.btn_save_as.setEnabled(True)
-            self.save_action.setEnabled(True)
-            self.save_as_action.setEnabled(True)
-            self.btn_goto.setEnabled(True)
-            self.btn_search.setEnabled(True)
-            
-            # Mettre à jour l'affichage hex
-            self.update_hex_preview()
-            self.update_hex_display()
-            
-            # Journal
-            self.log(f"Fichier chargé: {filename} ({filesize:,} octets)")
-            
-            QMessageBox.information(self, "Succès", 
-                                  f"Fichier chargé avec succès !\n\n"
-                                  f"📁 {filename}\n"
-                                  f"📊 {filesize:,} octets\n"
-                                  f"💰 {self.money_spinbox.value():,} €")
-            
-        except Exception as e:
-            self.log(f"Erreur chargement: {str(e)}")
-            QMessageBox.critical(self, "Erreur", 
-                               f"Impossible de charger le fichier:\n{str(e)}")
+            self.log("Chargement annulé")
+    
+    def on_money_ready(self, money):
+        """Argent lu au début du chargement"""
+        if self.sender() is not self.loader:
+            # Argent d'un chargement remplacé
+            return
+        self.show_money(money)
+    
+    def show_money(self, money):
+        """Affiche l'argent sans marquer le fichier comme modifié"""
+        self.money_spinbox.blockSignals(True)
+        self.money_spinbox.setValue(money)
+        self.money_spinbox.blockSignals(False)
+        self.lbl_money.setText(f"Argent: {money:,} €")
     
     def read_money(self):
         """Lit la valeur de l'argent depuis le fichier"""
@@ -607,12 +811,11 @@ class TS_Tool_Routier(QMainWindow):
                 money_bytes = self.file_data[self.money_offset:self.money_offset+8]
                 money = struct.unpack('<q', money_bytes)[0]
                 
-                self.money_spinbox.setValue(money)
-                self.lbl_money.setText(f"Argent: {money:,} €")
+                self.show_money(money)
                 
                 return money
         except Exception as e:
-            self.log(f"Erreur lecture argent: {str(e)}")
+            self.log(f"Erreur lecture argent: {str(e)}", level="ERROR")
         
         return 0
     
@@ -621,13 +824,24 @@ class TS_Tool_Routier(QMainWindow):
         if not self.current_file or not self.file_data:
             return
         
-        # Créer un backup
-        backup_file = f"{self.current_file}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        try:
-            shutil.copy2(self.current_file, backup_file)
-            self.log(f"Backup créé: {backup_file}")
-        except Exception as e:
-            self.log(f"Erreur création backup: {str(e)}")
+        started = time.perf_counter()
+        
+        # Backup dédupliqué de l'état sur disque (seuls les blocs nouveaux sont stockés)
+        backup = None
+        if settings.get_bool('Editor', 'auto_backup', True):
+            from backup_store import default_store
+            try:
+                store = default_store()
+                # Argent du fichier sur disque (le buffer contient déjà les modifications)
+                disk_money = None
+                original = self.file_data.original
+                if self.money_offset + 8 <= len(original):
+                    disk_money = struct.unpack('<q', original[self.money_offset:self.money_offset+8])[0]
+                backup = store.backup(self.current_file, money=disk_money)
+                self.log(f"Backup créé: {backup['path']}",
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            except Exception as e:
+                self.log(f"Erreur création backup: {str(e)}", level="ERROR")
         
         # Mettre à jour l'argent
         money = self.money_spinbox.value()
@@ -638,21 +852,30 @@ class TS_Tool_Routier(QMainWindow):
         
         # Écrire le fichier
         try:
-            with open(self.current_file, 'wb') as f:
-                f.write(self.file_data)
+            ranges = self.file_data.modified_ranges()
+            self.file_data.save()
+            self.reset_search()
+            
+            if backup is not None and not getattr(self.file_data, 'is_container', False):
+                try:
+                    store.update_state(self.current_file, backup['chunks'], ranges)
+                except Exception as e:
+                    self.log(f"Erreur mise à jour backup: {str(e)}", level="ERROR")
             
             self.modified = False
             self.modified_label.setText("")
             
-            self.log(f"Fichier enregistré: {self.current_file}")
+            self.log(f"Fichier enregistré: {self.current_file}",
+                     bytes_written=sum(stop - start for start, stop in ranges),
+                     duration_ms=round((time.perf_counter() - started) * 1000, 1))
             
             QMessageBox.information(self, "Succès",
                                   f"✅ Fichier enregistré avec succès !\n\n"
                                   f"💰 Nouvel argent: {money:,} €\n"
-                                  f"💾 Backup: {os.path.basename(backup_file)}")
+                                  f"💾 Backup: {os.path.basename(backup['path']) if backup else 'aucun'}")
             
         except Exception as e:
-            self.log(f"Erreur sauvegarde: {str(e)}")
+            self.log(f"Erreur sauvegarde: {str(e)}", level="ERROR")
             QMessageBox.critical(self, "Erreur",
                                f"Erreur lors de l'enregistrement:\n{str(e)}")
     
@@ -678,8 +901,8 @@ class TS_Tool_Routier(QMainWindow):
             
             # Écrire le nouveau fichier
             try:
-                with open(filepath, 'wb') as f:
-                    f.write(self.file_data)
+                self.file_data.save(filepath)
+                self.reset_search()
                 
                 self.log(f"Fichier enregistré sous: {filepath}")
                 
@@ -688,7 +911,7 @@ class TS_Tool_Routier(QMainWindow):
                                       f"💰 Argent: {money:,} €")
                 
             except Exception as e:
-                self.log(f"Erreur sauvegarde sous: {str(e)}")
+                self.log(f"Erreur sauvegarde sous: {str(e)}", level="ERROR")
                 QMessageBox.critical(self, "Erreur",
                                    f"Erreur lors de l'enregistrement:\n{str(e)}")
     
@@ -699,10 +922,55 @@ class TS_Tool_Routier(QMainWindow):
     def on_money_changed(self, value):
         """Quand l'argent est modifié"""
         self.lbl_money.setText(f"Argent: {value:,} €")
+        
+        # Écrit dans le buffer et mémorise le delta (les flèches du spinbox
+        # rapprochées ne font qu'une étape d'annulation)
+        if self.file_data is not None and self.money_offset + 8 <= len(self.file_data):
+            if self.history.edit(self.file_data, self.money_offset,
+                                 struct.pack('<q', value), key='money'):
+                self.reset_search()
+                self.update_undo_actions()
+        
+        self.mark_modified()
+    
+    def mark_modified(self):
+        """Affiche l'indicateur de modification"""
         self.modified = True
         self.modified_label.setText("[MODIFIÉ]")
         self.modified_label.setStyleSheet("color: red; font-weight: bold;")
     
+    def undo_edit(self):
+        """Annule la dernière modification"""
+        self.apply_history(self.history.undo, "Annulé")
+    
+    def redo_edit(self):
+        """Rétablit la dernière modification annulée"""
+        self.apply_history(self.history.redo, "Rétabli")
+    
+    def apply_history(self, step, label):
+        """Applique une étape de l'historique et rafraîchit l'affichage"""
+        if self.file_data is None:
+            return
+        changed = step(self.file_data)
+        if changed is None:
+            return
+        offset, length = changed
+        
+        self.read_money()
+        self.reset_search()
+        self.update_hex_preview()
+        if self.hex_tab not in self.lazy_tabs:
+            # Mêmes offsets : seules les lignes affichées sont relues
+            self.hex_display.hex_model.refresh()
+        self.update_undo_actions()
+        self.mark_modified()
+        self.log(f"{label}: {length} octet(s) à 0x{offset:X}")
+    
+    def update_undo_actions(self):
+        """Active annuler/rétablir selon l'historique"""
+        self.undo_action.setEnabled(self.history.can_undo())
+        self.redo_action.setEnabled(self.history.can_redo())
+    
     def set_money_preset(self, amount):
         """Définit un montant prédéfini"""
         self.money_spinbox.setValue(amount)
@@ -754,67 +1022,36 @@ class TS_Tool_Routier(QMainWindow):
         preview_size = min(512, len(self.file_data))
         preview_data = self.file_data[:preview_size]
         
-        hex_text = ""
-        for i in range(0, preview_size, 16):
-            hex_text += f"{i:08X}: "
-            
-            for j in range(16):
-                if i + j < preview_size:
-                    hex_text += f"{preview_data[i+j]:02X} "
-                else:
-                    hex_text += "   "
-            
-            hex_text += " "
-            
-            for j in range(16):
-                if i + j < preview_size:
-                    byte = preview_data[i+j]
-                    if 32 <= byte < 127:
-                        hex_text += chr(byte)
-                    else:
-                        hex_text += "."
-                else:
-                    hex_text += " "
-            
-            hex_text += "\n"
-        
-        self.hex_preview.setText(hex_text)
+        self.hex_preview.setText(format_dump(preview_data))
     
     def update_hex_display(self):
         """Met à jour l'affichage hexadécimal complet"""
-        if not self.file_data:
-            self.hex_display.setText("Aucun fichier chargé")
+        if self.hex_tab in self.lazy_tabs:
+            # Onglet jamais ouvert : il sera rempli à sa construction
             return
         
-        hex_text = ""
-        for i in range(0, len(self.file_data), 16):
-            hex_text += f"{i:08X}: "
-            
-            for j in range(16):
-                if i + j < len(self.file_data):
-                    hex_text += f"{self.file_data[i+j]:02X} "
-                else:
-                    hex_text += "   "
-            
-            hex_text += " "
-            
-            for j in range(16):
-                if i + j < len(self.file_data):
-                    byte = self.file_data[i+j]
-                    if 32 <= byte < 127:
-                        hex_text += chr(byte)
-                    else:
-                        hex_text += "."
-                else:
-                    hex_text += " "
-            
-            hex_text += "\n"
+        self.btn_goto.setEnabled(bool(self.file_data))
+        self.btn_search.setEnabled(bool(self.file_data))
+        
+        if not self.file_data:
+            self.hex_display.set_buffer(None)
+            self.hex_minimap.set_buffer(None)
+            self.lbl_hex_size.setText("Taille: 0 octets")
+            return
         
-        self.hex_display.setText(hex_text)
+        # La vue lit les lignes à la demande depuis le buffer
+        self.hex_display.set_buffer(self.file_data)
+        self.hex_minimap.set_buffer(self.file_data)
         self.lbl_hex_size.setText(f"Taille: {len(self.file_data):,} octets")
     
-    def goto_hex_offset(self):
-        """Va à un offset spécifique dans l'affichage hex"""
+    def on_hex_offset_selected(self, offset):
+        """Quand un octet est sélectionné dans la vue hex"""
+        self.lbl_hex_pos.setText(f"Position: 0x{offset:X}")
+        value = self.file_data[offset]
+        self.lbl_hex_value.setText(f"Valeur: 0x{value:02X} ({value})")
+    
+    def goto_hex_offset(self, length=1, remember=True):
+        """Va à l'offset saisi et surligne `length` octets"""
         offset_text = self.hex_offset_input.text().strip()
         
         try:
@@ -831,53 +1068,98 @@ class TS_Tool_Routier(QMainWindow):
                 value = self.file_data[offset]
                 self.lbl_hex_value.setText(f"Valeur: 0x{value:02X} ({value})")
             
-            # Faire défiler vers la position
-            cursor = self.hex_display.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.Start)
-            
-            # Calculer la ligne (16 octets par ligne)
-            line = offset // 16
-            
-            for _ in range(line):
-                cursor.movePosition(QTextCursor.MoveOperation.Down)
-            
-            self.hex_display.setTextCursor(cursor)
-            self.hex_display.ensureCursorVisible()
+            # Faire défiler vers la position (saut direct vers la ligne)
+            self.hex_display.goto_offset(offset, length, remember)
             
         except ValueError:
             QMessageBox.warning(self, "Erreur", "Offset invalide")
     
+    def show_hex_offset(self, offset, length=1, remember=True):
+        """Affiche l'onglet hexadécimal positionné sur `offset`"""
+        self.tab_widget.setCurrentWidget(self.hex_tab)
+        self.hex_offset_input.setText(f"0x{offset:X}")
+        self.goto_hex_offset(length, remember)
+    
+    def navigate_hex_history(self, step):
+        """Position précédente (-1) ou suivante (1) de l'historique"""
+        if step < 0:
+            offset = self.hex_display.go_back()
+        else:
+            offset = self.hex_display.go_forward()
+        if offset is not None:
+            self.hex_offset_input.setText(f"0x{offset:X}")
+    
     def search_hex(self):
-        """Recherche dans les données hex"""
+        """Recherche toutes les occurrences dans les données hex"""
         search_text = self.hex_search_input.text().strip()
         if not search_text or not self.file_data:
             return
         
-        # Essayer comme hex d'abord
-        try:
-            search_bytes = bytes.fromhex(search_text.replace(' ', ''))
-        except:
-            # Sinon comme texte
-            search_bytes = search_text.encode('utf-8')
+        from hex_search import SearchResults, find_all, parse_pattern
+        
+        search_bytes = parse_pattern(search_text)
+        
+        # Même motif : passer simplement à l'occurrence suivante
+        if self.search_results and self.search_results.pattern == search_bytes:
+            self.goto_search_hit(1)
+            return
         
-        # Rechercher
+        # Rechercher (tous les cœurs, toutes les occurrences)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
-            index = self.file_data.find(search_bytes)
-            if index != -1:
-                self.hex_offset_input.setText(f"0x{index:X}")
-                self.goto_hex_offset()
-                QMessageBox.information(self, "Recherche", 
-                                      f"Trouvé à l'offset 0x{index:X}")
-            else:
-                QMessageBox.information(self, "Recherche", "Non trouvé")
+            hits = find_all(self.file_data, search_bytes)
         except Exception as e:
             QMessageBox.warning(self, "Erreur", f"Erreur recherche: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        self.search_results = SearchResults(search_bytes, hits)
+        self.btn_search_prev.setEnabled(len(hits) > 1)
+        self.btn_search_next.setEnabled(len(hits) > 1)
+        self.log(f"Recherche '{search_text}': {len(hits):,} occurrence(s)")
+        
+        if len(hits):
+            # Première occurrence à partir de la position courante
+            current = self.hex_display.hex_model.index_to_offset(self.hex_display.currentIndex())
+            self.search_results.seek(current or 0)
+            self.goto_search_hit(0)
+        else:
+            self.lbl_search_hits.setText("0 / 0")
+            QMessageBox.information(self, "Recherche", "Non trouvé")
+    
+    def goto_search_hit(self, step):
+        """Va à l'occurrence précédente (-1), courante (0) ou suivante (1)"""
+        results = self.search_results
+        if not results or not len(results):
+            return
+        
+        if step > 0:
+            offset = results.next()
+        elif step < 0:
+            offset = results.previous()
+        else:
+            offset = results.current
+        
+        self.lbl_search_hits.setText(f"{results.position + 1:,} / {len(results):,}")
+        self.hex_offset_input.setText(f"0x{offset:X}")
+        self.goto_hex_offset(len(results.pattern))
+    
+    def reset_search(self):
+        """Oublie les résultats de recherche (données modifiées)"""
+        self.search_results = None
+        if self.hex_tab in self.lazy_tabs:
+            return
+        self.lbl_search_hits.setText("")
+        self.btn_search_prev.setEnabled(False)
+        self.btn_search_next.setEnabled(False)
     
     def save_offset_config(self):
         """Sauvegarde la configuration des offsets"""
         try:
-            self.money_offset = int(self.offset_money_input.text())
+            self.money_offset = int(self.offset_money_input.text(), 0)
             self.lbl_offset.setText(f"Offset argent: 0x{self.money_offset:X}")
+            settings.set_value('Game', 'money_offset', self.money_offset)
             
             # Si un fichier est chargé, mettre à jour l'affichage
             if self.current_file:
@@ -896,58 +1178,72 @@ class TS_Tool_Routier(QMainWindow):
     # ============================================================================
     
     def analyze_file(self):
-        """Analyse le fichier"""
-        if not self.current_file:
+        """Analyse le fichier (une seule lecture, résultat en cache)"""
+        if not self.current_file or not self.file_data:
             QMessageBox.warning(self, "Attention", "Ouvrez d'abord un fichier")
             return
         
+        from save_analysis import analyze
+        from dialogs import AnalysisDialog
+        
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
-            filesize = len(self.file_data)
-            money = self.money_spinbox.value()
-            
-            # Compter les zéros (peut indiquer des zones vides)
-            zeros = self.file_data.count(0)
-            zero_percent = (zeros / filesize) * 100
-            
-            # Chercher des patterns communs
-            patterns = {
-                "FF FF FF FF": self.file_data.count(b'\xFF\xFF\xFF\xFF'),
-                "00 00 00 00": self.file_data.count(b'\x00\x00\x00\x00'),
-                "SAVE": self.file_data.find(b'SAVE'),
-                "GAME": self.file_data.find(b'GAME'),
-            }
-            
-            analysis = f"""
-            📊 Analyse du fichier :
-            
-            📁 Fichier: {os.path.basename(self.current_file)}
-            📏 Taille: {filesize:,} octets
-            💰 Argent: {money:,} €
-            
-            📈 Statistiques :
-            • Octets nuls: {zeros:,} ({zero_percent:.1f}%)
-            • Offset argent: 0x{self.money_offset:X}
-            
-            🔍 Patterns trouvés :
-            """
-            
-            for pattern, count in patterns.items():
-                if count > 0:
-                    analysis += f"• '{pattern}': {count} occurrences\n"
-            
-            QMessageBox.information(self, "Analyse", analysis)
-            
+            with app_log.get_log().timed("Analyse", size=len(self.file_data)):
+                analysis = analyze(self.file_data)
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur analyse: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        dialog = AnalysisDialog(self, analysis, self.file_data,
+                                os.path.basename(self.current_file),
+                                money=self.money_spinbox.value())
+        dialog.offset_requested.connect(self.show_hex_offset)
+        # Non modale : on peut naviguer dans l'onglet hexadécimal en gardant la liste
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
     
     def compare_saves(self):
-        """Compare deux sauvegardes"""
-        QMessageBox.information(self, "Info", 
-                              "Pour trouver le vrai offset de l'argent:\n\n"
-                              "1. Créez deux sauvegardes identiques\n"
-                              "2. Modifiez l'argent dans le jeu\n"
-                              "3. Comparez les fichiers avec un éditeur hexa\n"
-                              "4. Modifiez l'offset dans la configuration")
+        """Compare plusieurs sauvegardes pour trouver l'offset de l'argent"""
+        from dialogs import OffsetFinderDialog
+        
+        dialog = OffsetFinderDialog(self, current_offset=self.money_offset)
+        
+        if dialog.exec() and dialog.selected_offset is not None:
+            self.use_money_offset(dialog.selected_offset)
+    
+    def scan_session(self):
+        """Recherche itérative de l'argent, sauvegarde après sauvegarde"""
+        from dialogs import ScanSessionDialog
+        
+        # Une seule session : elle survit à la fermeture de la fenêtre
+        if self.scan_dialog is None:
+            self.scan_dialog = ScanSessionDialog(
+                self, lambda: (self.current_file, self.file_data), self.money_offset)
+            self.scan_dialog.offset_requested.connect(self.show_hex_offset)
+            self.scan_dialog.offset_selected.connect(self.use_money_offset)
+        self.scan_dialog.show()
+        self.scan_dialog.raise_()
+        self.scan_dialog.activateWindow()
+    
+    def use_money_offset(self, offset):
+        """Nouvel offset de l'argent (déjà enregistré dans config.ini)"""
+        self.money_offset = offset
+        self.offset_money_input.setText(str(self.money_offset))
+        self.lbl_offset.setText(f"Offset argent: 0x{self.money_offset:X}")
+        
+        if self.current_file:
+            self.read_money()
+        
+        self.log(f"Offset argent trouvé: 0x{self.money_offset:X}")
+    
+    def diff_saves(self):
+        """Compare le fichier courant à d'autres sauvegardes, octet par octet"""
+        from dialogs import DiffDialog
+        
+        dialog = DiffDialog(self, self.current_file, self.file_data)
+        dialog.exec()
     
     def export_json(self):
         """Exporte les données en JSON"""
@@ -963,6 +1259,8 @@ class TS_Tool_Routier(QMainWindow):
         )
         
         if filepath:
+            import json
+            
             try:
                 data = {
                     "filename": os.path.basename(self.current_file),
@@ -985,25 +1283,21 @@ class TS_Tool_Routier(QMainWindow):
                                       f"📁 Fichier: {filepath}")
                 
             except Exception as e:
-                self.log(f"Erreur export JSON: {str(e)}")
+                self.log(f"Erreur export JSON: {str(e)}", level="ERROR")
                 QMessageBox.critical(self, "Erreur",
                                    f"Erreur export JSON:\n{str(e)}")
     
     def restore_backup(self):
-        """Restaure une sauvegarde"""
-        QMessageBox.information(self, "Info",
-                              "Les backups sont automatiquement créés\n"
-                              "quand vous enregistrez un fichier.\n\n"
-                              "Cherchez les fichiers avec l'extension\n"
-                              ".backup_YYYYMMDD_HHMMSS")
+        """Restaure un backup du fichier courant"""
+        self.open_backup_manager(self.current_file)
     
     def clean_logs(self):
         """Nettoie les logs"""
         try:
-            log_dir = Path("logs")
+            log_dir = settings.get_path('log_dir', 'logs')
             if log_dir.exists():
-                # Compter les fichiers
-                log_files = list(log_dir.glob("*.log"))
+                # Compter les fichiers (journal JSON et rapports de crash)
+                log_files = list(log_dir.glob("*.log")) + list(log_dir.glob("*.jsonl"))
                 
                 if not log_files:
                     QMessageBox.information(self, "Info", "Aucun fichier log à nettoyer")
@@ -1042,7 +1336,7 @@ class TS_Tool_Routier(QMainWindow):
         
         📁 Dossiers :
         • Application: {os.getcwd()}
-        • Logs: {os.path.join(os.getcwd(), 'logs')}
+        • Logs: {settings.get_path('log_dir', 'logs')}
         
         💾 Fichier courant :
         • {self.current_file if self.current_file else 'Aucun'}
@@ -1052,8 +1346,68 @@ class TS_Tool_Routier(QMainWindow):
     
     def manage_backups(self):
         """Gère les backups"""
-        QMessageBox.information(self, "Gestion des backups",
-                              "Fonctionnalité à venir dans la prochaine version!")
+        self.open_backup_manager(None)
+    
+    def open_backup_manager(self, source):
+        """Ouvre le gestionnaire de backups (filtré sur `source` si donné)"""
+        from backup_store import default_store
+        from dialogs import BackupManagerDialog
+        
+        try:
+            store = default_store()
+        except Exception as e:
+            self.log(f"Erreur catalogue backups: {str(e)}", level="ERROR")
+            QMessageBox.critical(self, "Erreur", f"Erreur catalogue backups:\n{str(e)}")
+            return
+        
+        dialog = BackupManagerDialog(self, store, source=source,
+                                     release_file=self.release_file)
+        try:
+            if dialog.exec() and dialog.restored_path:
+                self.log(f"Backup restauré: {dialog.restored_path}")
+        finally:
+            store.close()
+        
+        # Fichier libéré pour la restauration : le recharger
+        if self.current_file and self.file_data is None:
+            self.load_file(self.current_file)
+    
+    def release_file(self, filepath):
+        """Libère le fichier mappé avant qu'un autre outil ne l'écrive.
+        
+        Les modifications non enregistrées sont d'abord enregistrées ou
+        abandonnées au choix de l'utilisateur ; retourne False s'il annule.
+        """
+        if (self.file_data is None or not self.current_file
+                or os.path.abspath(filepath) != os.path.abspath(self.current_file)):
+            return True
+        
+        if self.modified:
+            reply = QMessageBox.question(
+                self, "Modifications non enregistrées",
+                "Le fichier contient des modifications non enregistrées.\n"
+                "Les enregistrer avant de le remplacer ?",
+                QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Discard
+                | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Cancel
+            )
+            if reply == QMessageBox.StandardButton.Cancel:
+                return False
+            if reply == QMessageBox.StandardButton.Save:
+                self.save_file()
+                if self.modified:
+                    # Échec de l'enregistrement : ne rien écraser
+                    return False
+        
+        # Détacher les vues avant de fermer le mapping
+        buffer, self.file_data = self.file_data, None
+        self.update_hex_display()
+        buffer.close()
+        self.history.clear()
+        self.update_undo_actions()
+        self.modified = False
+        self.modified_label.setText("")
+        return True
     
     def show_docs(self):
         """Affiche la documentation"""
@@ -1069,9 +1423,9 @@ class TS_Tool_Routier(QMainWindow):
            • Modifiez l'offset argent dans l'onglet Outils
            • Pour trouver le vrai offset :
              1. Créez 2 sauvegardes avec argent différent
-             2. Comparez avec un éditeur hexa
-             3. Trouvez l'octet qui change
-             4. Entrez l'offset dans la configuration
+             2. Outils > Comparer sauvegardes
+             3. Indiquez l'argent de chaque sauvegarde
+             4. Choisissez l'offset proposé (enregistré dans config.ini)
         
         3. ⚠️ IMPORTANT :
            • Toujours faire des sauvegardes manuelles !
@@ -1100,7 +1454,19 @@ class TS_Tool_Routier(QMainWindow):
                 event.ignore()
                 return
         
+        # Arrêter un chargement en cours et attendre les threads
+        if self.loader is not None:
+            self.loader.cancel()
+        if self.hex_tab not in self.lazy_tabs:
+            self.hex_minimap.stop()
+        if self.library is not None:
+            self.library.shutdown()
+        for thread in self.findChildren(QThread):
+            thread.quit()
+            thread.wait()
+        
         self.log("Application fermée")
+        app_log.shutdown()
         event.accept()
 
 # ============================================================================
@@ -1115,7 +1481,7 @@ def main():
         error_msg = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
         
         # Écrire dans le log
-        log_dir = Path("logs")
+        log_dir = settings.get_path('log_dir', 'logs')
         log_dir.mkdir(exist_ok=True)
         
         log_file = log_dir / f"crash_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
@@ -1126,6 +1492,9 @@ def main():
             f.write("\n" + "="*50 + "\n")
             f.write(error_msg)
         
+        app_log.log("Crash", "CRITICAL", crash_file=str(log_file), error=str(exc_value))
+        app_log.shutdown()
+        
         # Afficher message
         msg_box = QMessageBox()
         msg_box.setIcon(QMessageBox.Icon.Critical)
@@ -1151,6 +1520,10 @@ def main():
     window = TS_Tool_Routier()
     window.show()
     
+    # Mesurer le démarrage une fois la fenêtre affichée et interactive
+    QTimer.singleShot(0, lambda: window.log(
+        f"Démarrage en {(time.perf_counter() - STARTUP_TIME) * 1000:.0f} ms"))
+    
     # Exécuter
     sys.exit(app.exec())
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Journal asynchrone (JSON lines)
+Développé par ROUTIER87
+
+L'appelant ne fait que déposer un enregistrement dans une file : un thread
+d'écriture les regroupe et les écrit par paquets (toutes les secondes, ou
+à la fermeture), avec rotation du fichier selon sa taille.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+import settings
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LOG_NAME = "app"
+LOG_SUFFIX = ".jsonl"
+
+# Rotation : app.jsonl -> app.1.jsonl -> ... -> app.<LOG_BACKUPS>.jsonl
+MAX_LOG_SIZE = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# Délai maximum avant l'écriture d'un enregistrement (secondes)
+FLUSH_INTERVAL = 1.0
+
+# Enregistrements écrits au plus par paquet
+BATCH_SIZE = 500
+
+_STOP = object()
+
+# ============================================================================
+# ÉCRITURE
+# ============================================================================
+
+class AsyncLog:
+    """Journal JSON lines écrit par un thread dédié"""
+
+    def __init__(self, log_dir, name=LOG_NAME, max_size=MAX_LOG_SIZE, backups=LOG_BACKUPS,
+                 flush_interval=FLUSH_INTERVAL):
+        self.log_dir = str(log_dir)
+        self.path = os.path.join(self.log_dir, name + LOG_SUFFIX)
+        self.name = name
+        self.max_size = max_size
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.started = time.perf_counter()
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="app_log", daemon=True)
+        self._thread.start()
+
+    def write(self, message, level="INFO", **fields):
+        """Dépose un enregistrement (ne bloque jamais sur le disque)"""
+        self._queue.put((time.time(), time.perf_counter(), level, message, fields))
+
+    def error(self, message, **fields):
+        self.write(message, level="ERROR", **fields)
+
+    def timed(self, message, **fields):
+        """Contexte qui journalise `message` avec sa durée (duration_ms)"""
+        return _Timed(self, message, fields)
+
+    def close(self):
+        """Écrit ce qui reste dans la file et arrête le thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # ------------------------------------------------------------------------
+    # Thread d'écriture
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+
+            # Ce qui arrive dans les flush_interval secondes suivant le premier
+            # enregistrement part dans le même paquet (fermeture : aussitôt)
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < BATCH_SIZE and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if _STOP in batch:
+                running = False
+                batch = [record for record in batch if record is not _STOP]
+
+            try:
+                self._write_batch(batch)
+            except OSError:
+                # Disque plein, dossier supprimé... : le journal ne doit pas
+                # faire tomber l'application
+                pass
+
+    def _format(self, record):
+        timestamp, perf, level, message, fields = record
+        entry = {
+            'time': datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'),
+            'uptime_ms': round((perf - self.started) * 1000, 1),
+            'level': level,
+            'message': message,
+        }
+        entry.update(fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        payload = "".join(self._format(record) + "\n" for record in batch).encode('utf-8')
+
+        # Fichier ouvert par paquet : il peut être supprimé entre deux paquets
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+            size = f.tell()
+
+        if size >= self.max_size:
+            self._rotate()
+
+    def _rotate(self):
+        def numbered(i):
+            return os.path.join(self.log_dir, f"{self.name}.{i}{LOG_SUFFIX}")
+
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(numbered(i)):
+                os.replace(numbered(i), numbered(i + 1))
+        os.replace(self.path, numbered(1))
+
+class _Timed:
+    def __init__(self, log, message, fields):
+        self.log = log
+        self.message = message
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exc_type, exc_value, tb):
+        duration = round((time.perf_counter() - self.start) * 1000, 2)
+        if exc_type is None:
+            self.log.write(self.message, duration_ms=duration, **self.fields)
+        else:
+            self.log.error(self.message, duration_ms=duration, error=str(exc_value), **self.fields)
+        return False
+
+# ============================================================================
+# JOURNAL DE L'APPLICATION
+# ============================================================================
+
+_log = None
+_lock = threading.Lock()
+
+def get_log():
+    """Journal partagé (dossier log_dir de config.ini), créé au premier appel"""
+    global _log
+    with _lock:
+        if _log is None:
+            _log = AsyncLog(settings.get_path('log_dir', 'logs'))
+            atexit.register(_log.close)
+        return _log
+
+def log(message, level="INFO", **fields):
+    get_log().write(message, level, **fields)
+
+def shutdown():
+    """Vide la file (fermeture de l'application, crash)"""
+    global _log
+    with _lock:
+        if _log is not None:
+            _log.close()
+            _log = None
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Stockage dédupliqué des backups
+Développé par ROUTIER87
+
+Chaque backup est découpé en blocs de taille variable (découpage défini
+par le contenu : une modification locale ne décale pas les frontières
+suivantes). Chaque bloc est stocké une seule fois, compressé, sous son
+empreinte ; un backup n'est plus qu'un manifeste listant ses blocs.
+
+    backup_dir/chunks/ab/abcdef....z      blocs compressés (zlib)
+    backup_dir/manifests/<date>_<nom>.json   un manifeste par backup
+    backup_dir/state/<clé>.json           découpage courant de chaque fichier
+    backup_dir/catalog.sqlite             index des backups (liste instantanée)
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+from collections import namedtuple
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import settings
+from save_buffer import SaveBuffer
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Tailles des blocs : minimum, moyenne (2^MASK_BITS) et maximum
+MIN_CHUNK = 16 * 1024
+MASK_BITS = 16
+MAX_CHUNK = 256 * 1024
+
+# Fenêtre du hachage glissant (octets pris en compte avant chaque coupure)
+WINDOW = 32
+
+# Taille des blocs lus pour le découpage
+READ_SIZE = 16 * 1024 * 1024
+
+# Compression rapide : le backup doit rester quasi gratuit
+COMPRESS_LEVEL = 1
+
+# Catalogue des backups (index SQLite, évite de relire les manifestes)
+CATALOG_NAME = "catalog.sqlite"
+CATALOG_VERSION = 1
+
+# Restauration : différences regroupées si moins de DIFF_GAP octets les séparent
+DIFF_GAP = 16
+
+BackupEntry = namedtuple('BackupEntry', 'id source name created size digest money manifest')
+
+# Frontière quand les bits de poids fort du hachage sont nuls
+_MASK = np.uint32(((1 << MASK_BITS) - 1) << (32 - MASK_BITS))
+
+# Table « gear » fixe (dérivée de blake2b : identique d'une version à l'autre)
+_GEAR = np.frombuffer(b"".join(hashlib.blake2b(bytes([i]), digest_size=4).digest()
+                               for i in range(256)), dtype='<u4').astype(np.uint32)
+
+# ============================================================================
+# DÉCOUPAGE
+# ============================================================================
+
+def gear_hashes(data):
+    """Hachage gear de chaque position : somme des G[octet] décalés sur WINDOW octets.
+
+    h[i] = Σ G[data[i-k]] << k (k < WINDOW), calculé en log2(WINDOW) passes
+    vectorisées par doublement de la fenêtre.
+    """
+    h = _GEAR[np.frombuffer(data, dtype=np.uint8)]
+    width = 1
+    while width < WINDOW:
+        shifted = np.zeros_like(h)
+        shifted[width:] = h[:-width] << np.uint32(width)
+        h += shifted
+        width *= 2
+    return h
+
+def cut_candidates(read, start, stop):
+    """Positions (absolues, triées) où un bloc peut se terminer dans [start, stop).
+
+    `read(a, b)` lit les octets du fichier. Chaque zone est relue avec les
+    WINDOW - 1 octets qui la précèdent pour que le hachage ne dépende pas
+    du découpage en zones.
+    """
+    found = []
+    for pos in range(start, stop, READ_SIZE):
+        end = min(pos + READ_SIZE, stop)
+        prefix = min(WINDOW - 1, pos)
+        h = gear_hashes(read(pos - prefix, end))
+        hits = np.flatnonzero((h[prefix:] & _MASK) == 0)
+        # Coupure APRÈS l'octet trouvé
+        found.append(hits.astype(np.int64) + pos + 1)
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(found)
+
+def select_cuts(candidates, start, stop):
+    """Applique les tailles minimum et maximum à partir d'une frontière `start`"""
+    cuts = []
+    last = start
+    while last < stop:
+        if stop - last <= MIN_CHUNK:
+            cut = stop
+        else:
+            i = int(np.searchsorted(candidates, last + MIN_CHUNK))
+            cut = int(candidates[i]) if i < len(candidates) else stop
+            cut = min(cut, last + MAX_CHUNK, stop)
+        cuts.append(cut)
+        last = cut
+    return cuts
+
+def chunk_bounds(read, start, stop):
+    """Frontières des blocs de [start, stop) (la dernière vaut `stop`)"""
+    return select_cuts(cut_candidates(read, start, stop), start, stop)
+
+def chunk_id(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+def content_digest(chunks):
+    """Empreinte du contenu complet, dérivée des empreintes des blocs"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for digest, _ in chunks:
+        hasher.update(bytes.fromhex(digest))
+    return hasher.hexdigest()
+
+def diff_runs(old, new, gap=DIFF_GAP):
+    """Plages [(début, fin), ...] où `new` diffère de `old` (même taille).
+
+    Deux différences séparées de moins de `gap` octets forment une seule
+    plage : moins d'écritures pour quelques octets réécrits en plus.
+    """
+    a = np.frombuffer(old, dtype=np.uint8)
+    b = np.frombuffer(new, dtype=np.uint8)
+    changed = np.flatnonzero(a != b)
+    if len(changed) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(changed) > gap)
+    starts = np.concatenate(([changed[0]], changed[breaks + 1]))
+    stops = np.concatenate((changed[breaks], [changed[-1]])) + 1
+    return list(zip(starts.tolist(), stops.tolist()))
+
+def file_reader(f):
+    """Fonction read(a, b) sur un fichier ouvert en binaire"""
+    def read(start, stop):
+        f.seek(start)
+        return f.read(stop - start)
+    return read
+
+# ============================================================================
+# MAGASIN
+# ============================================================================
+
+def default_store():
+    """Magasin du dossier backup_dir de config.ini"""
+    return BackupStore(settings.get_path('backup_dir', 'backups'))
+
+class BackupStore:
+    """Magasin de blocs partagé par tous les backups de `backup_dir`"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+        self.state_dir = self.root / "state"
+        for path in (self.chunks_dir, self.manifests_dir, self.state_dir):
+            path.mkdir(parents=True, exist_ok=True)
+        self._db = self._open_catalog()
+
+    # ------------------------------------------------------------------------
+    # Blocs
+    # ------------------------------------------------------------------------
+
+    def _chunk_path(self, digest):
+        return self.chunks_dir / digest[:2] / f"{digest}.z"
+
+    def put_chunk(self, data):
+        """Stocke un bloc s'il est nouveau et retourne son empreinte"""
+        digest = chunk_id(data)
+        path = self._chunk_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # Écriture atomique : plusieurs processus peuvent stocker le même bloc
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(zlib.compress(data, COMPRESS_LEVEL))
+            os.replace(tmp, path)
+        return digest
+
+    def get_chunk(self, digest):
+        return zlib.decompress(self._chunk_path(digest).read_bytes())
+
+    def _store_range(self, read, start, stop, bounds):
+        """Stocke les blocs délimités par `bounds` (depuis `start`)"""
+        chunks = []
+        last = start
+        for cut in bounds:
+            data = read(last, cut)
+            chunks.append([self.put_chunk(data), cut - last])
+            last = cut
+        return chunks
+
+    # ------------------------------------------------------------------------
+    # Découpage courant des fichiers
+    # ------------------------------------------------------------------------
+
+    def _state_path(self, filepath):
+        key = hashlib.blake2b(os.path.abspath(filepath).encode('utf-8'),
+                              digest_size=10).hexdigest()
+        return self.state_dir / f"{key}.json"
+
+    def _load_state(self, filepath):
+        """Découpage mémorisé, s'il correspond encore au fichier sur disque"""
+        try:
+            state = json.loads(self._state_path(filepath).read_text(encoding='utf-8'))
+            st = os.stat(filepath)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != st.st_size or state.get('mtime_ns') != st.st_mtime_ns:
+            return None
+        return state['chunks']
+
+    def _save_state(self, filepath, chunks):
+        st = os.stat(filepath)
+        state = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'chunks': chunks}
+        path = self._state_path(filepath)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def scan(self, filepath):
+        """Découpe et stocke le fichier complet ; retourne sa liste de blocs"""
+        size = os.path.getsize(filepath)
+        with open(filepath, 'rb') as f:
+            read = file_reader(f)
+            chunks = self._store_range(read, 0, size, chunk_bounds(read, 0, size))
+        self._save_state(filepath, chunks)
+        return chunks
+
+    def current_chunks(self, filepath):
+        """Blocs du fichier tel qu'il est sur disque (mémorisés si possible)"""
+        chunks = self._load_state(filepath)
+        if chunks is None:
+            chunks = self.scan(filepath)
+        return chunks
+
+    def update_state(self, filepath, chunks, ranges):
+        """Met à jour le découpage après une réécriture en place.
+
+        `chunks` est le découpage d'avant l'enregistrement et `ranges` les
+        plages [(début, fin), ...] réécrites (taille du fichier inchangée).
+        Seule la zone autour de chaque plage est redécoupée : on repart de la
+        dernière frontière avant la plage jusqu'à retomber sur une frontière
+        existante, au-delà de laquelle le découpage est identique.
+        """
+        chunks = [list(c) for c in chunks]
+        size = sum(length for _, length in chunks)
+        if size != os.path.getsize(filepath):
+            return self.scan(filepath)
+
+        with open(filepath, 'rb') as f:
+            read = file_reader(f)
+            for start, stop in sorted(ranges):
+                chunks = self._rechunk(read, chunks, size, start, stop)
+
+        self._save_state(filepath, chunks)
+        return chunks
+
+    def _rechunk(self, read, chunks, size, start, stop):
+        """Redécoupe la zone touchée par la plage [start, stop)"""
+        bounds = np.cumsum([length for _, length in chunks]).tolist()
+        ends = [0] + bounds
+
+        # Dernière frontière avant la plage : rien en amont n'a changé
+        first = bisect_right(ends, start) - 1
+        region_start = ends[first]
+
+        # Au-delà de stop + WINDOW, les hachages sont ceux d'avant
+        settle = stop + WINDOW - 1
+        last = bisect_left(bounds, settle)
+        old = set(bounds[first:])
+
+        while True:
+            region_stop = bounds[min(last, len(bounds) - 1)]
+            cuts = chunk_bounds(read, region_start, region_stop)
+
+            # Première nouvelle frontière qui coïncide avec une ancienne
+            resync = None
+            for i, cut in enumerate(cuts):
+                if cut >= settle and cut in old and cut != region_stop:
+                    resync = i
+                    break
+
+            if resync is not None:
+                cuts = cuts[:resync + 1]
+                break
+            if region_stop == size:
+                break
+            # Pas encore resynchronisé : on élargit la zone
+            last = min(len(bounds) - 1, last + max(1, last - first))
+
+        new_chunks = self._store_range(read, region_start, cuts[-1], cuts)
+        tail = bisect_right(bounds, cuts[-1])
+        return chunks[:first] + new_chunks + chunks[tail:]
+
+    # ------------------------------------------------------------------------
+    # Backups
+    # ------------------------------------------------------------------------
+
+    def backup(self, filepath, money=None):
+        """Crée un backup du fichier sur disque et retourne son manifeste.
+
+        Si le fichier n'a pas changé depuis le dernier découpage mémorisé,
+        aucun octet n'est relu : seul le manifeste est écrit.
+        """
+        chunks = self.current_chunks(filepath)
+        now = datetime.now()
+        name = os.path.basename(filepath)
+        manifest = {
+            'version': 1,
+            'source': os.path.abspath(filepath),
+            'name': name,
+            'created': now.isoformat(timespec='seconds'),
+            'size': sum(length for _, length in chunks),
+            'digest': content_digest(chunks),
+            'money': money,
+            'chunks': chunks,
+        }
+
+        path = self.manifests_dir / f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{name}.json"
+        path.write_text(json.dumps(manifest), encoding='utf-8')
+        manifest['path'] = str(path)
+        self._catalog(manifest)
+        return manifest
+
+    def load_manifest(self, path):
+        manifest = json.loads(Path(path).read_text(encoding='utf-8'))
+        manifest['path'] = str(path)
+        return manifest
+
+    # ------------------------------------------------------------------------
+    # Catalogue
+    # ------------------------------------------------------------------------
+
+    def _open_catalog(self):
+        """Ouvre (ou crée) le catalogue SQLite des backups"""
+        db = sqlite3.connect(str(self.root / CATALOG_NAME), timeout=30)
+        if db.execute("PRAGMA user_version").fetchone()[0] < CATALOG_VERSION:
+            with db:
+                db.executescript("""
+                    CREATE TABLE IF NOT EXISTS backups (
+                        id INTEGER PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        created TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        digest TEXT NOT NULL,
+                        money INTEGER,
+                        manifest TEXT NOT NULL UNIQUE
+                    );
+                    CREATE INDEX IF NOT EXISTS backups_source ON backups (source, created);
+                    CREATE INDEX IF NOT EXISTS backups_created ON backups (created);
+                """)
+                db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            self._db = db
+            self.reindex()
+        return db
+
+    def _catalog(self, manifest):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO backups "
+                "(source, name, created, size, digest, money, manifest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (manifest['source'], manifest['name'], manifest['created'],
+                 manifest['size'], manifest.get('digest') or content_digest(manifest['chunks']),
+                 manifest.get('money'), os.path.basename(manifest['path'])))
+
+    def reindex(self):
+        """Reconstruit le catalogue à partir des manifestes présents"""
+        with self._db:
+            self._db.execute("DELETE FROM backups")
+        for path in sorted(self.manifests_dir.glob("*.json")):
+            try:
+                self._catalog(self.load_manifest(path))
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def list_backups(self, source=None):
+        """Backups du catalogue (d'un fichier ou de tous), du plus récent au plus ancien.
+
+        Seul l'index est lu : aucun manifeste ni bloc n'est ouvert.
+        """
+        query = f"SELECT {', '.join(BackupEntry._fields)} FROM backups"
+        params = ()
+        if source is not None:
+            query += " WHERE source = ?"
+            params = (os.path.abspath(source),)
+        query += " ORDER BY created DESC, id DESC"
+        return [BackupEntry(*row) for row in self._db.execute(query, params)]
+
+    def manifest_for(self, entry):
+        return self.load_manifest(self.manifests_dir / entry.manifest)
+
+    def delete(self, entry):
+        """Supprime un backup (ses blocs restent jusqu'au nettoyage)"""
+        with self._db:
+            self._db.execute("DELETE FROM backups WHERE id = ?", (entry.id,))
+        try:
+            (self.manifests_dir / entry.manifest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def collect_garbage(self):
+        """Supprime les blocs qui ne sont plus utilisés par aucun backup.
+
+        Retourne (nombre de blocs supprimés, octets libérés).
+        """
+        used = set()
+        for path in list(self.manifests_dir.glob("*.json")) + list(self.state_dir.glob("*.json")):
+            try:
+                chunks = json.loads(path.read_text(encoding='utf-8'))['chunks']
+            except (OSError, ValueError, KeyError):
+                continue
+            used.update(digest for digest, _ in chunks)
+
+        removed, freed = 0, 0
+        for path in self.chunks_dir.glob("*/*.z"):
+            if path.stem not in used:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        return removed, freed
+
+    def close(self):
+        self._db.close()
+
+    # ------------------------------------------------------------------------
+    # Restauration
+    # ------------------------------------------------------------------------
+
+    def iter_data(self, manifest):
+        """Contenu du backup, bloc par bloc"""
+        for digest, _ in manifest['chunks']:
+            yield self.get_chunk(digest)
+
+    def restore(self, manifest, target=None):
+        """Remet le fichier dans l'état du backup et retourne le nombre d'octets écrits.
+
+        Si la taille n'a pas changé, seuls les octets différents sont
+        réécrits (journalisés comme un enregistrement incrémental) ; les
+        blocs identiques au découpage courant ne sont même pas relus.
+        """
+        target = target or manifest['source']
+        if not os.path.exists(target) or os.path.getsize(target) != manifest['size']:
+            return self._restore_full(manifest, target)
+
+        current = self.current_chunks(target)
+        offset = 0
+        present = set()
+        for digest, length in current:
+            present.add((offset, digest))
+            offset += length
+
+        buffer = SaveBuffer(target)
+        try:
+            offset = 0
+            for digest, length in manifest['chunks']:
+                if (offset, digest) not in present:
+                    data = self.get_chunk(digest)
+                    for start, stop in diff_runs(buffer[offset:offset + length], data):
+                        buffer.write(offset + start, data[start:stop])
+                offset += length
+
+            written = sum(stop - start for start, stop in buffer.modified_ranges())
+            buffer.save_in_place()
+        finally:
+            buffer.close()
+
+        self._save_state(target, manifest['chunks'])
+        return written
+
+    def _restore_full(self, manifest, target):
+        """Réécrit tout le fichier (à côté puis remplacement atomique)"""
+        tmp = f"{target}.tmp"
+        with open(tmp, 'wb') as f:
+            for data in self.iter_data(manifest):
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+        self._save_state(target, manifest['chunks'])
+        return manifest['size']
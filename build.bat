@@ -6,11 +6,14 @@ echo ========================================
 echo.
 
 echo 1. Installation des dépendances...
-pip install pyinstaller PyQt6 --quiet
+pip install pyinstaller PyQt6 numpy --quiet
+rem Optionnels : sauvegardes compressées en zstd / LZ4
+pip install zstandard lz4 --quiet
 
 echo.
 echo 2. Construction de l'exécutable...
-pyinstaller --noconfirm --clean --onefile ^
+rem --onedir : pas de décompression dans un dossier temporaire à chaque lancement
+pyinstaller --noconfirm --clean --onedir ^
             --name="TS_Tool_Routier" ^
             --windowed ^
             --icon=NONE ^
@@ -20,9 +23,9 @@ pyinstaller --noconfirm --clean --onefile ^
 echo.
 echo 3. Préparation du dossier final...
 if exist "TS_Tool_Routier_Final" rmdir /s /q "TS_Tool_Routier_Final"
-mkdir "TS_Tool_Routier_Final"
-copy "dist\TS_Tool_Routier.exe" "TS_Tool_Routier_Final\"
+xcopy /E /I /Y "dist\TS_Tool_Routier" "TS_Tool_Routier_Final"
 copy "README.txt" "TS_Tool_Routier_Final\"
+copy "config.ini" "TS_Tool_Routier_Final\"
 
 echo.
 echo ========================================
@@ -0,0 +1,892 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Dialogues des outils
+Développé par ROUTIER87
+"""
+
+import os
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QListWidget, QListWidgetItem,
+                             QFileDialog, QMessageBox, QHeaderView, QApplication,
+                             QCheckBox, QTabWidget, QSplitter, QWidget, QLineEdit, QComboBox)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+import settings
+from hex_format import hex_row
+from save_container import open_save
+from save_library import default_save_dir
+
+# ============================================================================
+# OUTILS
+# ============================================================================
+
+SAVE_FILTER = "Fichiers de sauvegarde (*.save);;Tous les fichiers (*.*)"
+
+def parse_number(text):
+    """Convertit une saisie utilisateur (espaces, virgule décimale) en nombre"""
+    text = text.replace(' ', '').replace(' ', '').replace('€', '').replace(',', '.')
+    if not text:
+        raise ValueError("Valeur vide")
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+# ============================================================================
+# RECHERCHE D'OFFSET
+# ============================================================================
+
+class OffsetFinderDialog(QDialog):
+    """Trouve l'offset de l'argent à partir de plusieurs sauvegardes"""
+
+    MAX_RESULTS = 500
+
+    def __init__(self, parent=None, current_offset=None):
+        super().__init__(parent)
+        self.setWindowTitle("Recherche d'offset")
+        self.resize(600, 500)
+
+        self.current_offset = current_offset
+        self.selected_offset = None
+
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(
+            "Ajoutez plusieurs sauvegardes et indiquez l'argent affiché en jeu\n"
+            "pour chacune. Les offsets qui contiennent cette valeur dans\n"
+            "TOUTES les sauvegardes sont listés, du plus probable au moins probable."))
+
+        # Sauvegardes et valeurs connues
+        self.files_table = QTableWidget(0, 2)
+        self.files_table.setHorizontalHeaderLabels(["Sauvegarde", "Argent en jeu"])
+        self.files_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.files_table)
+
+        files_btn_layout = QHBoxLayout()
+        btn_add = QPushButton("➕ Ajouter des sauvegardes")
+        btn_add.clicked.connect(self.add_files)
+        files_btn_layout.addWidget(btn_add)
+
+        btn_remove = QPushButton("➖ Retirer")
+        btn_remove.clicked.connect(self.remove_file)
+        files_btn_layout.addWidget(btn_remove)
+
+        files_btn_layout.addStretch()
+
+        btn_search = QPushButton("🔍 Rechercher")
+        btn_search.clicked.connect(self.run_search)
+        files_btn_layout.addWidget(btn_search)
+        layout.addLayout(files_btn_layout)
+
+        # Résultats
+        self.lbl_results = QLabel("Résultats :")
+        layout.addWidget(self.lbl_results)
+
+        self.results_list = QListWidget()
+        self.results_list.itemDoubleClicked.connect(self.apply_selected)
+        layout.addWidget(self.results_list)
+
+        btn_layout = QHBoxLayout()
+        btn_close = QPushButton("Fermer")
+        btn_close.clicked.connect(self.reject)
+        btn_layout.addWidget(btn_close)
+        btn_layout.addStretch()
+
+        self.btn_apply = QPushButton("💾 Utiliser comme offset argent")
+        self.btn_apply.clicked.connect(self.apply_selected)
+        self.btn_apply.setEnabled(False)
+        btn_layout.addWidget(self.btn_apply)
+        layout.addLayout(btn_layout)
+
+        self.results_list.currentItemChanged.connect(self.on_result_changed)
+
+    def add_files(self):
+        """Ajoute des sauvegardes à comparer"""
+        filepaths, _ = QFileDialog.getOpenFileNames(
+            self, "Sauvegardes à comparer", str(default_save_dir()), SAVE_FILTER)
+
+        for filepath in filepaths:
+            row = self.files_table.rowCount()
+            self.files_table.insertRow(row)
+
+            item = QTableWidgetItem(os.path.basename(filepath))
+            item.setData(Qt.ItemDataRole.UserRole, filepath)
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.files_table.setItem(row, 0, item)
+            self.files_table.setItem(row, 1, QTableWidgetItem(""))
+
+    def remove_file(self):
+        """Retire la sauvegarde sélectionnée"""
+        row = self.files_table.currentRow()
+        if row >= 0:
+            self.files_table.removeRow(row)
+
+    def run_search(self):
+        """Lance la recherche sur toutes les sauvegardes"""
+        from offset_finder import ScanSession
+
+        filepaths, values = [], []
+        for row in range(self.files_table.rowCount()):
+            filepath = self.files_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            try:
+                values.append(parse_number(self.files_table.item(row, 1).text()))
+            except ValueError:
+                QMessageBox.warning(self, "Erreur",
+                                    f"Argent invalide pour {os.path.basename(filepath)}")
+                return
+            filepaths.append(filepath)
+
+        if len(filepaths) < 2:
+            QMessageBox.warning(self, "Attention",
+                                "Ajoutez au moins deux sauvegardes avec un argent différent")
+            return
+
+        buffers = []
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            session = ScanSession()
+            for filepath, value in zip(filepaths, values):
+                buffers.append(open_save(filepath))
+                session.next_scan(buffers[-1], value)
+            candidates = session.results(hint=self.current_offset, limit=self.MAX_RESULTS)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur recherche: {str(e)}")
+            return
+        finally:
+            for buffer in buffers:
+                buffer.close()
+            QApplication.restoreOverrideCursor()
+
+        self.results_list.clear()
+        for candidate in candidates:
+            text = f"0x{candidate.offset:08X}  ({candidate.offset})  {candidate.type_name}"
+            if candidate.aligned:
+                text += "  • aligné"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, candidate)
+            self.results_list.addItem(item)
+
+        self.lbl_results.setText(f"Résultats : {len(session):,} offset(s) ({len(candidates)} affichés)")
+        if candidates:
+            self.results_list.setCurrentRow(0)
+
+    def on_result_changed(self, item, previous=None):
+        """Seuls les candidats int64 correspondent au format de l'argent"""
+        candidate = item.data(Qt.ItemDataRole.UserRole) if item else None
+        self.btn_apply.setEnabled(candidate is not None and candidate.type_name == 'int64')
+
+    def apply_selected(self, *args):
+        """Enregistre le candidat choisi dans config.ini"""
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        candidate = item.data(Qt.ItemDataRole.UserRole)
+        if candidate.type_name != 'int64':
+            QMessageBox.warning(self, "Attention",
+                                "L'éditeur lit l'argent en entier 64 bits (int64).")
+            return
+
+        settings.set_value('Game', 'money_offset', candidate.offset)
+        self.selected_offset = candidate.offset
+        self.accept()
+
+# ============================================================================
+# RECHERCHE ITÉRATIVE
+# ============================================================================
+
+class ScanSessionDialog(QDialog):
+    """Recherche itérative (offset_finder.ScanSession).
+
+    Non modale : on charge une autre sauvegarde dans la fenêtre principale,
+    on saisit la nouvelle valeur affichée en jeu (ou on choisit comment
+    elle a changé) et on affine. `current_save` retourne (chemin, buffer)
+    de la sauvegarde chargée.
+    """
+
+    offset_requested = pyqtSignal(int)
+    offset_selected = pyqtSignal(int)
+
+    MAX_RESULTS = 500
+
+    def __init__(self, parent, current_save, current_offset=None):
+        from offset_finder import ScanSession, VALUE_TYPES, RELATIONS
+
+        super().__init__(parent)
+        self.setWindowTitle("Recherche itérative")
+        self.resize(600, 560)
+
+        self.current_save = current_save
+        self.current_offset = current_offset
+        self.session = ScanSession()
+        # Nom de la dernière sauvegarde scannée (son instantané est gardé par
+        # la session : point de départ des comparaisons)
+        self.snapshot_name = None
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            "1. Saisissez l'argent affiché en jeu et lancez le premier scan.\n"
+            "2. Chargez une autre sauvegarde (argent différent), saisissez la\n"
+            "   nouvelle valeur et affinez, jusqu'à ce qu'il reste peu d'offsets.\n"
+            "Valeur inconnue : choisissez comment elle a changé depuis la sauvegarde\n"
+            "précédente (elle peut être écrasée par la nouvelle)."))
+
+        # Types cherchés au premier scan
+        types_layout = QHBoxLayout()
+        types_layout.addWidget(QLabel("Types :"))
+        self.type_boxes = {}
+        for name in VALUE_TYPES:
+            box = QCheckBox(name)
+            box.setChecked(True)
+            self.type_boxes[name] = box
+            types_layout.addWidget(box)
+        types_layout.addStretch()
+        layout.addLayout(types_layout)
+
+        value_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("Valeur exacte", None)
+        for relation, text in RELATIONS.items():
+            self.mode_combo.addItem(text, relation)
+        self.mode_combo.currentIndexChanged.connect(self.on_mode_changed)
+        value_layout.addWidget(self.mode_combo)
+        self.value_input = QLineEdit()
+        self.value_input.setPlaceholderText("ex : 1 000 000")
+        self.value_input.returnPressed.connect(self.scan_current)
+        value_layout.addWidget(self.value_input)
+        layout.addLayout(value_layout)
+
+        scan_layout = QHBoxLayout()
+        self.btn_scan = QPushButton("🔎 Premier scan")
+        self.btn_scan.clicked.connect(self.scan_current)
+        scan_layout.addWidget(self.btn_scan)
+
+        self.btn_scan_file = QPushButton("📂 Depuis des fichiers...")
+        self.btn_scan_file.clicked.connect(self.scan_file)
+        scan_layout.addWidget(self.btn_scan_file)
+
+        scan_layout.addStretch()
+        btn_reset = QPushButton("↺ Nouvelle recherche")
+        btn_reset.clicked.connect(self.reset)
+        scan_layout.addWidget(btn_reset)
+        layout.addLayout(scan_layout)
+
+        # Historique des scans
+        self.steps_list = QListWidget()
+        self.steps_list.setMaximumHeight(90)
+        layout.addWidget(self.steps_list)
+
+        self.lbl_results = QLabel("Résultats :")
+        layout.addWidget(self.lbl_results)
+
+        self.results_list = QListWidget()
+        self.results_list.itemDoubleClicked.connect(self.show_selected)
+        self.results_list.currentItemChanged.connect(self.on_result_changed)
+        layout.addWidget(self.results_list)
+
+        btn_layout = QHBoxLayout()
+        btn_close = QPushButton("Fermer")
+        btn_close.clicked.connect(self.close)
+        btn_layout.addWidget(btn_close)
+        btn_layout.addStretch()
+
+        self.btn_apply = QPushButton("💾 Utiliser comme offset argent")
+        self.btn_apply.clicked.connect(self.apply_selected)
+        self.btn_apply.setEnabled(False)
+        btn_layout.addWidget(self.btn_apply)
+        layout.addLayout(btn_layout)
+
+    # ------------------------------------------------------------------------
+    # Scans
+    # ------------------------------------------------------------------------
+
+    def read_value(self):
+        try:
+            return parse_number(self.value_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "Erreur", "Valeur invalide")
+            return None
+
+    def scan_current(self):
+        """Scan (ou affinage) sur la sauvegarde chargée dans la fenêtre principale"""
+        filepath, buffer = self.current_save()
+        if buffer is None:
+            QMessageBox.warning(self, "Attention", "Ouvrez d'abord une sauvegarde")
+            return
+        self.run_scan([(filepath, buffer)])
+
+    def scan_file(self):
+        """Scan (ou affinage) sur des sauvegardes choisies sur le disque.
+
+        Valeur exacte : une sauvegarde. Comparaison : une ou plusieurs,
+        prises dans l'ordre de leur date de modification.
+        """
+        if self.mode_combo.currentData() is None:
+            filepath, _ = QFileDialog.getOpenFileName(self, "Sauvegarde", str(default_save_dir()), SAVE_FILTER)
+            filepaths = [filepath] if filepath else []
+        else:
+            filepaths, _ = QFileDialog.getOpenFileNames(self, "Sauvegardes", str(default_save_dir()), SAVE_FILTER)
+            filepaths.sort(key=os.path.getmtime)
+        if not filepaths:
+            return
+
+        saves = []
+        try:
+            for filepath in filepaths:
+                saves.append((filepath, open_save(filepath)))
+            self.run_scan(saves)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur ouverture: {str(e)}")
+        finally:
+            for _, buffer in saves:
+                buffer.close()
+
+    def run_scan(self, saves):
+        """Scan sur [(chemin, buffer), ...] (ordre chronologique)"""
+        relation = self.mode_combo.currentData()
+        value = None
+        if relation in (None, 'delta'):
+            value = self.read_value()
+            if value is None:
+                return
+
+        if not self.session.started:
+            self.session.type_names = [name for name, box in self.type_boxes.items() if box.isChecked()]
+            if not self.session.type_names:
+                QMessageBox.warning(self, "Attention", "Choisissez au moins un type")
+                return
+
+        # Comparaison : l'instantané de la sauvegarde précédente (contenu
+        # tel qu'il était chargé, même si le fichier a été écrasé depuis)
+        # ouvre la chaîne
+        from_snapshot = relation is not None and self.session.snapshot is not None
+        if relation is not None and not from_snapshot and len(saves) < 2:
+            try:
+                self.session.take_snapshot(saves[-1][1])
+            except ValueError as e:
+                QMessageBox.warning(self, "Attention", str(e))
+                return
+            self.snapshot_name = os.path.basename(saves[-1][0])
+            self.steps_list.addItem(f"📸 {self.snapshot_name} : chargez la "
+                                    f"sauvegarde suivante puis relancez")
+            self.steps_list.scrollToBottom()
+            return
+
+        names = [os.path.basename(filepath) for filepath, _ in saves]
+        if from_snapshot:
+            names.insert(0, f"📸 {self.snapshot_name}")
+        label = " → ".join(names)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            if relation is None:
+                count = self.session.next_scan(saves[-1][1], value, label)
+            else:
+                count = self.session.compare_scan([buffer for _, buffer in saves],
+                                                  relation, value, label, from_snapshot)
+            self.session.take_snapshot(saves[-1][1])
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur recherche: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        self.snapshot_name = os.path.basename(saves[-1][0])
+        step = len(self.session.steps)
+        _, description, _ = self.session.steps[-1]
+        description = f"= {value:,}" if relation is None else f": {description}"
+        self.steps_list.addItem(f"{step}. {label} {description} → {count:,} candidat(s)")
+        self.steps_list.scrollToBottom()
+        self.value_input.clear()
+        self.update_state()
+        self.show_results()
+
+    def on_mode_changed(self):
+        relation = self.mode_combo.currentData()
+        self.value_input.setEnabled(relation in (None, 'delta'))
+        self.value_input.setPlaceholderText("ex : 1 000 000" if relation is None
+                                            else "ex : -5000" if relation == 'delta' else "")
+
+    def reset(self):
+        self.session.reset()
+        self.snapshot_name = None
+        self.steps_list.clear()
+        self.results_list.clear()
+        self.lbl_results.setText("Résultats :")
+        self.update_state()
+
+    def update_state(self):
+        started = self.session.started
+        self.btn_scan.setText("➡️ Affiner (sauvegarde chargée)" if started else "🔎 Premier scan")
+        for box in self.type_boxes.values():
+            box.setEnabled(not started)
+
+    # ------------------------------------------------------------------------
+    # Résultats
+    # ------------------------------------------------------------------------
+
+    def show_results(self):
+        candidates = self.session.results(hint=self.current_offset, limit=self.MAX_RESULTS)
+
+        self.results_list.clear()
+        for candidate in candidates:
+            text = f"0x{candidate.offset:08X}  ({candidate.offset})  {candidate.type_name}"
+            if candidate.aligned:
+                text += "  • aligné"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, candidate)
+            self.results_list.addItem(item)
+
+        total = len(self.session)
+        self.lbl_results.setText(
+            f"Résultats : {total:,} offset(s) ({len(candidates)} affichés, "
+            f"{self.session.nbytes / 1024 / 1024:.1f} Mo)")
+        if candidates:
+            self.results_list.setCurrentRow(0)
+
+    def on_result_changed(self, item, previous=None):
+        """Seuls les candidats int64 correspondent au format de l'argent"""
+        candidate = item.data(Qt.ItemDataRole.UserRole) if item else None
+        self.btn_apply.setEnabled(candidate is not None and candidate.type_name == 'int64')
+
+    def show_selected(self, item):
+        self.offset_requested.emit(item.data(Qt.ItemDataRole.UserRole).offset)
+
+    def apply_selected(self):
+        """Enregistre le candidat choisi dans config.ini"""
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        candidate = item.data(Qt.ItemDataRole.UserRole)
+        settings.set_value('Game', 'money_offset', candidate.offset)
+        self.current_offset = candidate.offset
+        self.offset_selected.emit(candidate.offset)
+
+# ============================================================================
+# GESTION DES BACKUPS
+# ============================================================================
+
+class BackupManagerDialog(QDialog):
+    """Liste les backups du catalogue et restaure celui choisi"""
+
+    def __init__(self, parent=None, store=None, source=None, release_file=None):
+        super().__init__(parent)
+        self.setWindowTitle("Gestion des backups")
+        self.resize(800, 500)
+
+        self.store = store
+        self.source = source
+        # Appelé avant d'écrire dans un fichier (l'appelant libère son mapping) ;
+        # retourne False pour annuler (modifications non enregistrées)
+        self.release_file = release_file
+        self.restored_path = None
+        self.entries = []
+
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.chk_current = QCheckBox("Fichier courant uniquement")
+        self.chk_current.setChecked(source is not None)
+        self.chk_current.setEnabled(source is not None)
+        self.chk_current.toggled.connect(self.refresh)
+        filter_layout.addWidget(self.chk_current)
+        filter_layout.addStretch()
+        self.lbl_count = QLabel()
+        filter_layout.addWidget(self.lbl_count)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Date", "Sauvegarde", "Taille", "Argent", "Empreinte"])
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.itemDoubleClicked.connect(self.restore_selected)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        btn_delete = QPushButton("🗑️ Supprimer")
+        btn_delete.clicked.connect(self.delete_selected)
+        btn_layout.addWidget(btn_delete)
+
+        btn_clean = QPushButton("🧹 Libérer l'espace")
+        btn_clean.clicked.connect(self.collect_garbage)
+        btn_layout.addWidget(btn_clean)
+        btn_layout.addStretch()
+
+        btn_close = QPushButton("Fermer")
+        btn_close.clicked.connect(self.reject)
+        btn_layout.addWidget(btn_close)
+
+        btn_restore = QPushButton("🔄 Restaurer")
+        btn_restore.clicked.connect(self.restore_selected)
+        btn_layout.addWidget(btn_restore)
+        layout.addLayout(btn_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        """Relit le catalogue (index seul, aucun fichier de backup n'est ouvert)"""
+        source = self.source if self.chk_current.isChecked() else None
+        self.entries = self.store.list_backups(source)
+
+        self.table.setRowCount(len(self.entries))
+        for row, entry in enumerate(self.entries):
+            money = f"{entry.money:,} €" if entry.money is not None else "-"
+            values = [entry.created.replace('T', ' '), entry.name,
+                      f"{entry.size:,}", money, entry.digest[:12]]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column in (2, 3):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if column == 1:
+                    item.setToolTip(entry.source)
+                self.table.setItem(row, column, item)
+
+        self.lbl_count.setText(f"{len(self.entries):,} backup(s)")
+
+    def current_entry(self):
+        row = self.table.currentRow()
+        if 0 <= row < len(self.entries):
+            return self.entries[row]
+        return None
+
+    def restore_selected(self, *args):
+        """Restaure le backup choisi (seuls les octets différents sont écrits)"""
+        entry = self.current_entry()
+        if entry is None:
+            return
+
+        target = entry.source
+        if not os.path.exists(os.path.dirname(target)):
+            target, _ = QFileDialog.getSaveFileName(self, "Restaurer vers", entry.name, SAVE_FILTER)
+            if not target:
+                return
+
+        reply = QMessageBox.question(
+            self, "Restaurer",
+            f"Remettre {os.path.basename(target)} dans l'état du\n"
+            f"{entry.created.replace('T', ' ')} ?\n\n"
+            f"L'état actuel du fichier sur disque sera d'abord sauvegardé.")
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        if self.release_file is not None and not self.release_file(target):
+            return
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            # L'état actuel devient lui-même un backup : la restauration s'annule
+            if os.path.exists(target):
+                self.store.backup(target)
+            written = self.store.restore(self.store.manifest_for(entry), target)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur restauration: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        self.restored_path = target
+        QMessageBox.information(self, "Succès",
+                                f"✅ Backup restauré ({written:,} octet(s) réécrit(s))")
+        self.accept()
+
+    def delete_selected(self):
+        """Supprime le backup choisi du catalogue"""
+        entry = self.current_entry()
+        if entry is None:
+            return
+        reply = QMessageBox.question(
+            self, "Supprimer",
+            f"Supprimer le backup du {entry.created.replace('T', ' ')} ?")
+        if reply == QMessageBox.StandardButton.Yes:
+            self.store.delete(entry)
+            self.refresh()
+
+    def collect_garbage(self):
+        """Supprime les blocs qui ne servent plus à aucun backup"""
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            removed, freed = self.store.collect_garbage()
+        finally:
+            QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "Nettoyage",
+                                f"{removed:,} bloc(s) supprimé(s), {freed / 1024 / 1024:.1f} Mo libérés")
+
+# ============================================================================
+# ANALYSE
+# ============================================================================
+
+class AnalysisDialog(QDialog):
+    """Résultat de l'analyse d'une sauvegarde (save_analysis.SaveAnalysis)"""
+
+    offset_requested = pyqtSignal(int)
+
+    MAX_ROWS = 2000
+    PREVIEW_LENGTH = 48
+
+    def __init__(self, parent, analysis, buffer, filename, money=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Analyse - {filename}")
+        self.resize(700, 550)
+
+        layout = QVBoxLayout(self)
+
+        size = max(analysis.size, 1)
+        lines = [
+            f"📁 Fichier: {filename}",
+            f"📏 Taille: {analysis.size:,} octets",
+        ]
+        if money is not None:
+            lines.append(f"💰 Argent: {money:,} €")
+        lines += [
+            "",
+            f"• Octets nuls: {analysis.zero_bytes:,} ({analysis.zero_bytes / size * 100:.1f}%)",
+            f"• Entropie globale: {analysis.global_entropy:.2f} bits/octet",
+            f"• Blocs compressés/chiffrés (≥ 7.5): {analysis.high_entropy_blocks:,}"
+            f" / {len(analysis.entropy):,}",
+            f"• Zones de zéros: {len(analysis.zero_runs):,}",
+            f"• Zones de texte: {len(analysis.strings):,}",
+            "• Octets fréquents: " + ", ".join(
+                f"0x{value:02X} ({count / size * 100:.1f}%)"
+                for value, count in analysis.most_common(5)),
+        ]
+        summary = QLabel("\n".join(lines))
+        summary.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(summary)
+
+        layout.addWidget(QLabel("Double-cliquez sur une zone pour l'afficher en hexadécimal :"))
+
+        tabs = QTabWidget()
+        tabs.addTab(self._regions_table(
+            analysis.strings[:self.MAX_ROWS].tolist(), ["Offset", "Longueur", "Texte"],
+            lambda start, stop: buffer[start:min(stop, start + self.PREVIEW_LENGTH)]
+            .decode('ascii', errors='replace')), f"Texte ({len(analysis.strings):,})")
+
+        # Zones de zéros : les plus grandes d'abord
+        largest = [(start, start + length)
+                   for start, length in analysis.largest_zero_runs(self.MAX_ROWS)]
+        tabs.addTab(self._regions_table(largest, ["Offset", "Longueur"]),
+                    f"Zéros ({len(analysis.zero_runs):,})")
+        layout.addWidget(tabs)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        btn_close = QPushButton("Fermer")
+        btn_close.clicked.connect(self.accept)
+        btn_layout.addWidget(btn_close)
+        layout.addLayout(btn_layout)
+
+    def _regions_table(self, regions, headers, preview=None):
+        """Tableau des zones [(début, fin), ...] : offset, longueur, aperçu"""
+        shown = regions
+        table = QTableWidget(len(shown), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(len(headers) - 1, QHeaderView.ResizeMode.Stretch)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+
+        for row, (start, stop) in enumerate(shown):
+            item = QTableWidgetItem(f"0x{start:08X}")
+            item.setData(Qt.ItemDataRole.UserRole, start)
+            table.setItem(row, 0, item)
+            table.setItem(row, 1, QTableWidgetItem(f"{stop - start:,}"))
+            if preview is not None:
+                table.setItem(row, 2, QTableWidgetItem(preview(start, stop)))
+
+        table.itemDoubleClicked.connect(
+            lambda item: self.offset_requested.emit(table.item(item.row(), 0).data(Qt.ItemDataRole.UserRole)))
+        return table
+
+# ============================================================================
+# DIFFÉRENCES BINAIRES
+# ============================================================================
+
+class DiffDialog(QDialog):
+    """Compare plusieurs sauvegardes : plages différentes et vues hexadécimales côte à côte"""
+
+    MAX_ROWS = 5000
+    MAX_VIEWS = 4
+    PREVIEW_LENGTH = 16
+
+    def __init__(self, parent=None, current_file=None, current_buffer=None):
+        super().__init__(parent)
+        self.setWindowTitle("Différences binaires")
+        self.resize(1100, 700)
+
+        # Buffer du fichier courant (modifications comprises), jamais fermé ici
+        self.current_file = current_file
+        self.current_buffer = current_buffer
+        self.buffers = []
+        self.opened = []
+        self.diff = None
+
+        layout = QVBoxLayout(self)
+
+        files_layout = QHBoxLayout()
+        self.files_list = QListWidget()
+        self.files_list.setMaximumHeight(90)
+        files_layout.addWidget(self.files_list)
+
+        files_btn_layout = QVBoxLayout()
+        btn_add = QPushButton("➕ Ajouter")
+        btn_add.clicked.connect(self.add_files)
+        files_btn_layout.addWidget(btn_add)
+        btn_remove = QPushButton("➖ Retirer")
+        btn_remove.clicked.connect(self.remove_file)
+        files_btn_layout.addWidget(btn_remove)
+        btn_compare = QPushButton("🔍 Comparer")
+        btn_compare.clicked.connect(self.run_diff)
+        files_btn_layout.addWidget(btn_compare)
+        files_layout.addLayout(files_btn_layout)
+        layout.addLayout(files_layout)
+
+        if current_file:
+            self._add_path(current_file)
+
+        self.lbl_summary = QLabel("Ajoutez au moins deux sauvegardes (la première sert de référence)")
+        layout.addWidget(self.lbl_summary)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.table = QTableWidget(0, 2)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.currentCellChanged.connect(self.show_run)
+        splitter.addWidget(self.table)
+
+        self.views_widget = QWidget()
+        self.views_layout = QHBoxLayout(self.views_widget)
+        self.views_layout.setContentsMargins(0, 0, 0, 0)
+        self.views = []
+        splitter.addWidget(self.views_widget)
+        splitter.setSizes([250, 450])
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        btn_close = QPushButton("Fermer")
+        btn_close.clicked.connect(self.accept)
+        btn_layout.addWidget(btn_close)
+        layout.addLayout(btn_layout)
+
+        self.finished.connect(self.close_buffers)
+
+    def _add_path(self, filepath):
+        item = QListWidgetItem(os.path.basename(filepath))
+        item.setData(Qt.ItemDataRole.UserRole, filepath)
+        item.setToolTip(filepath)
+        self.files_list.addItem(item)
+
+    def add_files(self):
+        filepaths, _ = QFileDialog.getOpenFileNames(
+            self, "Sauvegardes à comparer", str(default_save_dir()), SAVE_FILTER)
+        for filepath in filepaths:
+            self._add_path(filepath)
+
+    def remove_file(self):
+        row = self.files_list.currentRow()
+        if row >= 0:
+            self.files_list.takeItem(row)
+
+    def close_buffers(self, *args):
+        """Détache les vues puis ferme les fichiers ouverts par le dialogue"""
+        for view in self.views:
+            view.set_buffer(None)
+        for buffer in self.opened:
+            buffer.close()
+        self.opened = []
+        self.buffers = []
+
+    def run_diff(self):
+        """Compare toutes les sauvegardes de la liste à la première"""
+        from save_diff import diff_saves
+
+        filepaths = [self.files_list.item(row).data(Qt.ItemDataRole.UserRole)
+                     for row in range(self.files_list.count())]
+        if len(filepaths) < 2:
+            QMessageBox.warning(self, "Attention", "Ajoutez au moins deux sauvegardes")
+            return
+
+        self.close_buffers()
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            for filepath in filepaths:
+                if self.current_buffer is not None and filepath == self.current_file:
+                    self.buffers.append(self.current_buffer)
+                else:
+                    buffer = open_save(filepath)
+                    self.opened.append(buffer)
+                    self.buffers.append(buffer)
+            self.diff = diff_saves(self.buffers)
+        except Exception as e:
+            self.close_buffers()
+            QMessageBox.critical(self, "Erreur", f"Erreur comparaison: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        self._fill_table([os.path.basename(f) for f in filepaths])
+        self._build_views([os.path.basename(f) for f in filepaths])
+        if len(self.diff):
+            self.table.setCurrentCell(0, 0)
+
+    def _fill_table(self, names):
+        """Une ligne par plage : offset, longueur, octets de chaque sauvegarde"""
+        runs = self.diff.runs[:self.MAX_ROWS].tolist()
+        self.table.clear()
+        self.table.setColumnCount(2 + len(names))
+        self.table.setHorizontalHeaderLabels(["Offset", "Longueur"] + names)
+        self.table.setRowCount(len(runs))
+        for row, (start, stop) in enumerate(runs):
+            item = QTableWidgetItem(f"0x{start:08X}")
+            item.setData(Qt.ItemDataRole.UserRole, (start, stop))
+            self.table.setItem(row, 0, item)
+            self.table.setItem(row, 1, QTableWidgetItem(f"{stop - start:,}"))
+            for column, buffer in enumerate(self.buffers, start=2):
+                data = buffer[start:min(stop, start + self.PREVIEW_LENGTH)]
+                text = hex_row(data) + (" …" if stop - start > self.PREVIEW_LENGTH else "")
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+        common = max(self.diff.common_size, 1)
+        sizes = " / ".join(f"{size:,}" for size in self.diff.sizes)
+        self.lbl_summary.setText(
+            f"{len(self.diff):,} plage(s) différente(s), {self.diff.changed_bytes:,} octet(s)"
+            f" ({self.diff.changed_bytes / common * 100:.3f}%)"
+            f"{f' - {self.MAX_ROWS:,} affichées' if len(self.diff) > self.MAX_ROWS else ''}"
+            f"  •  Tailles : {sizes}")
+
+    def _build_views(self, names):
+        """Vues hexadécimales synchronisées, une par sauvegarde"""
+        from hex_view import HexView
+
+        while self.views_layout.count():
+            self.views_layout.takeAt(0).widget().deleteLater()
+        self.views = []
+
+        for name, buffer in list(zip(names, self.buffers))[:self.MAX_VIEWS]:
+            column = QVBoxLayout()
+            column.addWidget(QLabel(name))
+            view = HexView()
+            view.set_buffer(buffer)
+            column.addWidget(view)
+            box = QWidget()
+            box.setLayout(column)
+            column.setContentsMargins(0, 0, 0, 0)
+            self.views_layout.addWidget(box)
+            self.views.append(view)
+
+        # Défilement commun
+        for view in self.views:
+            for other in self.views:
+                if other is not view:
+                    view.verticalScrollBar().valueChanged.connect(other.verticalScrollBar().setValue)
+
+    def show_run(self, row, *args):
+        """Positionne toutes les vues sur la plage choisie, surlignée"""
+        item = self.table.item(row, 0)
+        if item is None:
+            return
+        start, stop = item.data(Qt.ItemDataRole.UserRole)
+        for view in self.views:
+            view.goto_offset(start, stop - start)
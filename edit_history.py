@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Historique des modifications (annuler / rétablir)
+Développé par ROUTIER87
+
+Chaque modification est un delta (offset, anciens octets, nouveaux
+octets) : la mémoire suit la taille des modifications, pas celle de la
+sauvegarde. Les deltas sont empilés dans des tableaux compacts (un
+array d'entiers et un bytearray), sans objet Python par modification.
+Les changements rapprochés d'un même champ (flèches d'un QSpinBox) sont
+fusionnés en une seule étape.
+"""
+
+import time
+from array import array
+
+import settings
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Changements d'un même champ fusionnés s'ils sont plus proches que ce délai
+COALESCE_MS = settings.get_int('Editor', 'undo_coalesce_ms', 800)
+
+# Octets de deltas conservés au plus (les étapes les plus anciennes sont oubliées)
+MAX_UNDO_BYTES = settings.get_int('Editor', 'undo_limit_kb', 1024) * 1024
+
+# ============================================================================
+# PILE DE DELTAS
+# ============================================================================
+
+class _DeltaStack:
+    """Pile de deltas : (offset, longueur ancienne, longueur nouvelle) par
+    étape dans `_meta`, octets anciens puis nouveaux à la suite dans `_data`"""
+
+    def __init__(self):
+        self._meta = array('q')
+        self._data = bytearray()
+
+    def __len__(self):
+        return len(self._meta) // 3
+
+    @property
+    def nbytes(self):
+        return len(self._meta) * self._meta.itemsize + len(self._data)
+
+    def push(self, offset, old, new):
+        self._meta.extend((offset, len(old), len(new)))
+        self._data += old
+        self._data += new
+
+    def peek(self):
+        """Dernière étape (offset, anciens octets, nouveaux octets)"""
+        offset, old_len, new_len = self._meta[-3:]
+        end = len(self._data)
+        old_start = end - new_len - old_len
+        return (offset, bytes(self._data[old_start:end - new_len]),
+                bytes(self._data[end - new_len:]))
+
+    def pop(self):
+        step = self.peek()
+        _, old_len, new_len = self._meta[-3:]
+        del self._meta[-3:]
+        del self._data[len(self._data) - old_len - new_len:]
+        return step
+
+    def set_new(self, new):
+        """Remplace les nouveaux octets de la dernière étape (même longueur)"""
+        self._data[len(self._data) - len(new):] = new
+
+    def drop_oldest(self, count):
+        """Oublie les `count` étapes les plus anciennes"""
+        size = sum(self._meta[i + 1] + self._meta[i + 2]
+                   for i in range(0, 3 * count, 3))
+        del self._meta[:3 * count]
+        del self._data[:size]
+
+    def clear(self):
+        self._meta = array('q')
+        self._data = bytearray()
+
+# ============================================================================
+# HISTORIQUE
+# ============================================================================
+
+class EditHistory:
+    """Annuler / rétablir pour un buffer (SaveBuffer ou bytearray)"""
+
+    def __init__(self, coalesce_ms=COALESCE_MS, max_bytes=MAX_UNDO_BYTES):
+        self.coalesce = coalesce_ms / 1000
+        self.max_bytes = max_bytes
+        self._undo = _DeltaStack()
+        self._redo = _DeltaStack()
+
+        # Dernière étape fusionnable : (clé, offset, instant)
+        self._last = None
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les deltas (annuler et rétablir)"""
+        return self._undo.nbytes + self._redo.nbytes
+
+    def can_undo(self):
+        return len(self._undo) > 0
+
+    def can_redo(self):
+        return len(self._redo) > 0
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._last = None
+
+    def edit(self, buffer, offset, data, length=None, key=None):
+        """Remplace `length` octets (len(data) par défaut) et mémorise le delta.
+
+        Avec une `key` (nom du champ), un changement du même champ arrivé
+        moins de COALESCE_MS après le précédent prolonge la même étape.
+        Retourne False si les octets étaient déjà identiques.
+        """
+        data = bytes(data)
+        length = len(data) if length is None else length
+        old = bytes(buffer[offset:offset + length])
+        if old == data:
+            return False
+
+        _replace(buffer, offset, length, data)
+        self.record(offset, old, data, key)
+        return True
+
+    def record(self, offset, old, new, key=None):
+        """Mémorise une modification déjà appliquée au buffer"""
+        now = time.monotonic()
+        self._redo.clear()
+
+        if (key is not None and self._last is not None and len(self._undo)
+                and self._last[:2] == (key, offset)
+                and now - self._last[2] < self.coalesce):
+            _, first_old, previous = self._undo.peek()
+            if len(previous) == len(new) and len(first_old) == len(new):
+                if first_old == new:
+                    # Retour à la valeur de départ : l'étape disparaît
+                    self._undo.pop()
+                    self._last = None
+                else:
+                    self._undo.set_new(new)
+                    self._last = (key, offset, now)
+                return
+
+        self._undo.push(offset, old, new)
+        self._last = (key, offset, now) if key is not None else None
+        self._trim()
+
+    def undo(self, buffer):
+        """Annule la dernière étape ; retourne (offset, longueur) ou None"""
+        if not self._undo:
+            return None
+        offset, old, new = self._undo.pop()
+        _replace(buffer, offset, len(new), old)
+        self._redo.push(offset, old, new)
+        self._last = None
+        return offset, len(old)
+
+    def redo(self, buffer):
+        """Rétablit la dernière étape annulée ; retourne (offset, longueur) ou None"""
+        if not self._redo:
+            return None
+        offset, old, new = self._redo.pop()
+        _replace(buffer, offset, len(old), new)
+        self._undo.push(offset, old, new)
+        self._last = None
+        return offset, len(new)
+
+    def _trim(self):
+        """Oublie les étapes les plus anciennes au-delà de max_bytes"""
+        if self._undo.nbytes <= self.max_bytes:
+            return
+        # Par lots (un quart de la pile) : la suppression en tête recopie la pile
+        self._undo.drop_oldest(max(len(self._undo) // 4, 1))
+
+def _replace(buffer, offset, length, data):
+    """Remplace `length` octets par `data` (SaveBuffer ou bytearray)"""
+    if isinstance(buffer, bytearray):
+        buffer[offset:offset + length] = data
+    else:
+        buffer.replace(offset, length, data)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Localisation des champs par signatures
+Développé par ROUTIER87
+
+Un offset absolu (money_offset) casse dès que la sauvegarde se décale.
+Une ancre décrit plutôt un champ par une signature proche (octets ou
+texte) et un décalage relatif. Toutes les signatures sont cherchées en
+une seule passe : une table de 65 536 entrées indexée par une paire
+d'octets de chaque signature sert de préfiltre vectorisé, puis seuls les
+candidats sont vérifiés. Les offsets trouvés sont gardés dans le cache
+de lecture (parse_cache) : rouvrir la même sauvegarde ne relance pas la
+recherche.
+
+config.ini (le nom d'une ancre est celui d'un champ du schéma) :
+    [Anchors]
+    ; nom = signature, décalage[, occurrence]
+    money = "CompanyMoney", 0x10
+    game_version = DE AD BE EF, -8, 2
+
+Fichier schema_file : clés "anchor", "delta" et "occurrence" d'un champ.
+"""
+
+import hashlib
+from collections import namedtuple
+
+import settings
+from parse_cache import default_cache
+from save_schema import load_schema, read_schema_file, schema_file_path
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Morceaux parcourus d'un coup
+LOCATE_CHUNK_SIZE = 16 * 1024 * 1024
+
+Anchor = namedtuple('Anchor', 'name signature delta occurrence')
+
+# ============================================================================
+# ANCRES
+# ============================================================================
+
+def parse_signature(text):
+    """Signature saisie : "texte" entre guillemets, sinon hexadécimal ou texte"""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1].encode('utf-8')
+    # hex_search (NumPy) seulement pour une signature hexadécimale
+    from hex_search import parse_pattern
+    return parse_pattern(text)
+
+def make_anchor(name, signature, delta=0, occurrence=1):
+    """Crée une ancre validée (ValueError si la signature est trop courte)"""
+    if isinstance(signature, str):
+        signature = parse_signature(signature)
+    delta = int(delta, 0) if isinstance(delta, str) else int(delta)
+    occurrence = int(occurrence, 0) if isinstance(occurrence, str) else int(occurrence)
+    if len(signature) < 2:
+        raise ValueError(f"Ancre '{name}' : signature trop courte (2 octets minimum)")
+    if occurrence < 1:
+        raise ValueError(f"Ancre '{name}' : occurrence invalide")
+    return Anchor(name, bytes(signature), delta, occurrence)
+
+def _key_position(signature):
+    """Paire d'octets servant de clé : la moins banale (évite 00 00 et FF FF)"""
+    def commonness(k):
+        return sum(b in (0x00, 0xFF) for b in signature[k:k + 2])
+    return min(range(len(signature) - 1), key=commonness)
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+class FieldLocator:
+    """Index multi-signatures, compilé une fois"""
+
+    def __init__(self, anchors):
+        self.anchors = list({a.name: a for a in anchors}.values())
+
+        # Préfiltre : paire d'octets (little-endian) -> [(ancre, position de la paire)]
+        # (table NumPy construite au premier scan : sans ancre, NumPy n'est pas chargé)
+        self._table = None
+        self._by_key = {}
+        for index, anchor in enumerate(self.anchors):
+            k = _key_position(anchor.signature)
+            key = anchor.signature[k] | anchor.signature[k + 1] << 8
+            self._by_key.setdefault(key, []).append((index, k))
+
+        spec = repr(sorted(self.anchors)).encode('utf-8')
+        self.fingerprint = hashlib.blake2b(spec, digest_size=8).hexdigest()
+
+    def __len__(self):
+        return len(self.anchors)
+
+    def __contains__(self, name):
+        return any(a.name == name for a in self.anchors)
+
+    def scan(self, buffer, hasher=None):
+        """Une passe sur le buffer : {nom: offset du champ, ou None}.
+
+        La recherche s'arrête dès que toutes les ancres sont trouvées,
+        sauf si `hasher` doit voir tout le fichier.
+        """
+        import numpy as np
+        from offset_finder import value_view
+
+        if self._table is None:
+            self._table = np.zeros(1 << 16, dtype=bool)
+            self._table[list(self._by_key)] = True
+
+        size = len(buffer)
+        overlap = max((len(a.signature) for a in self.anchors), default=1) - 1
+        found = [[] for _ in self.anchors]
+        remaining = len(self.anchors)
+
+        for start in range(0, size, LOCATE_CHUNK_SIZE):
+            stop = min(start + LOCATE_CHUNK_SIZE, size)
+            if hasher is not None:
+                hasher.update(buffer[start:stop])
+            if not remaining:
+                continue
+
+            data = buffer[start:min(stop + overlap, size)]
+            arr = np.frombuffer(data, dtype=np.uint8)
+            pairs = value_view(data, np.dtype('<u2'))
+            candidates = np.flatnonzero(self._table[pairs])
+            if len(candidates) == 0:
+                continue
+            keys = pairs[candidates]
+
+            for key in np.unique(keys).tolist():
+                positions = candidates[keys == key]
+                for index, k in self._by_key[key]:
+                    anchor = self.anchors[index]
+                    if len(found[index]) >= anchor.occurrence:
+                        continue
+                    m = len(anchor.signature)
+                    # Occurrences qui commencent dans ce morceau (le suivant couvre le reste)
+                    starts = positions - k
+                    starts = starts[(starts >= 0) & (starts < stop - start) & (starts + m <= len(arr))]
+                    for j, byte in enumerate(anchor.signature):
+                        if len(starts) == 0:
+                            break
+                        if j not in (k, k + 1):
+                            starts = starts[arr[starts + j] == byte]
+                    needed = anchor.occurrence - len(found[index])
+                    found[index].extend((starts[:needed] + start).tolist())
+                    if len(found[index]) >= anchor.occurrence:
+                        remaining -= 1
+
+            if not remaining and hasher is None:
+                break
+
+        located = {}
+        for anchor, matches in zip(self.anchors, found):
+            offset = None
+            if len(matches) >= anchor.occurrence:
+                offset = matches[anchor.occurrence - 1] + anchor.delta
+                if not 0 <= offset < size:
+                    offset = None
+            located[anchor.name] = offset
+        return located
+
+    def locate(self, buffer, fallback=None):
+        """Offsets de tous les champs ancrés (cache par empreinte du fichier).
+
+        Sans empreinte connue, elle est calculée pendant la recherche (même
+        passe) et enregistrée sur le buffer. Les ancres introuvables
+        prennent l'offset de `fallback` s'il y en a un.
+        """
+        if not self.anchors:
+            return {}
+
+        modified = getattr(buffer, 'is_modified', False)
+        digest = None if modified else getattr(buffer, 'digest', None)
+        cache = default_cache()
+        key = f"located:{self.fingerprint}"
+        located = cache.get(digest, key)
+
+        if located is None:
+            hasher = None
+            if digest is None and not modified:
+                hasher = hashlib.blake2b(digest_size=16)
+            located = self.scan(buffer, hasher)
+            if hasher is not None:
+                digest = hasher.hexdigest()
+                buffer.digest = digest
+            cache.put(digest, key, located)
+
+        if fallback:
+            located = {name: offset if offset is not None else fallback.get(name)
+                       for name, offset in located.items()}
+        return located
+
+# ============================================================================
+# CHARGEMENT
+# ============================================================================
+
+def load_locator(schema=None):
+    """Ancres de config.ini [Anchors] et du fichier schema_file (lignes
+    invalides et ancres sans champ de ce nom dans `schema` ignorées)"""
+    config = settings.load_config()
+    schema = schema or load_schema()
+    anchors = []
+
+    if config.has_section('Anchors'):
+        for name, spec in config.items('Anchors'):
+            try:
+                # Un texte entre guillemets peut contenir des virgules
+                if spec.lstrip().startswith('"'):
+                    signature, _, rest = spec.lstrip()[1:].partition('"')
+                    parts = ['"' + signature + '"'] + [p.strip() for p in rest.split(',')[1:]]
+                else:
+                    parts = [part.strip() for part in spec.split(',')]
+                anchors.append(make_anchor(name, *parts))
+            except (TypeError, ValueError) as e:
+                print(f"Erreur ancre [Anchors] {name}: {e}")
+
+    path = schema_file_path(config)
+    if path is not None:
+        try:
+            for entry in read_schema_file(path):
+                if 'anchor' in entry:
+                    anchors.append(make_anchor(entry['name'], entry['anchor'],
+                                               entry.get('delta', 0), entry.get('occurrence', 1)))
+        except Exception as e:
+            print(f"Erreur ancres {path}: {e}")
+
+    # Une ancre sans champ serait cherchée à chaque chargement pour rien
+    known = []
+    for anchor in anchors:
+        if anchor.name in schema:
+            known.append(anchor)
+        else:
+            print(f"Ancre {anchor.name} ignorée : aucun champ de ce nom dans le schéma")
+    return FieldLocator(known)
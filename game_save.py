@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Sauvegarde du jeu (sans interface)
+Développé par ROUTIER87
+"""
+
+import os
+
+from save_container import open_save
+from save_schema import load_schema
+from field_locator import load_locator
+from parse_cache import default_cache
+from edit_history import EditHistory
+
+# ============================================================================
+# CLASSES MÉTIER
+# ============================================================================
+
+class GameSave:
+    """Représente une sauvegarde du jeu"""
+    
+    def __init__(self, filepath, use_mmap=True, schema=None, locator=None):
+        self.filepath = filepath
+        self.use_mmap = use_mmap
+        self.filename = os.path.basename(filepath)
+        self.data = None
+        self.money = 0
+        self.company_name = ""
+        self.game_version = ""
+        self.fields = {}
+        self.error = None
+        self.last_backup = None
+        
+        # Champs connus (config.ini [Game]/[Fields], fichier schema_file)
+        self.base_schema = schema or load_schema()
+        self.schema = self.base_schema
+        self.offsets = self.schema.offsets()
+        
+        # Champs repérés par signature (config.ini [Anchors]) : offsets
+        # résolus à chaque ouverture, le schéma de base sert de repli
+        self.locator = locator if locator is not None else load_locator(self.base_schema)
+        
+        # Annuler / rétablir (deltas des modifications du buffer)
+        self.history = EditHistory()
+    
+    def load(self):
+        """Charge le fichier de sauvegarde"""
+        try:
+            # Fichier mappé : rien n'est copié en mémoire au chargement
+            # (conteneur compressé : contenu décompressé dans temp_dir, mappé)
+            buffer = open_save(self.filepath, self.use_mmap)
+            # Fichier inchangé depuis la dernière ouverture : empreinte connue
+            buffer.digest = default_cache().lookup(self.filepath)
+            self.attach(buffer)
+            return True
+            
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erreur chargement: {e}")
+            return False
+    
+    def attach(self, buffer):
+        """Utilise un buffer déjà ouvert (chargement en arrière-plan)"""
+        if self.data is not None and self.data is not buffer:
+            self.data.close()
+        self.data = buffer
+        self.history.clear()
+        if len(self.locator):
+            # Déjà résolus par le chargement en arrière-plan ?
+            located = getattr(buffer, 'located', None)
+            if located is None:
+                located = self.locator.locate(buffer)
+            self.schema = self.base_schema.with_offsets(located)
+            self.offsets = self.schema.offsets()
+        self.read_fields()
+    
+    def read_fields(self):
+        """Décode tous les champs du schéma (un unpack par groupe de champs).
+
+        Pour une sauvegarde déjà ouverte avec ce schéma, les valeurs viennent
+        du cache de lecture, sans rien décoder.
+        """
+        digest = None if self.data.is_modified else self.data.digest
+        cache = default_cache()
+        key = f"fields:{self.schema.fingerprint}"
+        cached = cache.get(digest, key)
+        self.fields = self.schema.from_json(cached) if cached is not None else None
+        if self.fields is None:
+            self.fields = self.schema.decode(self.data)
+            cache.put(digest, key, self.schema.to_json(self.fields))
+        
+        if self.fields['money'] is not None:
+            self.money = self.fields['money']
+        if self.fields['company_name'] is not None:
+            self.company_name = self.fields['company_name']
+        if self.fields['game_version'] is not None:
+            self.game_version = self.fields['game_version']
+    
+    def save(self, new_filepath=None, backup_store=None):
+        """Sauvegarde les modifications.
+
+        Avec un `backup_store`, le fichier d'origine est d'abord sauvegardé
+        dans le magasin de backups (manifeste dans self.last_backup).
+        """
+        try:
+            if new_filepath is None:
+                new_filepath = self.filepath
+            in_place = os.path.abspath(new_filepath) == os.path.abspath(self.filepath)
+            
+            # Backup de l'état sur disque, avant toute modification
+            self.last_backup = None
+            if backup_store is not None and in_place:
+                self.last_backup = backup_store.backup(
+                    self.filepath, money=self.schema.decode_field(self.data.original, 'money'))
+            
+            # Mettre à jour l'argent
+            money = self.schema['money']
+            if money.offset + money.length <= len(self.data):
+                self.data[money.offset:money.offset + money.length] = \
+                    self.schema.encode_field('money', self.money)
+            
+            # Écrire le fichier (fusion de la surcouche de modifications)
+            ranges = self.data.modified_ranges()
+            self.data.save(new_filepath)
+            
+            # Le magasin redécoupe seulement les plages réécrites (plages du
+            # contenu logique : sans objet pour un conteneur recompressé)
+            if self.last_backup is not None and not getattr(self.data, 'is_container', False):
+                try:
+                    backup_store.update_state(self.filepath, self.last_backup['chunks'], ranges)
+                except Exception as e:
+                    print(f"Erreur mise à jour backup: {e}")
+            
+            return True
+            
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erreur sauvegarde: {e}")
+            return False
+    
+    def read_money(self):
+        """Argent actuellement dans le buffer (None si hors du fichier)"""
+        return self.schema.decode_field(self.data, 'money')
+    
+    def set_money(self, amount):
+        """Modifie l'argent (écrit dans le buffer, étape d'annulation fusionnée
+        avec les changements rapprochés)"""
+        self.money = amount
+        money = self.schema['money']
+        if self.data is not None and money.offset + money.length <= len(self.data):
+            self.history.edit(self.data, money.offset,
+                              self.schema.encode_field('money', amount), key='money')
+    
+    def undo(self):
+        """Annule la dernière modification ; retourne (offset, longueur) ou None"""
+        return self._apply_history(self.history.undo)
+    
+    def redo(self):
+        """Rétablit la dernière modification annulée"""
+        return self._apply_history(self.history.redo)
+    
+    def _apply_history(self, step):
+        if self.data is None:
+            return None
+        changed = step(self.data)
+        if changed is not None:
+            self.read_fields()
+        return changed
+    
+    def close(self):
+        """Libère le fichier mappé"""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
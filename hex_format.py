@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Mise en forme hexadécimale/ASCII
+Développé par ROUTIER87
+
+Formatage commun aux aperçus (app.py, ts_app.py) et à la vue
+hexadécimale : un bloc entier est converti en une fois par bytes.hex et
+bytes.translate (boucles en C), puis découpé en lignes, sans boucle
+Python par octet.
+
+    python hex_format.py      mesure le nombre de lignes formatées par seconde
+"""
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BYTES_PER_ROW = 16
+
+# Octet -> caractère affiché dans la colonne ASCII ('.' si non imprimable)
+ASCII_TABLE = bytes(b if 32 <= b < 127 else ord('.') for b in range(256))
+
+# Octet -> texte "XX" (une cellule de la vue hexadécimale)
+HEX_BYTES = [f"{b:02X}" for b in range(256)]
+
+# ============================================================================
+# FORMATAGE
+# ============================================================================
+
+def hex_row(data):
+    """Octets en hexadécimal majuscule séparés par des espaces ("DE AD BE EF")"""
+    return memoryview(data).hex(' ').upper()
+
+def ascii_row(data):
+    """Colonne ASCII : caractères imprimables, '.' pour les autres"""
+    return bytes(data).translate(ASCII_TABLE).decode('ascii')
+
+def format_rows(data, base=0, width=BYTES_PER_ROW):
+    """Lignes "OFFSET: XX XX ...  ascii" d'un bloc d'octets.
+
+    Hexadécimal et ASCII sont calculés pour tout le bloc, puis découpés.
+    """
+    view = memoryview(data).cast('B')
+    size = len(view)
+    if not size:
+        return []
+
+    # Espace final : chaque octet occupe alors exactement 3 caractères ("XX ")
+    hex_text = view.hex(' ').upper() + ' '
+    raw = data if isinstance(data, bytes) else view.tobytes()
+    ascii_text = raw.translate(ASCII_TABLE).decode('ascii')
+    hex_width = 3 * width
+
+    full = size - size % width
+    lines = [f"{base + start:08X}: {hex_text[3 * start:3 * start + hex_width]} "
+             f"{ascii_text[start:start + width]}"
+             for start in range(0, full, width)]
+    if full < size:
+        # Dernière ligne incomplète, complétée par des espaces
+        lines.append(f"{base + full:08X}: {hex_text[3 * full:]:<{hex_width}} "
+                     f"{ascii_text[full:]:<{width}}")
+    return lines
+
+def format_dump(data, base=0, width=BYTES_PER_ROW):
+    """Texte complet d'un aperçu (une ligne par `width` octets)"""
+    lines = format_rows(data, base, width)
+    return "\n".join(lines) + "\n" if lines else ""
+
+# ============================================================================
+# MESURE
+# ============================================================================
+
+def _legacy_dump(data):
+    """Ancienne boucle octet par octet (référence de la mesure)"""
+    text = ""
+    for i in range(0, len(data), 16):
+        text += f"{i:08X}: "
+        for j in range(16):
+            text += f"{data[i+j]:02X} " if i + j < len(data) else "   "
+        text += " "
+        for j in range(16):
+            if i + j < len(data):
+                byte = data[i + j]
+                text += chr(byte) if 32 <= byte < 127 else "."
+            else:
+                text += " "
+        text += "\n"
+    return text
+
+def benchmark(size=64 * 1024, repeat=5):
+    """Lignes par seconde : ancienne boucle et format_dump, sur `size` octets"""
+    import os
+    import time
+
+    data = os.urandom(size)
+    assert _legacy_dump(data[:1000]) == format_dump(data[:1000])
+
+    rows = -(-size // BYTES_PER_ROW)
+    results = {}
+    for name, func in (("boucle par octet", _legacy_dump), ("format_dump", format_dump)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(data)
+            best = min(best, time.perf_counter() - start)
+        results[name] = rows / best
+    return results
+
+if __name__ == "__main__":
+    results = benchmark()
+    for name, rate in results.items():
+        print(f"{name:<18} {rate:>14,.0f} lignes/s")
+    print(f"Gain: x{results['format_dump'] / results['boucle par octet']:.1f}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Recherche de motifs dans les sauvegardes
+Développé par ROUTIER87
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from offset_finder import value_view
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Taille des blocs répartis entre les threads
+SEARCH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# En dessous, un seul bloc : inutile de démarrer des threads
+PARALLEL_THRESHOLD = 2 * SEARCH_CHUNK_SIZE
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+def parse_pattern(text):
+    """Interprète la saisie : hexadécimal (\"DE AD BE EF\") sinon texte UTF-8"""
+    try:
+        pattern = bytes.fromhex(text.replace(' ', ''))
+        if pattern:
+            return pattern
+    except ValueError:
+        pass
+    return text.encode('utf-8')
+
+def search_block(data, pattern):
+    """Offsets de toutes les occurrences (même chevauchantes) dans un bloc.
+
+    NumPy libère le GIL pendant les comparaisons : plusieurs blocs sont donc
+    traités en parallèle par les threads.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    m = len(pattern)
+    if len(arr) < m:
+        return np.empty(0, dtype=np.int64)
+
+    if m == 1:
+        return np.flatnonzero(arr == pattern[0])
+
+    # Préfiltre sur les 2 premiers octets, puis vérification octet par octet
+    head = pattern[0] | (pattern[1] << 8)
+    candidates = np.flatnonzero(value_view(data, np.dtype('<u2'))[:len(arr) - m + 1] == head)
+    for k in range(2, m):
+        if len(candidates) == 0:
+            break
+        candidates = candidates[arr[candidates + k] == pattern[k]]
+    return candidates
+
+def find_all(buffer, pattern, workers=None):
+    """Retourne le tableau trié des offsets de toutes les occurrences du motif.
+
+    Le buffer est découpé en blocs qui se chevauchent de len(pattern) - 1
+    octets (aucune occurrence à cheval n'est perdue), traités par un pool
+    de threads.
+    """
+    pattern = bytes(pattern)
+    size = len(buffer)
+    if not pattern or size < len(pattern):
+        return np.empty(0, dtype=np.int64)
+
+    overlap = len(pattern) - 1
+    starts = range(0, size, SEARCH_CHUNK_SIZE)
+
+    def search_chunk(start):
+        stop = min(start + SEARCH_CHUNK_SIZE + overlap, size)
+        return search_block(buffer[start:stop], pattern).astype(np.int64) + start
+
+    if size < PARALLEL_THRESHOLD:
+        results = [search_chunk(start) for start in starts]
+    else:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(search_chunk, starts))
+
+    return np.concatenate(results)
+
+# ============================================================================
+# RÉSULTATS
+# ============================================================================
+
+class SearchResults:
+    """Index de toutes les occurrences d'un motif, navigation en O(1)"""
+
+    def __init__(self, pattern, hits):
+        self.pattern = pattern
+        self.hits = hits
+        self.position = -1
+
+    def __len__(self):
+        return len(self.hits)
+
+    @property
+    def current(self):
+        if self.position < 0:
+            return None
+        return int(self.hits[self.position])
+
+    def next(self):
+        """Occurrence suivante (revient au début après la dernière)"""
+        if not len(self.hits):
+            return None
+        self.position = (self.position + 1) % len(self.hits)
+        return self.current
+
+    def previous(self):
+        """Occurrence précédente (repart de la fin avant la première)"""
+        if not len(self.hits):
+            return None
+        self.position = (self.position - 1) % len(self.hits)
+        return self.current
+
+    def seek(self, offset):
+        """Se place sur la première occurrence à partir de `offset`"""
+        if not len(self.hits):
+            return None
+        self.position = int(np.searchsorted(self.hits, offset)) % len(self.hits)
+        return self.current
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Vue hexadécimale virtualisée
+Développé par ROUTIER87
+"""
+
+from PyQt6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetrics, QColor
+
+from hex_format import BYTES_PER_ROW, HEX_BYTES, ascii_row
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Colonnes : offset, 16 octets, ASCII
+OFFSET_COLUMN = 0
+ASCII_COLUMN = BYTES_PER_ROW + 1
+
+# Octets ciblés par le dernier saut (goto, recherche)
+HIGHLIGHT_BACKGROUND = QColor("#f1c40f")
+HIGHLIGHT_FOREGROUND = QColor("#1a1a1a")
+
+# Positions gardées pour précédent/suivant
+HISTORY_SIZE = 100
+
+# ============================================================================
+# HISTORIQUE
+# ============================================================================
+
+class OffsetHistory:
+    """Pile des offsets visités, avec position courante (précédent/suivant)"""
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self._offsets = []
+        self._position = -1
+
+    def push(self, offset):
+        """Nouvelle visite : oublie les positions « suivantes »"""
+        if 0 <= self._position and self._offsets[self._position] == offset:
+            return
+        del self._offsets[self._position + 1:]
+        self._offsets.append(offset)
+        if len(self._offsets) > self.size:
+            del self._offsets[0]
+        self._position = len(self._offsets) - 1
+
+    def can_go_back(self):
+        return self._position > 0
+
+    def can_go_forward(self):
+        return self._position < len(self._offsets) - 1
+
+    def back(self):
+        if not self.can_go_back():
+            return None
+        self._position -= 1
+        return self._offsets[self._position]
+
+    def forward(self):
+        if not self.can_go_forward():
+            return None
+        self._position += 1
+        return self._offsets[self._position]
+
+# ============================================================================
+# MODÈLE
+# ============================================================================
+
+class HexTableModel(QAbstractTableModel):
+    """Modèle hexadécimal : formate uniquement les lignes demandées par la vue"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._buffer = None
+        self._size = 0
+
+        # Cache de la dernière ligne lue (la vue demande chaque cellule)
+        self._cached_row = -1
+        self._cached_bytes = b""
+
+        # Plage [début, fin) surlignée
+        self._highlight = (0, 0)
+
+    def set_buffer(self, buffer):
+        """Change le buffer affiché (bytes, bytearray ou buffer mappé)"""
+        self.beginResetModel()
+        self._buffer = buffer
+        self._size = len(buffer) if buffer is not None else 0
+        self._cached_row = -1
+        self._cached_bytes = b""
+        self._highlight = (0, 0)
+        self.endResetModel()
+
+    def set_highlight(self, start, length):
+        """Surligne [start, start + length) ; seules les lignes concernées sont repeintes"""
+        old = self._highlight
+        self._highlight = (start, min(start + length, self._size))
+        for first, stop in (old, self._highlight):
+            if first < stop:
+                self.dataChanged.emit(self.index(first // BYTES_PER_ROW, 1),
+                                      self.index((stop - 1) // BYTES_PER_ROW, ASCII_COLUMN))
+
+    def refresh(self):
+        """Signale que le contenu du buffer a changé"""
+        self._cached_row = -1
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(self.rowCount() - 1, ASCII_COLUMN))
+
+    def buffer_size(self):
+        return self._size
+
+    def row_bytes(self, row):
+        """Retourne les octets d'une ligne (lus directement depuis le buffer)"""
+        if row != self._cached_row:
+            start = row * BYTES_PER_ROW
+            self._cached_bytes = bytes(self._buffer[start:start + BYTES_PER_ROW])
+            self._cached_row = row
+        return self._cached_bytes
+
+    def offset_to_index(self, offset):
+        """Convertit un offset en index de cellule"""
+        row, col = divmod(offset, BYTES_PER_ROW)
+        return self.index(row, col + 1)
+
+    def index_to_offset(self, index):
+        """Convertit un index de cellule en offset (None hors des octets)"""
+        if not index.isValid() or not 1 <= index.column() <= BYTES_PER_ROW:
+            return None
+        offset = index.row() * BYTES_PER_ROW + index.column() - 1
+        return offset if offset < self._size else None
+
+    # ----- API QAbstractTableModel -----
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return (self._size + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return BYTES_PER_ROW + 2
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self._buffer is None:
+            return None
+
+        row, col = index.row(), index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == OFFSET_COLUMN:
+                return f"{row * BYTES_PER_ROW:08X}"
+
+            data = self.row_bytes(row)
+            if col == ASCII_COLUMN:
+                return ascii_row(data)
+
+            if col - 1 < len(data):
+                return HEX_BYTES[data[col - 1]]
+            return ""
+
+        if role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole):
+            offset = row * BYTES_PER_ROW + col - 1
+            start, stop = self._highlight
+            if 1 <= col <= BYTES_PER_ROW and start <= offset < stop:
+                if role == Qt.ItemDataRole.BackgroundRole:
+                    return HIGHLIGHT_BACKGROUND
+                return HIGHLIGHT_FOREGROUND
+            return None
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if col == ASCII_COLUMN:
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignCenter
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or orientation != Qt.Orientation.Horizontal:
+            return None
+        if section == OFFSET_COLUMN:
+            return "Offset"
+        if section == ASCII_COLUMN:
+            return "ASCII"
+        return f"{section - 1:02X}"
+
+    def flags(self, index):
+        # Colonnes offset et ASCII « sélectionnables » : pour une colonne sans
+        # aucune cellule sélectionnable, l'en-tête (isColumnSelected) parcourt
+        # toutes les lignes à chaque changement de sélection. La vue refuse
+        # elle-même ces cellules (HexView.selectionCommand).
+        if index.column() in (OFFSET_COLUMN, ASCII_COLUMN):
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if self.index_to_offset(index) is None:
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+# ============================================================================
+# VUE
+# ============================================================================
+
+class HexView(QTableView):
+    """Vue hexadécimale : seules les lignes visibles sont formatées"""
+
+    # Émis quand l'utilisateur sélectionne un octet
+    offset_selected = pyqtSignal(int)
+
+    # Émis quand la zone visible change (premier offset, offset de fin)
+    viewport_changed = pyqtSignal(int, int)
+
+    # Émis quand l'historique change (précédent possible, suivant possible)
+    history_changed = pyqtSignal(bool, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.hex_model = HexTableModel(self)
+        self.setModel(self.hex_model)
+        self.history = OffsetHistory()
+
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(10)
+        self.setFont(font)
+        metrics = QFontMetrics(font)
+
+        # Hauteur de ligne fixe : la vue n'a jamais besoin de mesurer les lignes
+        vheader = self.verticalHeader()
+        vheader.setVisible(False)
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setDefaultSectionSize(metrics.height() + 4)
+
+        hheader = self.horizontalHeader()
+        hheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        hheader.setHighlightSections(False)
+        self.setColumnWidth(OFFSET_COLUMN, metrics.horizontalAdvance("00000000") + 16)
+        for col in range(1, BYTES_PER_ROW + 1):
+            self.setColumnWidth(col, metrics.horizontalAdvance("00") + 10)
+        self.setColumnWidth(ASCII_COLUMN, metrics.horizontalAdvance("0" * BYTES_PER_ROW) + 16)
+        hheader.setStretchLastSection(True)
+
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectItems)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerItem)
+
+        self.verticalScrollBar().valueChanged.connect(self.emit_viewport)
+
+    def set_buffer(self, buffer):
+        """Affiche un buffer (None pour vider la vue) ; un autre buffer
+        repart d'un historique de navigation vide"""
+        if buffer is not self.hex_model._buffer:
+            self.history = OffsetHistory()
+            self.emit_history()
+        self.hex_model.set_buffer(buffer)
+        self.emit_viewport()
+
+    def visible_range(self):
+        """Offsets [début, fin) des lignes affichées"""
+        first = max(self.rowAt(0), 0)
+        last = self.rowAt(self.viewport().height() - 1)
+        if last < 0:
+            last = self.hex_model.rowCount() - 1
+        size = self.hex_model.buffer_size()
+        return first * BYTES_PER_ROW, min((last + 1) * BYTES_PER_ROW, size)
+
+    def emit_viewport(self, *args):
+        self.viewport_changed.emit(*self.visible_range())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.emit_viewport()
+
+    def goto_offset(self, offset, length=1, remember=True):
+        """Positionne la vue sur un offset et surligne `length` octets.
+
+        Saut direct vers la ligne : le modèle de sélection reçoit l'index
+        sans parcourir les lignes, et scrollTo calcule la position à partir
+        de la hauteur fixe des lignes.
+        """
+        index = self.hex_model.offset_to_index(offset)
+        if self.hex_model.index_to_offset(index) is None:
+            return False
+
+        self.hex_model.set_highlight(offset, max(length, 1))
+        self.selectionModel().setCurrentIndex(
+            index, self.selectionModel().SelectionFlag.ClearAndSelect)
+        self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+        if remember:
+            self.history.push(offset)
+            self.emit_history()
+        return True
+
+    def go_back(self):
+        """Revient à l'offset visité précédent"""
+        offset = self.history.back()
+        self.emit_history()
+        if offset is None:
+            return None
+        self.goto_offset(offset, remember=False)
+        return offset
+
+    def go_forward(self):
+        """Retourne à l'offset quitté par go_back"""
+        offset = self.history.forward()
+        self.emit_history()
+        if offset is None:
+            return None
+        self.goto_offset(offset, remember=False)
+        return offset
+
+    def emit_history(self):
+        self.history_changed.emit(self.history.can_go_back(), self.history.can_go_forward())
+
+    def selectionCommand(self, index, event=None):
+        # Seuls les octets se sélectionnent (voir HexTableModel.flags)
+        if index.isValid() and self.hex_model.index_to_offset(index) is None:
+            return self.selectionModel().SelectionFlag.NoUpdate
+        return super().selectionCommand(index, event)
+
+    def currentChanged(self, current, previous):
+        super().currentChanged(current, previous)
+        offset = self.hex_model.index_to_offset(current)
+        if offset is not None:
+            self.offset_selected.emit(offset)
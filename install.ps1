@@ -14,8 +14,10 @@ if ($LASTEXITCODE -ne 0) {
 }
 
 Write-Host ""
-Write-Host "2. Installation de PyQt6..." -ForegroundColor Yellow
-pip install PyQt6 --quiet
+Write-Host "2. Installation de PyQt6 et NumPy..." -ForegroundColor Yellow
+pip install PyQt6 numpy --quiet
+# Optionnels : sauvegardes compressées en zstd / LZ4
+pip install zstandard lz4 --quiet
 
 Write-Host ""
 Write-Host "3. Installation de PyInstaller..." -ForegroundColor Yellow
@@ -23,7 +25,8 @@ pip install pyinstaller --quiet
 
 Write-Host ""
 Write-Host "4. Création de l'exécutable..." -ForegroundColor Yellow
-pyinstaller --noconfirm --clean --onefile `
+# --onedir : pas de décompression dans un dossier temporaire à chaque lancement
+pyinstaller --noconfirm --clean --onedir `
             --name="TS_Tool_Routier" `
             --windowed `
             --add-data="README.txt;." `
@@ -34,9 +37,9 @@ Write-Host "5. Préparation du dossier final..." -ForegroundColor Yellow
 if (Test-Path "TS_Tool_Routier_Final") {
     Remove-Item -Path "TS_Tool_Routier_Final" -Recurse -Force
 }
-New-Item -ItemType Directory -Path "TS_Tool_Routier_Final" | Out-Null
-Copy-Item -Path "dist\TS_Tool_Routier.exe" -Destination "TS_Tool_Routier_Final\" -Force
+Copy-Item -Path "dist\TS_Tool_Routier" -Destination "TS_Tool_Routier_Final" -Recurse -Force
 Copy-Item -Path "README.txt" -Destination "TS_Tool_Routier_Final\" -Force
+Copy-Item -Path "config.ini" -Destination "TS_Tool_Routier_Final\" -Force
 
 Write-Host ""
 Write-Host "========================================" -ForegroundColor Green
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Minimap de structure pour la vue hexadécimale
+Développé par ROUTIER87
+"""
+
+import threading
+
+import numpy as np
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QObject, QRect, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QColor, QPen
+
+from save_analysis import ENTROPY_BLOCK, block_stats
+from parse_cache import default_cache
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Morceaux traités par le travailleur entre deux mises à jour de l'affichage
+MINIMAP_CHUNK_SIZE = 4 * 1024 * 1024
+
+MINIMAP_WIDTH = 28
+
+# Couleur de fond des blocs pas encore calculés
+PENDING_COLOR = 0xFF2C3E50
+
+# ============================================================================
+# CALCUL EN ARRIÈRE-PLAN
+# ============================================================================
+
+class MinimapWorker(QObject):
+    """Calcule entropie et densité de zéros par bloc, morceau par morceau"""
+
+    blocks_ready = pyqtSignal(int, object, object)   # premier bloc, entropies, zéros
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.buffer = buffer
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            size = len(self.buffer)
+            for start in range(0, size, MINIMAP_CHUNK_SIZE):
+                if self._cancel.is_set():
+                    self.cancelled.emit()
+                    return
+                data = self.buffer[start:min(start + MINIMAP_CHUNK_SIZE, size)]
+                _, entropy, zeros = block_stats(data)
+                self.blocks_ready.emit(start // ENTROPY_BLOCK, entropy, zeros)
+            self.finished.emit(self.buffer)
+        except Exception as e:
+            # Buffer fermé pendant le calcul (autre fichier ouvert)
+            self.failed.emit(str(e))
+
+# ============================================================================
+# WIDGET
+# ============================================================================
+
+def _entropy_colors(entropy):
+    """Entropie 0..8 -> bleu (structuré) vers rouge (compressé/aléatoire)"""
+    t = np.clip(entropy / 8.0, 0.0, 1.0)
+    r = (40 + 215 * t).astype(np.uint32)
+    g = (90 + 80 * (1 - np.abs(2 * t - 1))).astype(np.uint32)
+    b = (200 * (1 - t) + 30).astype(np.uint32)
+    return 0xFF000000 | (r << 16) | (g << 8) | b
+
+def _zero_colors(zeros):
+    """Densité de zéros 0..1 -> gris foncé vers blanc"""
+    v = (40 + 215 * np.clip(zeros, 0.0, 1.0)).astype(np.uint32)
+    return 0xFF000000 | (v << 16) | (v << 8) | v
+
+class HexMinimap(QWidget):
+    """Bande verticale : entropie (gauche) et zéros (droite) sur tout le fichier.
+
+    Chaque pixel résume la moyenne des blocs qu'il couvre, calculée par
+    différence de sommes cumulées : l'image coûte O(pixels), quelle que
+    soit la taille du fichier.
+    """
+
+    offset_clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedWidth(MINIMAP_WIDTH)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setToolTip("Gauche : entropie (bleu = structuré, rouge = compressé)\n"
+                        "Droite : zéros (blanc = vide)\n"
+                        "Cliquez pour aller à cette position")
+
+        self._size = 0
+        self._entropy = np.empty(0, np.float32)
+        self._zeros = np.empty(0, np.float32)
+        self._done = np.empty(0, bool)
+        self._sums = None
+        self._image = None
+        self._viewport = None
+        self._worker = None
+
+    # ------------------------------------------------------------------------
+    # Données
+    # ------------------------------------------------------------------------
+
+    def set_buffer(self, buffer):
+        """Lance le calcul pour un nouveau buffer (None pour vider)"""
+        from save_loader import start_loader
+
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        self._size = len(buffer) if buffer is not None else 0
+        blocks = -(-self._size // ENTROPY_BLOCK)
+        self._entropy = np.zeros(blocks, np.float32)
+        self._zeros = np.zeros(blocks, np.float32)
+        self._done = np.zeros(blocks, bool)
+        self._invalidate()
+
+        if buffer is not None and self._size and self._load_cached(buffer):
+            return
+
+        if buffer is not None and self._size:
+            worker = MinimapWorker(buffer)
+            worker.blocks_ready.connect(lambda first, entropy, zeros:
+                                        self.add_blocks(worker, first, entropy, zeros))
+            worker.finished.connect(lambda buffer: self._store_cached(worker, buffer))
+            for signal in (worker.finished, worker.failed, worker.cancelled):
+                signal.connect(lambda *args: self._worker_done(worker))
+            self._worker = worker
+            start_loader(worker, self)
+
+    def add_blocks(self, worker, first, entropy, zeros):
+        """Résultats d'un morceau (ignorés s'ils viennent d'un ancien calcul)"""
+        if worker is not self._worker:
+            return
+        last = first + len(entropy)
+        self._entropy[first:last] = entropy
+        self._zeros[first:last] = zeros
+        self._done[first:last] = True
+        self._invalidate()
+
+    def _load_cached(self, buffer):
+        """Blocs d'une sauvegarde déjà vue (cache de lecture) : pas de calcul"""
+        if buffer.is_modified or buffer.digest is None:
+            return False
+        arrays = default_cache().get_arrays(buffer.digest, 'blocks')
+        if arrays is None or len(arrays['entropy']) != len(self._entropy):
+            return False
+        self._entropy = arrays['entropy']
+        self._zeros = arrays['zeros']
+        self._done[:] = True
+        self._invalidate()
+        return True
+
+    def _store_cached(self, worker, buffer):
+        if worker is self._worker and not buffer.is_modified and buffer.digest is not None:
+            default_cache().put_arrays(buffer.digest, 'blocks',
+                                       {'entropy': self._entropy, 'zeros': self._zeros})
+
+    def _worker_done(self, worker):
+        if worker is self._worker:
+            self._worker = None
+
+    def stop(self):
+        """Arrête le calcul en cours (fermeture du fichier)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def set_viewport(self, start, stop):
+        """Zone actuellement visible dans la vue hexadécimale"""
+        self._viewport = (start, stop)
+        self.update()
+
+    def _invalidate(self):
+        self._sums = None
+        self._image = None
+        self.update()
+
+    # ------------------------------------------------------------------------
+    # Rendu
+    # ------------------------------------------------------------------------
+
+    def _build_image(self, height):
+        """Image de `height` pixels (sommes cumulées calculées une fois par mise à jour)"""
+        width = self.width()
+        if self._sums is None:
+            zero = np.zeros(1)
+            self._sums = (np.concatenate((zero, np.cumsum(self._entropy, dtype=np.float64))),
+                          np.concatenate((zero, np.cumsum(self._zeros, dtype=np.float64))),
+                          np.concatenate((zero, np.cumsum(self._done, dtype=np.float64))))
+        entropy_sums, zero_sums, done_sums = self._sums
+
+        # Blocs couverts par chaque ligne de pixels
+        blocks = len(self._entropy)
+        edges = np.linspace(0, blocks, height + 1).astype(np.int64)
+        edges[1:] = np.maximum(edges[1:], np.minimum(edges[:-1] + 1, blocks))
+        lo, hi = edges[:-1], edges[1:]
+        count = np.maximum(hi - lo, 1)
+
+        entropy = (entropy_sums[hi] - entropy_sums[lo]) / count
+        zeros = (zero_sums[hi] - zero_sums[lo]) / count
+        done = (done_sums[hi] - done_sums[lo]) >= count
+
+        half = width // 2
+        pixels = np.full((height, width), PENDING_COLOR, dtype=np.uint32)
+        pixels[done, :half] = _entropy_colors(entropy[done])[:, None]
+        pixels[done, half:] = _zero_colors(zeros[done])[:, None]
+
+        self._pixels = pixels   # garder le tableau vivant tant que l'image l'utilise
+        return QImage(pixels.data, width, height, width * 4, QImage.Format.Format_RGB32)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        height = self.height()
+
+        if not self._size or height <= 0:
+            painter.fillRect(self.rect(), QColor(PENDING_COLOR))
+            return
+
+        if self._image is None or self._image.height() != height or self._image.width() != self.width():
+            self._image = self._build_image(height)
+        painter.drawImage(0, 0, self._image)
+
+        # Zone visible de la vue hexadécimale
+        if self._viewport is not None:
+            start, stop = self._viewport
+            top = int(start / self._size * height)
+            bottom = max(int(stop / self._size * height), top + 2)
+            painter.setPen(QPen(QColor(255, 255, 0), 1))
+            painter.drawRect(QRect(0, top, self.width() - 1, bottom - top))
+
+    def resizeEvent(self, event):
+        self._image = None
+        super().resizeEvent(event)
+
+    # ------------------------------------------------------------------------
+    # Navigation
+    # ------------------------------------------------------------------------
+
+    def offset_at(self, y):
+        """Offset du fichier correspondant à une ligne de pixels"""
+        y = min(max(y, 0), self.height() - 1)
+        return min(int(y / max(self.height(), 1) * self._size), max(self._size - 1, 0))
+
+    def mousePressEvent(self, event):
+        if self._size and event.button() == Qt.MouseButton.LeftButton:
+            self.offset_clicked.emit(self.offset_at(int(event.position().y())))
+
+    def mouseMoveEvent(self, event):
+        if self._size and event.buttons() & Qt.MouseButton.LeftButton:
+            self.offset_clicked.emit(self.offset_at(int(event.position().y())))
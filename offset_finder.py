@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Recherche automatique d'offsets
+Développé par ROUTIER87
+
+Les offsets candidats sont gardés dans des tableaux NumPy compacts
+(uint32 tant que le fichier fait moins de 4 Go) : des millions de
+candidats tiennent en quelques dizaines de Mo, et chaque affinage relit
+seulement ces offsets, de façon vectorisée.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Types recherchés (little-endian), du plus probable au moins probable
+VALUE_TYPES = {
+    'int64': np.dtype('<i8'),
+    'int32': np.dtype('<i4'),
+    'double': np.dtype('<f8'),
+    'float': np.dtype('<f4'),
+}
+
+# Les valeurs affichées en jeu sont arrondies à l'unité
+FLOAT_TOLERANCE = 0.5
+
+# Taille des blocs lus (la mémoire utilisée reste bornée)
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Candidats classés d'un coup (ScanSession.results)
+RANK_SLICE = 4 * 1024 * 1024
+
+# Comparaisons entre sauvegardes successives (valeur inconnue)
+RELATIONS = {
+    'increased': "Augmenté",
+    'decreased': "Diminué",
+    'equal': "Inchangé",
+    'changed': "Modifié",
+    'delta': "Variation de",
+}
+
+# Candidats au maximum par type lors d'une comparaison complète (uint32 :
+# 128 Mo) ; au-delà, mieux vaut commencer par une relation plus sélective
+MAX_RELATION_HITS = 32 * 1024 * 1024
+
+# Taille maximale d'un instantané complet (copie du contenu avant le
+# premier scan) ; ensuite seules les valeurs aux candidats sont gardées
+MAX_SNAPSHOT_SIZE = 512 * 1024 * 1024
+
+OffsetCandidate = namedtuple('OffsetCandidate', 'offset type_name aligned score')
+
+# ============================================================================
+# VUES NUMPY
+# ============================================================================
+
+def offset_dtype(size):
+    """Type le plus compact pour les offsets d'un fichier de `size` octets"""
+    return np.dtype(np.uint32) if size <= 1 << 32 else np.dtype(np.int64)
+
+def value_view(data, dtype):
+    """Vue de `data` avec une valeur `dtype` à CHAQUE offset (pas de 1 octet)"""
+    count = len(data) - dtype.itemsize + 1
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.ndarray(shape=(count,), dtype=dtype, buffer=data, strides=(1,))
+
+def _matches(values, value, dtype):
+    """Masque des valeurs égales à `value` (tolérance pour les flottants)"""
+    if dtype.kind == 'f':
+        # Comparaisons dans le type natif (les NaN ne correspondent jamais)
+        low = dtype.type(value - FLOAT_TOLERANCE)
+        high = dtype.type(value + FLOAT_TOLERANCE)
+        with np.errstate(invalid='ignore'):
+            return (values >= low) & (values <= high)
+    return values == value
+
+def _representable(value, dtype):
+    """Vrai si `value` peut être stockée dans le type"""
+    if dtype.kind == 'f':
+        return True
+    if value != int(value):
+        return False
+    info = np.iinfo(dtype)
+    return info.min <= int(value) <= info.max
+
+def _cast(value, dtype):
+    return float(value) if dtype.kind == 'f' else int(value)
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+def scan_value(buffer, value, dtype, chunk_size=SCAN_CHUNK_SIZE):
+    """Retourne tous les offsets où `value` est stockée (tableau trié, compact)"""
+    dtype = np.dtype(dtype)
+    size = len(buffer)
+    packed = offset_dtype(size)
+    if not _representable(value, dtype):
+        return np.empty(0, dtype=packed)
+    value = _cast(value, dtype)
+
+    overlap = dtype.itemsize - 1
+    found = []
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        # Le bloc déborde de itemsize - 1 octets pour les valeurs à cheval
+        data = buffer[start:min(stop + overlap, size)]
+        hits = np.flatnonzero(_matches(value_view(data, dtype), value, dtype))
+        found.append(hits.astype(packed) + start)
+
+    if not found:
+        return np.empty(0, dtype=packed)
+    return np.concatenate(found)
+
+def gather_values(buffer, offsets, dtype, chunk_size=SCAN_CHUNK_SIZE):
+    """Lit les valeurs `dtype` aux offsets (triés) donnés, bloc par bloc"""
+    dtype = np.dtype(dtype)
+    result = np.zeros(len(offsets), dtype=dtype)
+    valid = offsets <= len(buffer) - dtype.itemsize
+
+    offsets = offsets[valid]
+    values = np.empty(len(offsets), dtype=dtype)
+    size = len(buffer)
+    lo = 0
+    while lo < len(offsets):
+        start = int(offsets[lo])
+        hi = int(np.searchsorted(offsets, start + chunk_size, side='left'))
+        stop = min(int(offsets[hi - 1]) + dtype.itemsize, size)
+        view = value_view(buffer[start:stop], dtype)
+        values[lo:hi] = view[offsets[lo:hi] - start]
+        lo = hi
+
+    result[valid] = values
+    return result, valid
+
+def narrow_offsets(buffer, offsets, value, dtype):
+    """Garde les offsets où `buffer` contient encore `value`"""
+    dtype = np.dtype(dtype)
+    if not _representable(value, dtype) or len(offsets) == 0:
+        return offsets[:0]
+    values, valid = gather_values(buffer, offsets, dtype)
+    return offsets[valid & _matches(values, _cast(value, dtype), dtype)]
+
+# ============================================================================
+# COMPARAISONS
+# ============================================================================
+
+def _compare_dtype(relation, dtype):
+    """Égalité et changement se comparent sur les bits (NaN compris)"""
+    if relation in ('equal', 'changed'):
+        return np.dtype(f'<u{dtype.itemsize}')
+    return dtype
+
+def _relation_mask(old, new, relation, delta, dtype):
+    """Masque des valeurs `new` en relation `relation` avec `old`"""
+    with np.errstate(invalid='ignore', over='ignore'):
+        if relation == 'increased':
+            return new > old
+        if relation == 'decreased':
+            return new < old
+        if relation == 'equal':
+            return new == old
+        if relation == 'changed':
+            return new != old
+        if relation == 'delta':
+            if dtype.kind == 'f':
+                return np.abs((new - old) - delta) <= FLOAT_TOLERANCE
+            # Différence dans le type natif (débordement comme dans le jeu)
+            return (new - old) == dtype.type(delta)
+    raise ValueError(f"Relation inconnue '{relation}'")
+
+def _check_relation(relation, delta, dtype):
+    """Faux si la relation ne peut correspondre à aucune valeur de ce type"""
+    if relation not in RELATIONS:
+        raise ValueError(f"Relation inconnue '{relation}'")
+    if relation == 'delta':
+        if delta is None:
+            raise ValueError("Variation manquante")
+        return _representable(delta, dtype)
+    return True
+
+def relational_scan(buffers, relation, dtype, delta=None,
+                    chunk_size=SCAN_CHUNK_SIZE, max_hits=MAX_RELATION_HITS):
+    """Offsets où chaque sauvegarde est en relation avec la précédente.
+
+    Les sauvegardes sont lues par blocs, en parallèle d'offset à offset :
+    la mémoire reste bornée à quelques blocs, plus les offsets trouvés
+    (ValueError au-delà de `max_hits`).
+    """
+    if len(buffers) < 2:
+        raise ValueError("Il faut au moins deux sauvegardes")
+    dtype = np.dtype(dtype)
+    common = min(len(buffer) for buffer in buffers)
+    packed = offset_dtype(common)
+    if not _check_relation(relation, delta, dtype):
+        return np.empty(0, dtype=packed)
+    read_dtype = _compare_dtype(relation, dtype)
+    delta = _cast(delta, dtype) if delta is not None else None
+
+    overlap = dtype.itemsize - 1
+    found, total = [], 0
+    for start in range(0, common, chunk_size):
+        end = min(start + chunk_size + overlap, common)
+        views = [value_view(buffer[start:end], read_dtype) for buffer in buffers]
+        mask = _relation_mask(views[0], views[1], relation, delta, dtype)
+        for old, new in zip(views[1:], views[2:]):
+            mask &= _relation_mask(old, new, relation, delta, dtype)
+
+        hits = np.flatnonzero(mask)
+        total += len(hits)
+        if max_hits is not None and total > max_hits:
+            raise ValueError(f"Plus de {max_hits:,} offsets en {dtype.name} : "
+                             "choisissez une relation plus sélective")
+        found.append(hits.astype(packed) + start)
+
+    if not found:
+        return np.empty(0, dtype=packed)
+    return np.concatenate(found)
+
+def snapshot_values(buffer, offsets, dtype):
+    """Bits des valeurs `dtype` aux offsets (et leur validité), pour une
+    comparaison ultérieure (narrow_relation, `previous`)"""
+    return gather_values(buffer, offsets, np.dtype(f'<u{np.dtype(dtype).itemsize}'))
+
+def narrow_relation(buffers, offsets, relation, dtype, delta=None, previous=None):
+    """Garde les offsets où chaque sauvegarde est en relation avec la précédente.
+
+    `previous` (snapshot_values) donne les valeurs d'une sauvegarde
+    antérieure aux mêmes offsets : elle ouvre alors la chaîne.
+    """
+    if len(buffers) + (previous is not None) < 2:
+        raise ValueError("Il faut au moins deux sauvegardes")
+    dtype = np.dtype(dtype)
+    if len(offsets) == 0 or not _check_relation(relation, delta, dtype):
+        return offsets[:0]
+    read_dtype = _compare_dtype(relation, dtype)
+    delta = _cast(delta, dtype) if delta is not None else None
+
+    keep = np.ones(len(offsets), dtype=bool)
+    if previous is not None:
+        bits, valid = previous
+        keep &= valid
+        previous = bits.view(read_dtype)
+    for buffer in buffers:
+        values, valid = gather_values(buffer, offsets, read_dtype)
+        keep &= valid
+        if previous is not None:
+            keep &= _relation_mask(previous, values, relation, delta, dtype)
+        previous = values
+    return offsets[keep]
+
+# ============================================================================
+# SESSION DE RECHERCHE
+# ============================================================================
+
+class ScanSession:
+    """Recherche itérative, sauvegarde après sauvegarde.
+
+    Le premier scan relève tous les offsets où la valeur est stockée, pour
+    chaque type ; chaque scan suivant (autre sauvegarde, autre valeur) ne
+    garde que les candidats qui contiennent encore la valeur attendue.
+    Pour une valeur inconnue, compare_scan garde les offsets qui ont
+    augmenté, diminué, etc. d'une sauvegarde à l'autre ; la sauvegarde
+    précédente peut être un instantané (take_snapshot) pris avant qu'elle
+    ne soit remplacée sur le disque.
+    """
+
+    def __init__(self, type_names=None):
+        self.type_names = list(type_names or VALUE_TYPES)
+        self.candidates = {}    # type -> offsets triés (tableau compact)
+        self.steps = []         # (libellé, valeur, candidats restants)
+        # Instantané : copie du contenu (avant le premier scan), puis
+        # type -> (bits, validité) aux candidats
+        self.snapshot = None
+
+    @property
+    def started(self):
+        return bool(self.steps)
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self.candidates.values())
+
+    @property
+    def nbytes(self):
+        return sum(offsets.nbytes for offsets in self.candidates.values())
+
+    def reset(self):
+        self.candidates = {}
+        self.steps = []
+        self.snapshot = None
+
+    def take_snapshot(self, buffer):
+        """Mémorise `buffer` comme point de départ de la prochaine comparaison.
+
+        Avant le premier scan, tout le contenu est copié (ValueError au-delà
+        de MAX_SNAPSHOT_SIZE) ; ensuite seules les valeurs aux candidats.
+        """
+        if not self.started:
+            if len(buffer) > MAX_SNAPSHOT_SIZE:
+                raise ValueError(f"Sauvegarde de plus de {MAX_SNAPSHOT_SIZE // (1024 * 1024)} Mo : "
+                                 "commencez par un scan de valeur exacte")
+            self.snapshot = bytes(buffer[0:len(buffer)])
+        else:
+            self.snapshot = {name: snapshot_values(buffer, offsets, VALUE_TYPES[name])
+                             for name, offsets in self.candidates.items()}
+
+    def first_scan(self, buffer, value, label=""):
+        """Relève tous les offsets de `buffer` qui contiennent `value`"""
+        self.candidates = {name: scan_value(buffer, value, VALUE_TYPES[name])
+                           for name in self.type_names}
+        self.steps = [(label, value, len(self))]
+        return len(self)
+
+    def next_scan(self, buffer, value, label=""):
+        """Garde les candidats où `buffer` contient `value` (premier scan sinon)"""
+        if not self.started:
+            return self.first_scan(buffer, value, label)
+        for name, offsets in self.candidates.items():
+            self.candidates[name] = narrow_offsets(buffer, offsets, value, VALUE_TYPES[name])
+        self.steps.append((label, value, len(self)))
+        return len(self)
+
+    def compare_scan(self, buffers, relation, delta=None, label="", from_snapshot=False):
+        """Garde les candidats (tous les offsets au départ) dont la valeur
+        suit `relation` d'une sauvegarde à la suivante (à partir de
+        l'instantané avec `from_snapshot`)"""
+        description = RELATIONS[relation] + (f" {delta:,}" if relation == 'delta' else "")
+        if from_snapshot and self.snapshot is None:
+            raise ValueError("Aucun instantané de la sauvegarde précédente")
+        if not self.started:
+            if from_snapshot:
+                buffers = [self.snapshot] + list(buffers)
+            self.candidates = {name: relational_scan(buffers, relation, VALUE_TYPES[name], delta)
+                               for name in self.type_names}
+            self.steps = [(label, description, len(self))]
+            return len(self)
+        for name, offsets in self.candidates.items():
+            previous = self.snapshot[name] if from_snapshot else None
+            self.candidates[name] = narrow_relation(buffers, offsets, relation,
+                                                    VALUE_TYPES[name], delta, previous)
+        self.steps.append((label, description, len(self)))
+        return len(self)
+
+    def results(self, hint=None, limit=None):
+        """OffsetCandidate du plus probable au moins probable.
+
+        Type le plus probable d'abord, puis alignement, puis proximité de
+        `hint`. Le classement est vectorisé ; seuls les `limit` premiers
+        candidats sont convertis en objets Python.
+        """
+        # Clé unique : score, puis distance à `hint` (avant, puis après), ou
+        # offset ; calculée par tranches pour borner la mémoire, seuls les
+        # `limit` meilleurs de chaque tranche sont gardés
+        keys, offsets, ranks = [], [], []
+        for rank, name in enumerate(self.type_names):
+            found = self.candidates.get(name, ())
+            itemsize = VALUE_TYPES[name].itemsize
+            for pos in range(0, len(found), RANK_SLICE):
+                part = found[pos:pos + RANK_SLICE].astype(np.int64)
+                key = (rank * 2 + (part % itemsize != 0)).astype(np.int64) << 58
+                if hint is not None:
+                    key |= (np.abs(part - hint) << 1) | (part > hint)
+                else:
+                    key |= part
+                if limit is not None and limit < len(key):
+                    best = np.argpartition(key, limit)[:limit]
+                    key, part = key[best], part[best]
+                keys.append(key)
+                offsets.append(part)
+                ranks.append(np.full(len(part), rank, dtype=np.int8))
+            # Les types suivants ont tous une clé plus grande
+            if limit is not None and sum(len(key) for key in keys) >= limit:
+                break
+        if not keys:
+            return []
+
+        keys = np.concatenate(keys)
+        offsets = np.concatenate(offsets)
+        ranks = np.concatenate(ranks)
+        order = np.argsort(keys, kind='stable')[:limit]
+
+        candidates = []
+        for i in order.tolist():
+            name = self.type_names[ranks[i]]
+            offset = int(offsets[i])
+            aligned = offset % VALUE_TYPES[name].itemsize == 0
+            candidates.append(OffsetCandidate(offset, name, aligned, int(keys[i] >> 58)))
+        return candidates
+
+def find_offsets(buffers, values, type_names=None, hint=None, limit=None):
+    """Cherche les offsets où chaque sauvegarde contient sa valeur connue.
+
+    `buffers` et `values` sont appariés (une valeur d'argent par sauvegarde).
+    La première sauvegarde est parcourue entièrement, les suivantes ne sont
+    lues qu'aux offsets candidats. Retourne des OffsetCandidate triés du plus
+    probable au moins probable.
+    """
+    if not buffers or len(buffers) != len(values):
+        raise ValueError("Il faut une valeur connue par sauvegarde")
+
+    session = ScanSession(type_names)
+    for buffer, value in zip(buffers, values):
+        session.next_scan(buffer, value)
+    return session.results(hint, limit)
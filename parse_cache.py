@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Cache persistant des résultats de lecture
+Développé par ROUTIER87
+
+Rouvrir une sauvegarde inchangée ne doit rien recalculer. Trois tables :
+
+    files    chemin -> taille, date de modification, empreinte rapide
+             (quelques échantillons du fichier) et empreinte complète
+    entries  (empreinte complète, clé) -> valeur : champs décodés, offsets
+             des ancres, analyse ; éviction LRU au-delà de la taille maximale
+    indexed  (chemin, clé) -> valeur valable tant que la taille et la date
+             ne changent pas (bibliothèque de sauvegardes : aucun octet relu)
+
+Un fichier dont la taille, la date et l'empreinte rapide n'ont pas changé
+reprend son empreinte complète sans être relu ; tout le reste est ensuite
+retrouvé par cette empreinte (une copie identique partage ses résultats).
+
+    temp_dir/parse_cache.sqlite
+"""
+
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import settings
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+CACHE_NAME = "parse_cache.sqlite"
+CACHE_VERSION = 2
+
+# Taille maximale des valeurs gardées (config.ini [Cache] parse_cache_mb)
+DEFAULT_CACHE_MB = 128
+
+# Empreinte rapide : taille + SAMPLE_COUNT échantillons répartis dans le fichier
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 8
+
+# Fichiers suivis au maximum (les moins récemment ouverts sont oubliés)
+MAX_FILES = 1000
+
+# Valeurs par chemin gardées au maximum (table indexed)
+MAX_INDEXED = 20000
+
+_default = None
+_default_lock = threading.Lock()
+
+# ============================================================================
+# EMPREINTE RAPIDE
+# ============================================================================
+
+def quick_hash(filepath, size):
+    """Empreinte de la taille et de quelques échantillons (au plus 512 Ko lus)"""
+    hasher = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    with open(filepath, 'rb') as f:
+        if size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            hasher.update(f.read())
+        else:
+            step = (size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                hasher.update(f.read(SAMPLE_SIZE))
+    return hasher.hexdigest()
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def default_cache():
+    """Cache du dossier temp_dir de config.ini (un par processus)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            max_mb = settings.get_int('Cache', 'parse_cache_mb', DEFAULT_CACHE_MB)
+            _default = ParseCache(settings.get_path('temp_dir', 'temp') / CACHE_NAME,
+                                  max_mb * 1024 * 1024)
+        return _default
+
+class ParseCache:
+    """Cache SQLite partagé par les threads (et processus) de l'application"""
+
+    def __init__(self, path, max_size=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < CACHE_VERSION:
+            with self._db:
+                self._db.executescript("""
+                    CREATE TABLE IF NOT EXISTS files (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        quick TEXT NOT NULL,
+                        digest TEXT NOT NULL,
+                        used REAL NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS entries (
+                        digest TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        used REAL NOT NULL,
+                        PRIMARY KEY (digest, key)
+                    );
+                    CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+                    CREATE TABLE IF NOT EXISTS indexed (
+                        path TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        value BLOB NOT NULL,
+                        used REAL NOT NULL,
+                        PRIMARY KEY (path, key)
+                    );
+                """)
+                self._db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------------
+    # Fichiers
+    # ------------------------------------------------------------------------
+
+    def lookup(self, filepath):
+        """Empreinte complète connue d'un fichier inchangé (None sinon)"""
+        try:
+            path = os.path.realpath(filepath)
+            st = os.stat(path)
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT size, mtime_ns, quick, digest FROM files WHERE path = ?",
+                    (path,)).fetchone()
+            if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+                return None
+            if row[2] != quick_hash(path, st.st_size):
+                return None
+            with self._lock, self._db:
+                self._db.execute("UPDATE files SET used = ? WHERE path = ?", (time.time(), path))
+            return row[3]
+        except (OSError, sqlite3.Error):
+            return None
+
+    def remember(self, filepath, digest):
+        """Associe l'état actuel du fichier à son empreinte complète"""
+        try:
+            path = os.path.realpath(filepath)
+            st = os.stat(path)
+            quick = quick_hash(path, st.st_size)
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, quick, digest, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, st.st_size, st.st_mtime_ns, quick, digest, time.time()))
+                self._db.execute(
+                    "DELETE FROM files WHERE path IN (SELECT path FROM files "
+                    "ORDER BY used DESC LIMIT -1 OFFSET ?)", (MAX_FILES,))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Erreur cache de lecture: {e}")
+
+    # ------------------------------------------------------------------------
+    # Valeurs par chemin
+    # ------------------------------------------------------------------------
+
+    def get_indexed(self, filepath, key, st):
+        """Valeur JSON d'un fichier dont la taille et la date (os.stat `st`)
+        n'ont pas changé depuis put_indexed (None sinon)"""
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT size, mtime_ns, value FROM indexed WHERE path = ? AND key = ?",
+                    (os.path.realpath(filepath), key)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        return json.loads(row[2])
+
+    def put_indexed(self, key, items):
+        """Enregistre [(chemin, os.stat, valeur JSON), ...] en une transaction"""
+        now = time.time()
+        rows = [(os.path.realpath(filepath), key, st.st_size, st.st_mtime_ns,
+                 json.dumps(value).encode('utf-8'), now)
+                for filepath, st, value in items]
+        if not rows:
+            return
+        try:
+            with self._lock, self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO indexed (path, key, size, mtime_ns, value, used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute(
+                    "DELETE FROM indexed WHERE rowid IN (SELECT rowid FROM indexed "
+                    "ORDER BY used DESC LIMIT -1 OFFSET ?)", (MAX_INDEXED,))
+        except sqlite3.Error as e:
+            print(f"Erreur cache de lecture: {e}")
+
+    # ------------------------------------------------------------------------
+    # Valeurs
+    # ------------------------------------------------------------------------
+
+    def get_blob(self, digest, key):
+        """Valeur brute (None si absente) ; l'entrée devient la plus récente"""
+        if digest is None:
+            return None
+        try:
+            with self._lock, self._db:
+                row = self._db.execute("SELECT value FROM entries WHERE digest = ? AND key = ?",
+                                       (digest, key)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE entries SET used = ? WHERE digest = ? AND key = ?",
+                                     (time.time(), digest, key))
+            return None if row is None else bytes(row[0])
+        except sqlite3.Error:
+            return None
+
+    def put_blob(self, digest, key, value):
+        """Enregistre une valeur brute puis évince les plus anciennes"""
+        if digest is None or len(value) > self.max_size:
+            return
+        try:
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (digest, key, value, size, used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, key, value, len(value), time.time()))
+                self._evict()
+        except sqlite3.Error as e:
+            print(f"Erreur cache de lecture: {e}")
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_size"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return
+        excess = total - self.max_size
+        doomed, freed = [], 0
+        for rowid, size in self._db.execute("SELECT rowid, size FROM entries ORDER BY used"):
+            doomed.append((rowid,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+
+    def get(self, digest, key):
+        """Valeur JSON (None si absente)"""
+        blob = self.get_blob(digest, key)
+        return None if blob is None else json.loads(blob)
+
+    def put(self, digest, key, value):
+        self.put_blob(digest, key, json.dumps(value).encode('utf-8'))
+
+    def get_arrays(self, digest, key):
+        """Tableaux NumPy {nom: tableau} (None si absents)"""
+        blob = self.get_blob(digest, key)
+        if blob is None:
+            return None
+        import numpy as np
+        with np.load(io.BytesIO(blob), allow_pickle=False) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    def put_arrays(self, digest, key, arrays):
+        import numpy as np
+        out = io.BytesIO()
+        np.savez(out, **arrays)
+        self.put_blob(digest, key, out.getvalue())
+
+    def stats(self):
+        """(nombre d'entrées, taille totale en octets)"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM files")
+            self._db.execute("DELETE FROM indexed")
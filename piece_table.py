@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Table de morceaux (piece table) des modifications
+Développé par ROUTIER87
+
+Le contenu logique est une suite de morceaux : plages du fichier
+d'origine (jamais copié) ou du tampon d'ajout (qui ne fait que grandir).
+Les morceaux sont rangés dans un arbre équilibré (treap implicite) où
+chaque nœud connaît la longueur totale de son sous-arbre : insérer,
+supprimer ou remplacer des octets coûte O(log morceaux), quelle que soit
+la taille du fichier.
+"""
+
+import random
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Sources d'un morceau
+ORIGINAL = 0
+ADDED = 1
+
+# ============================================================================
+# ARBRE
+# ============================================================================
+
+class _Piece:
+    """Nœud : un morceau (source, début, longueur) et les totaux du sous-arbre"""
+
+    __slots__ = ('source', 'start', 'length', 'priority', 'left', 'right', 'total')
+
+    def __init__(self, source, start, length):
+        self.source = source
+        self.start = start
+        self.length = length
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.total = length
+
+    def update(self):
+        self.total = (self.length
+                      + (self.left.total if self.left else 0)
+                      + (self.right.total if self.right else 0))
+
+def _merge(a, b):
+    """Concatène deux arbres (tous les octets de `a` avant ceux de `b`)"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        a.update()
+        return a
+    b.left = _merge(a, b.left)
+    b.update()
+    return b
+
+def _split(node, offset):
+    """Coupe un arbre en (octets [0, offset), octets [offset, fin))"""
+    if node is None:
+        return None, None
+    left_total = node.left.total if node.left else 0
+
+    if offset <= left_total:
+        left, node.left = _split(node.left, offset)
+        node.update()
+        return left, node
+
+    offset -= left_total
+    if offset >= node.length:
+        node.right, right = _split(node.right, offset - node.length)
+        node.update()
+        return node, right
+
+    # Coupure au milieu du morceau : il devient deux morceaux
+    tail = _Piece(node.source, node.start + offset, node.length - offset)
+    tail.right = node.right
+    tail.update()
+    node.length = offset
+    node.right = None
+    node.update()
+    return node, tail
+
+# ============================================================================
+# TABLE
+# ============================================================================
+
+class PieceTable:
+    """Contenu logique d'un fichier d'origine (`base`) et de ses modifications"""
+
+    def __init__(self, base):
+        self.base = base
+        self.added = bytearray()
+        self.edits = 0
+        self._root = _Piece(ORIGINAL, 0, len(base)) if len(base) else None
+
+    def __len__(self):
+        return self._root.total if self._root else 0
+
+    # ------------------------------------------------------------------------
+    # Modifications
+    # ------------------------------------------------------------------------
+
+    def insert(self, offset, data):
+        """Insère `data` avant l'octet `offset`"""
+        if not 0 <= offset <= len(self):
+            raise IndexError("Insertion hors du fichier")
+        if not data:
+            return
+        piece = _Piece(ADDED, len(self.added), len(data))
+        self.added += data
+        left, right = _split(self._root, offset)
+        self._root = _merge(_merge(left, piece), right)
+        self.edits += 1
+
+    def delete(self, offset, length):
+        """Supprime `length` octets à partir de `offset`"""
+        if offset < 0 or length < 0 or offset + length > len(self):
+            raise IndexError("Suppression hors du fichier")
+        if not length:
+            return
+        left, rest = _split(self._root, offset)
+        _, right = _split(rest, length)
+        self._root = _merge(left, right)
+        self.edits += 1
+
+    def replace(self, offset, length, data):
+        """Remplace `length` octets à partir de `offset` par `data` (taille libre)"""
+        if offset < 0 or length < 0 or offset + length > len(self):
+            raise IndexError("Modification hors du fichier")
+        left, rest = _split(self._root, offset)
+        _, right = _split(rest, length)
+        if data:
+            piece = _Piece(ADDED, len(self.added), len(data))
+            self.added += data
+            left = _merge(left, piece)
+        self._root = _merge(left, right)
+        self.edits += 1
+
+    # ------------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------------
+
+    def pieces(self, start=0, stop=None):
+        """Parcourt les morceaux qui recouvrent [start, stop) dans l'ordre :
+        (position logique, source, début dans la source, longueur), coupés
+        aux bornes demandées"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        stack = []
+        node, pos = self._root, 0
+        while stack or node is not None:
+            # Descente à gauche en sautant les sous-arbres avant `start`
+            while node is not None:
+                left_total = node.left.total if node.left else 0
+                if pos + left_total + node.length <= start:
+                    pos += left_total + node.length
+                    node = node.right
+                    continue
+                stack.append((node, pos + left_total))
+                node = node.left
+            if not stack:
+                return
+            node, piece_pos = stack.pop()
+            if piece_pos >= stop:
+                return
+            lo = max(start, piece_pos)
+            hi = min(stop, piece_pos + node.length)
+            if lo < hi:
+                yield lo, node.source, node.start + lo - piece_pos, hi - lo
+            pos = piece_pos + node.length
+            node = node.right
+
+    def read(self, start, stop):
+        """Octets logiques de [start, stop)"""
+        parts = []
+        for _, source, begin, length in self.pieces(start, stop):
+            data = self.base if source == ORIGINAL else self.added
+            parts.append(data[begin:begin + length])
+        if len(parts) == 1:
+            return bytes(parts[0])
+        return b"".join(parts)
+
+    def modified_ranges(self):
+        """Plages logiques [(début, fin), ...] dont le contenu ne vient pas de
+        l'octet d'origine à la même position (après une insertion, toute la
+        suite est décalée donc modifiée)"""
+        ranges = []
+        for pos, source, begin, length in self.pieces():
+            if source == ORIGINAL and begin == pos:
+                continue
+            if ranges and ranges[-1][1] == pos:
+                ranges[-1][1] = pos + length
+            else:
+                ranges.append([pos, pos + length])
+        if len(self) < len(self.base):
+            # Fin du fichier supprimée
+            if ranges and ranges[-1][1] == len(self):
+                ranges[-1][1] = len(self.base)
+            else:
+                ranges.append([len(self), len(self.base)])
+        return [tuple(r) for r in ranges]
+
+    def piece_count(self):
+        return sum(1 for _ in self.pieces())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Analyse des sauvegardes
+Développé par ROUTIER87
+
+Une seule lecture du fichier, par morceaux analysés en parallèle, calcule :
+histogramme des octets, entropie de Shannon par bloc, zones de zéros et
+zones de texte imprimable. Le résultat est mis en cache par empreinte
+(en mémoire, et sur disque dans le cache de lecture).
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from parse_cache import default_cache
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Taille des blocs pour l'entropie (octets)
+ENTROPY_BLOCK = 4096
+
+# Taille des morceaux lus, et des tranches comptées d'un coup (multiples de ENTROPY_BLOCK)
+ANALYSIS_CHUNK_SIZE = 4 * 1024 * 1024
+COUNT_SLICE = 256 * 1024
+
+# Longueurs minimales retenues
+MIN_ZERO_RUN = 64
+MIN_STRING_LENGTH = 6
+
+# Entropie au-delà de laquelle un bloc semble compressé/chiffré (bits/octet)
+HIGH_ENTROPY = 7.5
+
+# Analyses gardées en mémoire (par empreinte du fichier)
+CACHE_ENTRIES = 8
+
+_cache = OrderedDict()
+
+# ============================================================================
+# RÉSULTAT
+# ============================================================================
+
+class SaveAnalysis:
+    """Résultat de l'analyse d'une sauvegarde"""
+
+    def __init__(self, size, histogram, entropy, zero_density, zero_runs, strings, digest=None):
+        self.size = size
+        self.histogram = histogram      # 256 compteurs
+        self.entropy = entropy          # bits/octet, un par ENTROPY_BLOCK
+        self.zero_density = zero_density  # proportion de zéros, un par ENTROPY_BLOCK
+        self.zero_runs = zero_runs      # (n, 2) : début, fin
+        self.strings = strings          # (n, 2) : début, fin
+        self.digest = digest
+
+    @property
+    def zero_bytes(self):
+        return int(self.histogram[0])
+
+    @property
+    def global_entropy(self):
+        return _entropy(self.histogram[None, :], self.size)[0] if self.size else 0.0
+
+    @property
+    def high_entropy_blocks(self):
+        return int(np.count_nonzero(self.entropy >= HIGH_ENTROPY))
+
+    def most_common(self, count=5):
+        """[(octet, occurrences), ...] les plus fréquents"""
+        order = np.argsort(self.histogram)[::-1][:count]
+        return [(int(b), int(self.histogram[b])) for b in order if self.histogram[b]]
+
+    def largest_zero_runs(self, count=5):
+        """[(début, longueur), ...] des plus grandes zones de zéros"""
+        lengths = self.zero_runs[:, 1] - self.zero_runs[:, 0]
+        order = np.argsort(-lengths, kind='stable')[:count]
+        return [(int(self.zero_runs[i, 0]), int(lengths[i])) for i in order]
+
+# ============================================================================
+# CALCUL
+# ============================================================================
+
+# c * log2(c) pour tous les compteurs possibles d'un bloc
+_CLOG = np.arange(ENTROPY_BLOCK + 1, dtype=np.float64)
+_CLOG[1:] *= np.log2(_CLOG[1:])
+
+def _entropy(counts, total):
+    """Entropie de Shannon (bits/octet) de chaque ligne de `counts`.
+
+    H = log2(N) - Σ c·log2(c) / N, avec c·log2(c) lu dans une table.
+    """
+    total = np.asarray(total, dtype=np.float64)
+    if counts.max(initial=0) < len(_CLOG):
+        clog = _CLOG[counts].sum(axis=1)
+    else:
+        c = counts.astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            clog = np.where(c > 0, c * np.log2(c), 0.0).sum(axis=1)
+    return np.log2(np.maximum(total, 1)) - clog / np.maximum(total, 1)
+
+def _erode(mask, length):
+    """e[j] vrai si mask[j..j+length-1] sont tous vrais (en log2(length) passes).
+
+    Le résultat a length - 1 éléments de moins que `mask`.
+    """
+    eroded = mask
+    width = 1
+    while width * 2 <= length:
+        eroded = eroded[width:] & eroded[:-width]
+        width *= 2
+    if width < length:
+        rest = length - width
+        eroded = eroded[rest:] & eroded[:-rest]
+    return eroded
+
+def _run_ends(mask, length, base, start):
+    """Plages [a, b) des fins de séquences vraies d'au moins `length` octets.
+
+    `mask` commence à l'offset absolu `base` ; seules les fins à partir de
+    `start` sont gardées (les précédentes appartiennent au morceau d'avant).
+    L'érosion ne laisse que les fins de séquences assez longues : très peu
+    de transitions à extraire, même sur des données aléatoires.
+    """
+    eroded = _erode(mask, length)
+    changes = np.flatnonzero(eroded[1:] != eroded[:-1]) + 1
+    if len(eroded) and eroded[0]:
+        changes = np.concatenate(([0], changes))
+    if len(eroded) and eroded[-1]:
+        changes = np.concatenate((changes, [len(eroded)]))
+
+    shift = base + length - 1
+    ends_from = np.maximum(changes[0::2].astype(np.int64) + shift, start)
+    ends_to = changes[1::2].astype(np.int64) + shift
+    keep = ends_from < ends_to
+    return ends_from[keep], ends_to[keep]
+
+def _merge_runs(parts, length):
+    """Recolle les plages coupées entre deux morceaux ; retourne (n, 2) début, fin"""
+    if not parts:
+        return np.empty((0, 2), dtype=np.int64)
+    starts = np.concatenate([a for a, _ in parts])
+    stops = np.concatenate([b for _, b in parts])
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Une plage qui reprend exactement là où la précédente s'arrête la continue
+    first = np.concatenate(([True], starts[1:] != stops[:-1]))
+    last = np.concatenate((first[1:], [True]))
+    return np.stack((starts[first] - (length - 1), stops[last]), axis=1)
+
+def _printable(arr):
+    """Masque des octets imprimables (comparaisons, plus rapides qu'une table)"""
+    return ((arr - np.uint8(0x20)) < np.uint8(0x5F)) | (arr == 0x09)
+
+_BLOCK_BASE = (np.arange(COUNT_SLICE, dtype=np.intp) // ENTROPY_BLOCK) << 8
+
+def block_stats(data):
+    """Histogramme, entropie et proportion de zéros de chaque ENTROPY_BLOCK.
+
+    Retourne (histogramme de 256 compteurs, entropies, densités de zéros).
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    histogram = np.zeros(256, dtype=np.int64)
+    entropy, zero_density = [], []
+
+    # Tranches courtes : les compteurs restent dans le cache du processeur
+    for pos in range(0, len(arr), COUNT_SLICE):
+        part = arr[pos:pos + COUNT_SLICE]
+        blocks = -(-len(part) // ENTROPY_BLOCK)
+        # Tous les blocs de la tranche en un bincount : index = bloc * 256 + octet
+        counts = np.bincount(_BLOCK_BASE[:len(part)] + part, minlength=blocks * 256)
+        counts = counts.reshape(blocks, 256)
+        histogram += counts.sum(axis=0)
+
+        lengths = np.full(blocks, ENTROPY_BLOCK)
+        lengths[-1] = len(part) - (blocks - 1) * ENTROPY_BLOCK
+        entropy.append(_entropy(counts, lengths))
+        zero_density.append(counts[:, 0] / lengths)
+
+    if not entropy:
+        return histogram, np.empty(0, np.float32), np.empty(0, np.float32)
+    return (histogram, np.concatenate(entropy).astype(np.float32),
+            np.concatenate(zero_density).astype(np.float32))
+
+def _analyze_chunk(buffer, start, stop):
+    """Analyse de [start, stop), indépendante des autres morceaux"""
+    # Relire les octets précédents : séquences commencées avant `start`
+    overlap = min(max(MIN_ZERO_RUN, MIN_STRING_LENGTH) - 1, start)
+    arr = np.frombuffer(buffer[start - overlap:stop], dtype=np.uint8)
+    body = arr[overlap:]
+
+    histogram, entropy, zero_density = block_stats(body)
+
+    base = start - overlap
+    zeros = _run_ends(arr == 0, MIN_ZERO_RUN, base, start)
+    strings = _run_ends(_printable(arr), MIN_STRING_LENGTH, base, start)
+    return histogram, entropy, zero_density, zeros, strings
+
+def analyze(buffer, chunk_size=ANALYSIS_CHUNK_SIZE, workers=None):
+    """Analyse complète en une lecture (résultat mis en cache par empreinte).
+
+    `buffer` : SaveBuffer, bytes ou bytearray.
+
+    Les morceaux sont analysés en parallèle (NumPy libère le GIL) ; si le
+    buffer n'a pas encore d'empreinte, elle est calculée pendant ce temps.
+    """
+    modified = getattr(buffer, 'is_modified', False)
+    digest = getattr(buffer, 'digest', None)
+    if digest is not None and not modified and digest in _cache:
+        _cache.move_to_end(digest)
+        return _cache[digest]
+
+    cache = default_cache()
+    if not modified:
+        result = _from_arrays(cache.get_arrays(digest, 'analysis'), digest)
+        if result is not None:
+            _remember(result)
+            return result
+
+    size = len(buffer)
+    chunk_size = max(chunk_size - chunk_size % COUNT_SLICE, COUNT_SLICE)
+    bounds = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_analyze_chunk, buffer, start, stop) for start, stop in bounds]
+
+        if digest is None and not modified:
+            hasher = hashlib.blake2b(digest_size=16)
+            for start, stop in bounds:
+                hasher.update(buffer[start:stop])
+            digest = hasher.hexdigest()
+            if hasattr(buffer, 'digest'):
+                # SaveBuffer : empreinte réutilisée (cache de lecture, backups)
+                buffer.digest = digest
+
+        results = [future.result() for future in futures]
+
+    histogram = np.zeros(256, dtype=np.int64)
+    for r in results:
+        histogram += r[0]
+
+    def joined(column):
+        if not results:
+            return np.empty(0, np.float32)
+        return np.concatenate([r[column] for r in results])
+
+    result = SaveAnalysis(
+        size, histogram, joined(1), joined(2),
+        _merge_runs([r[3] for r in results], MIN_ZERO_RUN),
+        _merge_runs([r[4] for r in results], MIN_STRING_LENGTH),
+        None if modified else digest)
+
+    if result.digest is not None:
+        _remember(result)
+        cache.put_arrays(result.digest, 'analysis', _to_arrays(result))
+        # La minimap reprend les mêmes blocs à la prochaine ouverture
+        cache.put_arrays(result.digest, 'blocks',
+                         {'entropy': result.entropy, 'zeros': result.zero_density})
+    return result
+
+def _remember(result):
+    _cache[result.digest] = result
+    while len(_cache) > CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+def _to_arrays(result):
+    return {'size': np.int64(result.size), 'histogram': result.histogram,
+            'entropy': result.entropy, 'zero_density': result.zero_density,
+            'zero_runs': result.zero_runs, 'strings': result.strings}
+
+def _from_arrays(arrays, digest):
+    """SaveAnalysis relue du cache (None si absente)"""
+    if arrays is None:
+        return None
+    return SaveAnalysis(int(arrays['size']), arrays['histogram'], arrays['entropy'],
+                        arrays['zero_density'], arrays['zero_runs'], arrays['strings'], digest)
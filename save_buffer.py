@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Buffer de sauvegarde mappé en mémoire
+Développé par ROUTIER87
+"""
+
+import os
+import mmap
+import struct
+import zlib
+
+from piece_table import PieceTable
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Taille des blocs pour les lectures séquentielles (recherche, écriture)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Journal d'enregistrement incrémental (octets d'origine des plages réécrites)
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAGIC = b"TSJ1"
+JOURNAL_HEADER = struct.Struct('<4sQI')   # magic, taille du fichier, nb plages
+JOURNAL_ENTRY = struct.Struct('<QI')      # offset, longueur
+
+# ============================================================================
+# JOURNAL
+# ============================================================================
+
+def _fsync_dir(path):
+    """Synchronise le dossier (création/suppression du journal) si possible"""
+    if os.name != 'nt':
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def _write_journal(journal_path, file_size, entries):
+    """Écrit le journal [(offset, octets d'origine), ...] et le synchronise"""
+    parts = [JOURNAL_HEADER.pack(JOURNAL_MAGIC, file_size, len(entries))]
+    for offset, original in entries:
+        parts.append(JOURNAL_ENTRY.pack(offset, len(original)))
+        parts.append(original)
+    payload = b"".join(parts)
+
+    with open(journal_path, 'wb') as f:
+        f.write(payload)
+        f.write(struct.pack('<I', zlib.crc32(payload)))
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_dir(journal_path)
+
+def recover_journal(filepath):
+    """Annule un enregistrement incrémental interrompu.
+
+    Si un journal complet existe, les octets d'origine sont réécrits (le
+    fichier revient à son état d'avant l'enregistrement). Un journal
+    incomplet signifie que le fichier n'a pas encore été touché.
+    Retourne True si le fichier a été restauré.
+    """
+    journal_path = filepath + JOURNAL_SUFFIX
+    if not os.path.exists(journal_path):
+        return False
+
+    with open(journal_path, 'rb') as f:
+        raw = f.read()
+
+    restored = False
+    payload, crc = raw[:-4], raw[-4:]
+    valid = (len(raw) >= JOURNAL_HEADER.size + 4
+             and struct.unpack('<I', crc)[0] == zlib.crc32(payload))
+
+    if valid:
+        magic, file_size, count = JOURNAL_HEADER.unpack_from(payload)
+        if magic == JOURNAL_MAGIC and os.path.getsize(filepath) == file_size:
+            pos = JOURNAL_HEADER.size
+            with open(filepath, 'r+b') as f:
+                for _ in range(count):
+                    offset, length = JOURNAL_ENTRY.unpack_from(payload, pos)
+                    pos += JOURNAL_ENTRY.size
+                    f.seek(offset)
+                    f.write(payload[pos:pos + length])
+                    pos += length
+                f.flush()
+                os.fsync(f.fileno())
+            restored = True
+
+    os.remove(journal_path)
+    _fsync_dir(journal_path)
+    return restored
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+class SaveBuffer:
+    """Fichier de sauvegarde lu via mmap, les modifications restent en surcouche.
+
+    Les lectures vont directement dans le fichier mappé ; les modifications
+    (écrasements, insertions, suppressions) sont décrites par une table de
+    morceaux (piece_table.PieceTable) : aucune ne recopie le fichier, et le
+    contenu n'est fusionné qu'à l'enregistrement, bloc par bloc.
+    """
+
+    def __init__(self, filepath, use_mmap=True):
+        self.filepath = filepath
+        self.use_mmap = use_mmap
+        self._file = None
+        self._base = b""
+        self._table = PieceTable(self._base)
+
+        # Empreinte du contenu (calculée par le chargeur, None si inconnue)
+        self.digest = None
+
+        self._open()
+
+    def _open(self):
+        """Ouvre le fichier (mappé si possible)"""
+        # Terminer proprement un enregistrement incrémental interrompu
+        recover_journal(self.filepath)
+
+        size = os.path.getsize(self.filepath)
+
+        if self.use_mmap and size > 0:
+            self._file = open(self.filepath, 'rb')
+            self._base = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Fichier vide (non mappable) ou mode mémoire
+            with open(self.filepath, 'rb') as f:
+                self._base = bytearray(f.read())
+
+        self._table = PieceTable(self._base)
+
+    def close(self):
+        """Libère le mapping et le fichier"""
+        if isinstance(self._base, mmap.mmap):
+            self._base.close()
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._base = b""
+        self._table = PieceTable(self._base)
+
+    @property
+    def is_mapped(self):
+        return isinstance(self._base, mmap.mmap)
+
+    @property
+    def is_modified(self):
+        return self._table.edits > 0
+
+    @property
+    def original(self):
+        """Contenu sur disque, sans les modifications en surcouche"""
+        return self._base
+
+    @property
+    def size_changed(self):
+        return len(self._table) != len(self._base)
+
+    def modified_ranges(self):
+        """Retourne les plages modifiées [(début, fin), ...].
+
+        Après une insertion ou une suppression, tout ce qui suit est décalé :
+        la plage modifiée va alors jusqu'à la fin du fichier.
+        """
+        if not self.is_modified:
+            return []
+        return self._table.modified_ranges()
+
+    # ------------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, key):
+        size = len(self._table)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(size)
+            if step != 1:
+                raise ValueError("Pas de découpage avec pas")
+            return self.read(start, stop)
+
+        if key < 0:
+            key += size
+        if not 0 <= key < size:
+            raise IndexError("Offset hors du fichier")
+        return self.read(key, key + 1)[0]
+
+    def read(self, start, stop):
+        """Lit une plage en appliquant les modifications en surcouche"""
+        start = max(0, start)
+        stop = min(stop, len(self._table))
+        if stop <= start:
+            return b""
+        if not self.is_modified:
+            return bytes(self._base[start:stop])
+        return self._table.read(start, stop)
+
+    def iter_chunks(self, start=0, stop=None, chunk_size=CHUNK_SIZE):
+        """Parcourt une plage par blocs (sans copier tout le fichier)"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for pos in range(start, stop, chunk_size):
+            yield self.read(pos, min(pos + chunk_size, stop))
+
+    def find(self, sub, start=0, end=None):
+        """Comme bytes.find, sur le fichier mappé et la surcouche"""
+        end = len(self) if end is None else min(end, len(self))
+        sub = bytes([sub]) if isinstance(sub, int) else bytes(sub)
+
+        if not self.is_modified:
+            return self._base.find(sub, start, end)
+
+        # Parcours par fenêtres qui se chevauchent de len(sub) - 1 octets
+        overlap = max(len(sub) - 1, 0)
+        for pos in range(start, end, CHUNK_SIZE):
+            window = self.read(pos, min(pos + CHUNK_SIZE + overlap, end))
+            index = window.find(sub)
+            if index != -1:
+                return pos + index
+        return -1
+
+    # ------------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------------
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Pas de découpage avec pas")
+            # Longueur différente : remplacement (la suite est décalée)
+            self.replace(start, max(stop - start, 0), value)
+        else:
+            self.write(key, bytes([value]))
+
+    def __delitem__(self, key):
+        if not isinstance(key, slice):
+            key = slice(key, key + 1)
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("Pas de découpage avec pas")
+        self.delete(start, max(stop - start, 0))
+
+    def write(self, offset, data):
+        """Écrase len(data) octets à partir de `offset` (taille inchangée)"""
+        data = bytes(data)
+        if offset < 0 or offset + len(data) > len(self):
+            raise IndexError("Modification hors du fichier")
+        if data:
+            self._table.replace(offset, len(data), data)
+
+    def insert(self, offset, data):
+        """Insère des octets (la suite du fichier est décalée)"""
+        self._table.insert(offset, bytes(data))
+
+    def delete(self, offset, length):
+        """Supprime `length` octets (la suite du fichier est décalée)"""
+        self._table.delete(offset, length)
+
+    def replace(self, offset, length, data):
+        """Remplace `length` octets par `data`, de taille quelconque"""
+        self._table.replace(offset, length, bytes(data))
+
+    def save(self, filepath=None, incremental=True):
+        """Enregistre les modifications.
+
+        Sur le fichier source, seules les plages modifiées sont réécrites
+        (enregistrement incrémental) tant que la taille ne change pas ;
+        sinon le fichier complet est écrit, bloc par bloc.
+        """
+        target = filepath or self.filepath
+        same_file = (os.path.exists(target)
+                     and os.path.samefile(target, self.filepath))
+
+        if same_file and incremental and not self.size_changed:
+            self.save_in_place()
+            return
+
+        if same_file:
+            self.digest = None
+
+        # Pour le fichier source : écrire à côté puis remplacer
+        out_path = f"{target}.tmp" if same_file else target
+        with open(out_path, 'wb') as f:
+            for chunk in self.iter_chunks():
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if same_file:
+            self.close()
+            os.replace(out_path, target)
+            self._open()
+
+    def save_in_place(self):
+        """Réécrit uniquement les plages modifiées dans le fichier source.
+
+        Les octets d'origine sont d'abord journalisés (fsync) : en cas
+        d'interruption, la prochaine ouverture remet le fichier dans son
+        état précédent au lieu de le laisser à moitié écrit.
+        """
+        if not self.is_modified:
+            return
+        if self.size_changed:
+            self.save(incremental=False)
+            return
+
+        self.digest = None
+        ranges = self.modified_ranges()
+        # Nouveaux octets lus avant toute écriture : un morceau déplacé peut
+        # venir d'une plage que le mapping verra déjà réécrite
+        patches = [self._table.read(start, stop) for start, stop in ranges]
+
+        journal_path = self.filepath + JOURNAL_SUFFIX
+        entries = [(start, bytes(self._base[start:stop])) for start, stop in ranges]
+        _write_journal(journal_path, len(self._base), entries)
+
+        # Écritures positionnées : le mapping voit directement les nouveaux octets
+        with open(self.filepath, 'r+b') as f:
+            for (start, _), patch in zip(ranges, patches):
+                f.seek(start)
+                f.write(patch)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.remove(journal_path)
+        _fsync_dir(journal_path)
+
+        if not self.is_mapped:
+            for (start, stop), patch in zip(ranges, patches):
+                self._base[start:stop] = patch
+
+        self._table = PieceTable(self._base)
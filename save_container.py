@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Sauvegardes dans un conteneur compressé
+Développé par ROUTIER87
+
+Une sauvegarde peut être une suite de trames compressées (zlib, gzip,
+zstd ou LZ4, éventuellement plusieurs à la suite). Le contenu logique est
+décompressé en flux dans un fichier temporaire, puis mappé comme une
+sauvegarde ordinaire : les offsets de config.ini s'appliquent à ce
+contenu. À l'enregistrement, seules les trames touchées par une
+modification sont recompressées ; les autres sont recopiées telles quelles.
+
+zstd et LZ4 (modules optionnels zstandard et lz4) indiquent la taille de
+chaque trame : elles sont décompressées en parallèle.
+"""
+
+import os
+import mmap
+import zlib
+import tempfile
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+from save_buffer import SaveBuffer
+from piece_table import PieceTable
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+LZ4_MAGIC = b"\x04\x22\x4d\x18"
+
+# Trames zstd "ignorables" : magic 0x184D2A50 à 0x184D2A5F
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+ZSTD_SKIPPABLE = 0x184D2A50
+
+# Lectures du fichier compressé, et morceaux décompressés écrits d'un coup
+READ_SIZE = 1024 * 1024
+OUT_SIZE = 8 * 1024 * 1024
+
+# Trames plus grandes : décompressées en flux (mémoire bornée), pas en parallèle
+PARALLEL_FRAME_SIZE = 16 * 1024 * 1024
+
+# Niveau zlib selon l'en-tête d'origine (FLEVEL : 0 rapide ... 3 maximal)
+ZLIB_LEVELS = (1, 5, 6, 9)
+
+ZSTD_LEVEL = 3
+
+# Trame : type, position et taille compressées, position et taille logiques
+Frame = namedtuple('Frame', 'kind comp_offset comp_size offset size')
+
+# ============================================================================
+# DÉTECTION
+# ============================================================================
+
+def _is_zlib_header(head):
+    return (len(head) >= 2 and head[0] & 0x0F == 8 and head[0] >> 4 <= 7
+            and (head[0] << 8 | head[1]) % 31 == 0 and not head[1] & 0x20)
+
+def detect(filepath):
+    """Type de conteneur ('zlib', 'gzip', 'zstd', 'lz4') ou None pour un fichier brut"""
+    with open(filepath, 'rb') as f:
+        head = f.read(64 * 1024)
+
+    if head[:4] == ZSTD_MAGIC:
+        return 'zstd'
+    if head[:4] == LZ4_MAGIC:
+        return 'lz4'
+    if head[:2] == GZIP_MAGIC or _is_zlib_header(head):
+        # Un fichier brut peut commencer par ces octets : vérifier le flux
+        try:
+            zlib.decompressobj(wbits=47).decompress(head, 1024)
+        except zlib.error:
+            return None
+        return 'gzip' if head[:2] == GZIP_MAGIC else 'zlib'
+    return None
+
+def _require(module):
+    """Importe un module de compression optionnel"""
+    try:
+        if module == 'lz4':
+            import lz4.frame
+            return lz4.frame
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise RuntimeError(f"Sauvegarde compressée : le module '{module}' est requis "
+                           f"(pip install {module})") from None
+
+# ============================================================================
+# PARCOURS DES TRAMES
+# ============================================================================
+
+def _zstd_frame_size(f, pos):
+    """Taille compressée de la trame zstd à `pos` (en-têtes de blocs seulement)"""
+    f.seek(pos)
+    header = f.read(18)
+    magic = int.from_bytes(header[:4], 'little')
+    if magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE:
+        return 8 + int.from_bytes(header[4:8], 'little'), 'skip'
+
+    descriptor = header[4]
+    fcs_flag, single_segment = descriptor >> 6, descriptor >> 5 & 1
+    checksum, dict_flag = descriptor >> 2 & 1, descriptor & 3
+    fcs_size = (1 if single_segment else 0, 2, 4, 8)[fcs_flag]
+    size = 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[dict_flag] + fcs_size
+
+    # Blocs : en-tête de 3 octets (dernier, type, taille)
+    while True:
+        f.seek(pos + size)
+        raw = f.read(3)
+        if len(raw) < 3:
+            raise ValueError("Trame zstd tronquée")
+        block = int.from_bytes(raw, 'little')
+        block_type = block >> 1 & 3
+        size += 3 + (1 if block_type == 1 else block >> 3)
+        if block & 1:
+            break
+    return size + (4 if checksum else 0), 'zstd'
+
+def _lz4_frame_size(f, pos):
+    """Taille compressée de la trame LZ4 à `pos`"""
+    f.seek(pos + 4)
+    flags = f.read(2)
+    if len(flags) < 2:
+        raise ValueError("Trame LZ4 tronquée")
+    flg = flags[0]
+    block_checksum, content_size = flg >> 4 & 1, flg >> 3 & 1
+    content_checksum, dict_id = flg >> 2 & 1, flg & 1
+    size = 4 + 2 + (8 if content_size else 0) + (4 if dict_id else 0) + 1
+
+    # Blocs : taille sur 4 octets (bit de poids fort = non compressé), 0 = fin
+    while True:
+        f.seek(pos + size)
+        raw = f.read(4)
+        if len(raw) < 4:
+            raise ValueError("Trame LZ4 tronquée")
+        block = int.from_bytes(raw, 'little') & 0x7FFFFFFF
+        size += 4
+        if block == 0:
+            break
+        size += block + (4 if block_checksum else 0)
+    return size + (4 if content_checksum else 0), 'lz4'
+
+def walk_frames(f, file_size):
+    """Trames zstd/LZ4 du fichier, sans rien décompresser : [(type, position, taille)]"""
+    frames = []
+    pos = 0
+    while pos < file_size:
+        f.seek(pos)
+        magic = f.read(4)
+        if magic == LZ4_MAGIC:
+            size, kind = _lz4_frame_size(f, pos)
+        elif (magic == ZSTD_MAGIC
+              or int.from_bytes(magic.ljust(4, b"\0"), 'little') & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE):
+            size, kind = _zstd_frame_size(f, pos)
+        else:
+            # Octets de fin inconnus : recopiés tels quels
+            size, kind = file_size - pos, 'skip'
+        frames.append((kind, pos, min(size, file_size - pos)))
+        pos += size
+    return frames
+
+# ============================================================================
+# DÉCOMPRESSION
+# ============================================================================
+
+def _decompress_frame(kind, data):
+    if kind == 'lz4':
+        return _require('lz4').decompress(data)
+    return _require('zstandard').ZstdDecompressor().decompressobj().decompress(data)
+
+def _stream_frame(f, kind, comp_offset, comp_size, out):
+    """Décompresse une grande trame zstd/LZ4 par morceaux ; retourne la taille écrite"""
+    if kind == 'lz4':
+        decompressor = _require('lz4').LZ4FrameDecompressor()
+    else:
+        decompressor = _require('zstandard').ZstdDecompressor().decompressobj()
+    written = 0
+    f.seek(comp_offset)
+    remaining = comp_size
+    while remaining:
+        chunk = f.read(min(READ_SIZE, remaining))
+        remaining -= len(chunk)
+        data = decompressor.decompress(chunk)
+        out.write(data)
+        written += len(data)
+    return written
+
+def _decompress_zlib(f, file_size, out, progress):
+    """Flux zlib/gzip successifs, décompressés en flux (une trame par flux)"""
+    frames = []
+    pos = logical = 0
+    while pos < file_size:
+        f.seek(pos)
+        head = f.read(2)
+        if head == GZIP_MAGIC:
+            kind = 'gzip'
+        elif _is_zlib_header(head):
+            kind = 'zlib'
+        else:
+            frames.append(Frame('skip', pos, file_size - pos, logical, 0))
+            break
+
+        f.seek(pos)
+        decompressor = zlib.decompressobj(wbits=31 if kind == 'gzip' else 15)
+        size = 0
+        while not decompressor.eof:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                raise ValueError("Flux compressé tronqué")
+            # Sortie bornée : un bloc de zéros peut se décompresser en gigaoctets
+            data = decompressor.decompress(chunk, OUT_SIZE)
+            while True:
+                out.write(data)
+                size += len(data)
+                if not decompressor.unconsumed_tail or decompressor.eof:
+                    break
+                data = decompressor.decompress(decompressor.unconsumed_tail, OUT_SIZE)
+            if progress is not None:
+                progress(f.tell(), file_size)
+
+        end = f.tell() - len(decompressor.unused_data)
+        frames.append(Frame(kind, pos, end - pos, logical, size))
+        logical += size
+        pos = end
+    return frames
+
+def _decompress_frames(f, file_size, out, progress, workers):
+    """Trames zstd/LZ4 : les petites en parallèle (dans l'ordre), les grandes en flux"""
+    frames = []
+    logical = 0
+    pending = []
+
+    def flush(limit):
+        nonlocal logical
+        while len(pending) > limit:
+            kind, comp_offset, comp_size, future = pending.pop(0)
+            data = future.result()
+            out.write(data)
+            frames.append(Frame(kind, comp_offset, comp_size, logical, len(data)))
+            logical += len(data)
+            if progress is not None:
+                progress(comp_offset + comp_size, file_size)
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for kind, comp_offset, comp_size in walk_frames(f, file_size):
+            if kind == 'skip':
+                flush(0)
+                frames.append(Frame(kind, comp_offset, comp_size, logical, 0))
+            elif comp_size > PARALLEL_FRAME_SIZE:
+                flush(0)
+                size = _stream_frame(f, kind, comp_offset, comp_size, out)
+                frames.append(Frame(kind, comp_offset, comp_size, logical, size))
+                logical += size
+            else:
+                f.seek(comp_offset)
+                data = f.read(comp_size)
+                pending.append((kind, comp_offset, comp_size,
+                                pool.submit(_decompress_frame, kind, data)))
+                # Quelques trames d'avance par cœur : la mémoire reste bornée
+                flush(workers * 2)
+        flush(0)
+    return frames
+
+# ============================================================================
+# RECOMPRESSION
+# ============================================================================
+
+def _compress_frame(kind, chunks, level):
+    """Recompresse une trame à partir de ses morceaux logiques ; itère les octets compressés"""
+    if kind in ('zlib', 'gzip'):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if kind == 'gzip' else 15)
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+    elif kind == 'zstd':
+        data = b"".join(chunks)
+        yield _require('zstandard').ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        yield _require('lz4').compress(b"".join(chunks))
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+class ContainerBuffer(SaveBuffer):
+    """Contenu logique d'une sauvegarde compressée (même interface que SaveBuffer).
+
+    `filepath` reste le fichier compressé ; le contenu décompressé vit dans
+    `payload_path`, mappé et modifié en surcouche comme un fichier brut.
+    """
+
+    is_container = True
+
+    def __init__(self, filepath, kind, frames, payload_path, use_mmap=True):
+        self.kind = kind
+        self.frames = frames
+        self.payload_path = payload_path
+        self.last_touched = 0
+        self._level = ZLIB_LEVELS[2]
+        if kind == 'zlib':
+            with open(filepath, 'rb') as f:
+                self._level = ZLIB_LEVELS[f.read(2)[1] >> 6]
+        super().__init__(filepath, use_mmap)
+
+    def _open(self):
+        """Mappe le contenu décompressé (pas de journal : fichier temporaire)"""
+        size = os.path.getsize(self.payload_path)
+        if self.use_mmap and size > 0:
+            self._file = open(self.payload_path, 'rb')
+            self._base = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            with open(self.payload_path, 'rb') as f:
+                self._base = bytearray(f.read())
+        self._table = PieceTable(self._base)
+
+    def close(self):
+        """Libère le mapping et supprime le contenu décompressé"""
+        super().close()
+        if self.payload_path and os.path.exists(self.payload_path):
+            os.remove(self.payload_path)
+        self.payload_path = None
+
+    def touched_frames(self):
+        """Indices des trames qui contiennent une plage modifiée"""
+        starts = [frame.offset for frame in self.frames]
+        touched = set()
+        for start, stop in self.modified_ranges():
+            first = bisect_right(starts, start) - 1
+            for i in range(max(first, 0), len(self.frames)):
+                frame = self.frames[i]
+                if frame.offset >= stop:
+                    break
+                if frame.size and frame.offset + frame.size > start:
+                    touched.add(i)
+        if self.size_changed:
+            # Octets ajoutés ou retirés en fin de contenu : dernière trame de données
+            last = self._last_data_frame()
+            if last is not None:
+                touched.add(last)
+        return touched
+
+    def _last_data_frame(self):
+        sized = [i for i, frame in enumerate(self.frames) if frame.size]
+        return sized[-1] if sized else None
+
+    def _frame_layout(self):
+        """Plages logiques [(trame, début, fin), ...] du contenu actuel.
+
+        Les trames gardent leurs bornes d'origine ; si la taille a changé, la
+        dernière trame de données s'arrête à la nouvelle fin et les trames
+        vidées par une suppression disparaissent.
+        """
+        size = len(self)
+        last = self._last_data_frame()
+        layout = []
+        pos = 0
+        for i, frame in enumerate(self.frames):
+            if not frame.size:
+                layout.append((i, pos, pos))
+                continue
+            stop = size if i == last else min(frame.offset + frame.size, size)
+            if pos < stop:
+                layout.append((i, pos, stop))
+                pos = stop
+        return layout
+
+    def _write_container(self, target):
+        """Écrit le conteneur : trames touchées recompressées, les autres recopiées"""
+        touched = self.touched_frames()
+        frames = []
+        with open(self.filepath, 'rb') as src, open(target, 'wb') as out:
+            for i, start, stop in self._frame_layout():
+                frame = self.frames[i]
+                comp_offset = out.tell()
+                if i in touched:
+                    chunks = self.iter_chunks(start, stop)
+                    for data in _compress_frame(frame.kind, chunks, self._level):
+                        out.write(data)
+                else:
+                    src.seek(frame.comp_offset)
+                    remaining = frame.comp_size
+                    while remaining:
+                        data = src.read(min(READ_SIZE, remaining))
+                        out.write(data)
+                        remaining -= len(data)
+                frames.append(frame._replace(comp_offset=comp_offset,
+                                             comp_size=out.tell() - comp_offset,
+                                             offset=start,
+                                             size=stop - start if frame.size else 0))
+            out.flush()
+            os.fsync(out.fileno())
+        return frames, touched
+
+    def save(self, filepath=None, incremental=True):
+        """Enregistre le conteneur (seules les trames touchées sont recompressées)"""
+        target = filepath or self.filepath
+        same_file = (os.path.exists(target)
+                     and os.path.samefile(target, self.filepath))
+        if same_file and not self.is_modified:
+            return
+
+        out_path = f"{target}.tmp" if same_file else target
+        frames, touched = self._write_container(out_path)
+        self.last_touched = len(touched)
+        if not same_file:
+            return
+
+        os.replace(out_path, target)
+        self.frames = frames
+        self._apply_payload()
+
+    def save_in_place(self):
+        self.save()
+
+    def _apply_payload(self):
+        """Reporte la surcouche dans le contenu décompressé (temporaire)"""
+        self.digest = None
+        if self.size_changed:
+            # Contenu décalé : réécrit en entier à côté, puis remplacé
+            out_path = self.payload_path + ".tmp"
+            with open(out_path, 'wb') as f:
+                for chunk in self.iter_chunks():
+                    f.write(chunk)
+            SaveBuffer.close(self)
+            os.replace(out_path, self.payload_path)
+            self._open()
+            return
+
+        ranges = self.modified_ranges()
+        patches = [self._table.read(start, stop) for start, stop in ranges]
+        if self.is_mapped:
+            with open(self.payload_path, 'r+b') as f:
+                for (start, _), patch in zip(ranges, patches):
+                    f.seek(start)
+                    f.write(patch)
+        else:
+            for (start, stop), patch in zip(ranges, patches):
+                self._base[start:stop] = patch
+        self._table = PieceTable(self._base)
+
+# ============================================================================
+# LECTURE PARTIELLE
+# ============================================================================
+
+# Lectures du fichier compressé quand seul le début du contenu est utile
+PREFIX_READ_SIZE = 64 * 1024
+
+def _stream_decompressor(kind):
+    if kind in ('zlib', 'gzip'):
+        return zlib.decompressobj(wbits=31 if kind == 'gzip' else 15)
+    if kind == 'lz4':
+        return _require('lz4').LZ4FrameDecompressor()
+    return _require('zstandard').ZstdDecompressor().decompressobj()
+
+def read_prefix(filepath, kind, stop):
+    """Octets [0, stop) du contenu décompressé.
+
+    Les trames sont décompressées en flux, par petites lectures, et la
+    lecture s'arrête dès que `stop` octets sont produits : le reste du
+    fichier n'est ni lu ni décompressé (contenu plus court : tout le contenu).
+    """
+    out = bytearray()
+    pos = 0
+    with open(filepath, 'rb') as f:
+        while len(out) < stop:
+            f.seek(pos)
+            head = f.read(4)
+            if head[:2] == GZIP_MAGIC:
+                frame_kind = 'gzip'
+            elif head == LZ4_MAGIC:
+                frame_kind = 'lz4'
+            elif head == ZSTD_MAGIC:
+                frame_kind = 'zstd'
+            elif (len(head) == 4 and int.from_bytes(head, 'little')
+                  & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE):
+                pos += _zstd_frame_size(f, pos)[0]
+                continue
+            elif kind in ('zlib', 'gzip') and _is_zlib_header(head):
+                frame_kind = 'zlib'
+            else:
+                break
+
+            f.seek(pos)
+            decompressor = _stream_decompressor(frame_kind)
+            while not decompressor.eof and len(out) < stop:
+                chunk = f.read(PREFIX_READ_SIZE)
+                if not chunk:
+                    raise ValueError("Flux compressé tronqué")
+                if frame_kind in ('zlib', 'gzip'):
+                    # Sortie bornée : inutile de produire plus que demandé
+                    out += decompressor.decompress(chunk, stop - len(out))
+                    while (decompressor.unconsumed_tail and not decompressor.eof
+                           and len(out) < stop):
+                        out += decompressor.decompress(decompressor.unconsumed_tail,
+                                                       stop - len(out))
+                else:
+                    out += decompressor.decompress(chunk)
+            if not decompressor.eof:
+                break
+            pos = f.tell() - len(decompressor.unused_data or b"")
+    return bytes(out[:stop])
+
+# ============================================================================
+# OUVERTURE
+# ============================================================================
+
+def open_container(filepath, kind, use_mmap=True, progress=None, workers=None):
+    """Décompresse un conteneur dans temp_dir et retourne son ContainerBuffer"""
+    temp_dir = settings.get_path('temp_dir', 'temp')
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, payload_path = tempfile.mkstemp(suffix=".payload", dir=temp_dir)
+
+    try:
+        file_size = os.path.getsize(filepath)
+        with open(filepath, 'rb') as f, os.fdopen(fd, 'wb') as out:
+            if kind in ('zlib', 'gzip'):
+                frames = _decompress_zlib(f, file_size, out, progress)
+            else:
+                frames = _decompress_frames(f, file_size, out, progress, workers)
+        return ContainerBuffer(filepath, kind, frames, payload_path, use_mmap)
+    except BaseException:
+        os.remove(payload_path)
+        raise
+
+def open_save(filepath, use_mmap=True, progress=None):
+    """SaveBuffer pour un fichier brut, ContainerBuffer pour un conteneur compressé"""
+    kind = detect(filepath) if os.path.getsize(filepath) else None
+    if kind is None:
+        return SaveBuffer(filepath, use_mmap)
+    return open_container(filepath, kind, use_mmap, progress)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Comparaison binaire de sauvegardes
+Développé par ROUTIER87
+
+Les sauvegardes sont comparées par blocs : une égalité vectorisée sur des
+mots de 64 bits repère les blocs différents, puis seuls ces blocs sont
+comparés octet par octet. Le résultat est une liste compacte de plages
+[début, fin) où au moins une sauvegarde diffère de la première.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Blocs comparés d'un coup (octets, multiple de 8)
+DIFF_BLOCK = 4096
+
+# Morceaux lus par tâche (multiple de DIFF_BLOCK)
+DIFF_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Deux différences séparées de moins de DIFF_GAP octets forment une plage
+# (un entier de 64 bits modifié donne une seule plage)
+DIFF_GAP = 8
+
+# ============================================================================
+# RÉSULTAT
+# ============================================================================
+
+class SaveDiff:
+    """Plages différentes entre plusieurs sauvegardes"""
+
+    def __init__(self, sizes, runs):
+        self.sizes = sizes      # taille de chaque sauvegarde
+        self.runs = runs        # (n, 2) : début, fin
+
+    @property
+    def common_size(self):
+        return min(self.sizes) if self.sizes else 0
+
+    @property
+    def changed_bytes(self):
+        return int((self.runs[:, 1] - self.runs[:, 0]).sum())
+
+    def __len__(self):
+        return len(self.runs)
+
+# ============================================================================
+# CALCUL
+# ============================================================================
+
+def _changed_blocks(reference, others):
+    """Masque des blocs de DIFF_BLOCK octets où une sauvegarde diffère"""
+    full = len(reference) - len(reference) % 8
+    words = np.frombuffer(reference, dtype=np.uint64, count=full // 8)
+    blocks = -(-len(reference) // DIFF_BLOCK)
+    changed = np.zeros(blocks, dtype=bool)
+
+    per_block = DIFF_BLOCK // 8
+    whole = len(words) // per_block
+    for other in others:
+        other_words = np.frombuffer(other, dtype=np.uint64, count=full // 8)
+        differs = words != other_words
+        changed[:whole] |= differs[:whole * per_block].reshape(whole, per_block).any(axis=1)
+        if whole < blocks:
+            # Dernier bloc incomplet (et octets qui ne forment pas un mot entier)
+            tail = whole * DIFF_BLOCK
+            changed[whole] |= reference[tail:] != other[tail:]
+    return changed
+
+def _mask_runs(mask, base):
+    """Plages [début, fin) des valeurs vraies de `mask`, décalées de `base`"""
+    edges = np.flatnonzero(np.diff(mask.view(np.int8), prepend=0, append=0))
+    return edges.reshape(-1, 2).astype(np.int64) + base
+
+def _diff_chunk(buffers, start, stop):
+    """Plages (absolues, triées) des octets différents dans [start, stop)"""
+    reference = buffers[0][start:stop]
+    others = [buffer[start:stop] for buffer in buffers[1:]]
+
+    blocks = np.flatnonzero(_changed_blocks(reference, others))
+    if len(blocks) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Affinage octet par octet des seuls blocs différents (blocs consécutifs ensemble)
+    ref = np.frombuffer(reference, dtype=np.uint8)
+    arrays = [np.frombuffer(other, dtype=np.uint8) for other in others]
+    breaks = np.flatnonzero(np.diff(blocks) > 1)
+    found = []
+    for first, last in zip(np.concatenate(([blocks[0]], blocks[breaks + 1])),
+                           np.concatenate((blocks[breaks], [blocks[-1]]))):
+        lo, hi = int(first) * DIFF_BLOCK, min((int(last) + 1) * DIFF_BLOCK, len(ref))
+        mask = ref[lo:hi] != arrays[0][lo:hi]
+        for arr in arrays[1:]:
+            mask |= ref[lo:hi] != arr[lo:hi]
+        found.append(_mask_runs(mask, start + lo))
+    return np.concatenate(found)
+
+def merge_runs(runs, gap=DIFF_GAP):
+    """Réunit les plages séparées de moins de `gap` octets"""
+    if len(runs) < 2:
+        return runs
+    keep = runs[1:, 0] - runs[:-1, 1] >= gap
+    starts = np.concatenate((runs[:1, 0], runs[1:, 0][keep]))
+    stops = np.concatenate((runs[:-1, 1][keep], runs[-1:, 1]))
+    return np.stack((starts, stops), axis=1)
+
+def diff_saves(buffers, gap=DIFF_GAP, chunk_size=DIFF_CHUNK_SIZE, workers=None):
+    """Compare plusieurs sauvegardes à la première.
+
+    Les morceaux sont comparés en parallèle (NumPy libère le GIL). Si les
+    tailles diffèrent, la fin des sauvegardes les plus longues forme une
+    dernière plage.
+    """
+    if len(buffers) < 2:
+        raise ValueError("Il faut au moins deux sauvegardes")
+
+    sizes = [len(buffer) for buffer in buffers]
+    common = min(sizes)
+    chunk_size = max(chunk_size - chunk_size % DIFF_BLOCK, DIFF_BLOCK)
+    bounds = [(start, min(start + chunk_size, common)) for start in range(0, common, chunk_size)]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts = list(pool.map(lambda b: _diff_chunk(buffers, *b), bounds))
+
+    # Les plages coupées entre deux morceaux se touchent : la fusion les recolle
+    runs = np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.int64)
+    runs = merge_runs(runs, max(gap, 1))
+
+    if max(sizes) > common:
+        runs = np.concatenate((runs, [[common, max(sizes)]])).astype(np.int64)
+    return SaveDiff(sizes, runs)
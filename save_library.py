@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Bibliothèque du dossier de sauvegardes
+Développé par ROUTIER87
+
+Liste les sauvegardes d'un dossier avec leur argent, entreprise et
+version, sans les charger : seuls les octets de ces champs sont lus
+(lectures positionnées pour un fichier brut, début du contenu décompressé
+pour un conteneur). L'indexation tourne dans un pool de threads et les
+résultats sont gardés dans le cache de lecture (parse_cache, table
+indexed) tant que la taille et la date du fichier ne changent pas.
+QFileSystemWatcher signale les changements : seuls les fichiers ajoutés
+ou modifiés sont relus.
+"""
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QFileDialog)
+from PyQt6.QtCore import Qt, QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+import settings
+from save_container import detect, read_prefix
+from save_schema import Schema, load_schema
+from parse_cache import default_cache
+from save_loader import start_loader
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Champs affichés (lus à leurs offsets du schéma, sans charger la sauvegarde)
+LIBRARY_FIELDS = ('money', 'company_name', 'game_version')
+
+SAVE_EXTENSIONS = ('.save',)
+
+# Threads de lecture (fichiers différents lus en parallèle)
+LIBRARY_WORKERS = min(8, os.cpu_count() or 1)
+
+# Entrées transmises à l'interface (et au cache) par lots
+BATCH_SIZE = 32
+
+# Délai de regroupement des notifications de QFileSystemWatcher
+WATCH_DELAY_MS = 500
+
+def default_save_dir():
+    """Dossier des sauvegardes du jeu (config.ini [Paths] save_dir)"""
+    return settings.get_path('save_dir', str(Path.home() / "Documents" / "Transport Fever 2" / "save"))
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+class _FileView:
+    """Fichier brut vu comme un buffer : chaque tranche est une lecture positionnée"""
+
+    def __init__(self, f, size):
+        self._file = f
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self._size)
+        self._file.seek(start)
+        return self._file.read(max(stop - start, 0))
+
+def library_schema(schema=None):
+    """Sous-schéma des champs de la bibliothèque"""
+    schema = schema or load_schema()
+    return Schema([schema[name] for name in LIBRARY_FIELDS if name in schema])
+
+def list_saves(folder):
+    """Sauvegardes du dossier (chemins complets)"""
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    return [os.path.join(folder, name) for name in names
+            if name.lower().endswith(SAVE_EXTENSIONS)
+            and os.path.isfile(os.path.join(folder, name))]
+
+def _located(filepath, locator):
+    """Offsets des champs ancrés, connus seulement si la sauvegarde a déjà été
+    ouverte (sinon les offsets du schéma servent de repli)"""
+    if locator is None or not len(locator):
+        return {}
+    cache = default_cache()
+    digest = cache.lookup(filepath)
+    return cache.get(digest, f"located:{locator.fingerprint}") or {}
+
+def read_entry(filepath, schema, locator=None, st=None):
+    """Entrée de bibliothèque d'une sauvegarde : argent, entreprise, version"""
+    st = st or os.stat(filepath)
+    entry = {
+        'path': filepath,
+        'name': os.path.basename(filepath),
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'error': None,
+    }
+    try:
+        located = _located(filepath, locator)
+        if located:
+            schema = schema.with_offsets(located)
+
+        kind = detect(filepath) if st.st_size else None
+        if kind is None:
+            with open(filepath, 'rb') as f:
+                values = schema.decode(_FileView(f, st.st_size))
+        else:
+            # Conteneur : seul le début du contenu, jusqu'au dernier champ
+            stop = max(f.offset + f.length for f in schema.fields.values())
+            values = schema.decode(read_prefix(filepath, kind, stop))
+        entry.update(schema.to_json(dict(values)))
+    except Exception as e:
+        entry['error'] = str(e)
+
+    for name in LIBRARY_FIELDS:
+        entry.setdefault(name, None)
+    return entry
+
+# ============================================================================
+# INDEXATION
+# ============================================================================
+
+class LibraryIndexer(QObject):
+    """Indexe des sauvegardes hors du thread de l'interface (pool de threads).
+
+    Les entrées du cache encore valables (taille et date inchangées) sont
+    émises sans lecture ; les autres sont lues en parallèle puis ajoutées
+    au cache. Démarré par save_loader.start_loader.
+    """
+
+    entries_ready = pyqtSignal(list)      # lot d'entrées (dict)
+    progress = pyqtSignal(int, int)       # fichiers traités, total
+    finished = pyqtSignal(object)         # chemins indexés
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, paths, schema, locator=None, workers=LIBRARY_WORKERS):
+        super().__init__()
+        self.paths = list(paths)
+        self.schema = schema
+        self.locator = locator
+        self.workers = workers
+        self.key = f"library:{schema.fingerprint}:{locator.fingerprint if locator else ''}"
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            cache = default_cache()
+            total = len(self.paths)
+
+            # Entrées encore valables : aucun octet relu
+            cached, pending = [], []
+            for path in self.paths:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = cache.get_indexed(path, self.key, st)
+                if entry is not None:
+                    entry['path'] = path
+                    cached.append(entry)
+                else:
+                    pending.append((path, st))
+            for start in range(0, len(cached), BATCH_SIZE):
+                self.entries_ready.emit(cached[start:start + BATCH_SIZE])
+            done = total - len(pending)
+            self.progress.emit(done, total)
+
+            batch, stored = [], []
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(read_entry, path, self.schema, self.locator, st): (path, st)
+                           for path, st in pending}
+                for future in as_completed(futures):
+                    if self._cancel.is_set():
+                        for other in futures:
+                            other.cancel()
+                        self.cancelled.emit()
+                        return
+
+                    entry = future.result()
+                    batch.append(entry)
+                    if entry['error'] is None:
+                        path, st = futures[future]
+                        stored.append((path, st, entry))
+                    done += 1
+                    if len(batch) >= BATCH_SIZE:
+                        self._flush(cache, batch, stored, done, total)
+                        batch, stored = [], []
+            self._flush(cache, batch, stored, done, total)
+            self.finished.emit(self.paths)
+
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _flush(self, cache, batch, stored, done, total):
+        cache.put_indexed(self.key, stored)
+        if batch:
+            self.entries_ready.emit(batch)
+        self.progress.emit(done, total)
+
+# ============================================================================
+# VUE
+# ============================================================================
+
+class _SortItem(QTableWidgetItem):
+    """Cellule triée sur une clé (nombre, date) plutôt que sur son texte"""
+
+    def __init__(self, text, key):
+        super().__init__(text)
+        self.key = key
+
+    def __lt__(self, other):
+        if isinstance(other, _SortItem):
+            return (self.key is None, self.key) < (other.key is None, other.key)
+        return super().__lt__(other)
+
+class SaveLibraryPane(QWidget):
+    """Sauvegardes d'un dossier, indexées en arrière-plan et tenues à jour"""
+
+    # Double-clic sur une sauvegarde
+    file_activated = pyqtSignal(str)
+
+    COLUMNS = ("Fichier", "Argent", "Entreprise", "Version", "Modifiée le", "Taille")
+
+    def __init__(self, parent=None, folder=None, schema=None, locator=None):
+        super().__init__(parent)
+        self.folder = str(folder or default_save_dir())
+        self.schema = library_schema(schema)
+        self.locator = locator
+        self.entries = {}
+        # Chemin -> cellule « Fichier » de sa ligne (item.row() suit le tri)
+        self.items = {}
+        self.indexer = None
+        self.queued = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(lambda path: self.schedule_rescan())
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(WATCH_DELAY_MS)
+        self.rescan_timer.timeout.connect(self.rescan)
+        self.dirty = set()
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.lbl_folder = QLabel()
+        top.addWidget(self.lbl_folder, 1)
+        btn_folder = QPushButton("📁 Dossier...")
+        btn_folder.clicked.connect(self.choose_folder)
+        top.addWidget(btn_folder)
+        btn_refresh = QPushButton("🔄 Actualiser")
+        btn_refresh.clicked.connect(self.rescan)
+        top.addWidget(btn_refresh)
+        layout.addLayout(top)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filtrer (fichier ou entreprise)")
+        self.filter_input.textChanged.connect(self.apply_filter)
+        layout.addWidget(self.filter_input)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setSortingEnabled(True)
+        self.table.cellDoubleClicked.connect(self.on_double_click)
+        layout.addWidget(self.table)
+
+        self.lbl_status = QLabel()
+        layout.addWidget(self.lbl_status)
+
+        self.set_folder(self.folder)
+
+    # ------------------------------------------------------------------------
+    # Dossier
+    # ------------------------------------------------------------------------
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Dossier des sauvegardes", self.folder)
+        if folder:
+            self.set_folder(folder)
+
+    def set_folder(self, folder):
+        """Affiche un dossier et l'indexe (les entrées en cache apparaissent aussitôt)"""
+        self.folder = os.path.normpath(str(folder))
+        self.lbl_folder.setText(f"📂 {self.folder}")
+        if self.indexer is not None:
+            self.indexer.cancel()
+            self.indexer = None
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+
+        self.entries.clear()
+        self.items.clear()
+        self.queued.clear()
+        self.dirty.clear()
+        self.table.setRowCount(0)
+
+        if not os.path.isdir(self.folder):
+            self.lbl_status.setText("Dossier introuvable")
+            return
+        self.watcher.addPath(self.folder)
+        self.rescan()
+
+    def schedule_rescan(self):
+        self.rescan_timer.start()
+
+    def on_file_changed(self, path):
+        self.dirty.add(path)
+        self.schedule_rescan()
+
+    def rescan(self):
+        """Compare le dossier à l'index : seuls les fichiers nouveaux ou
+        modifiés sont relus, les fichiers disparus sont retirés"""
+        paths = set(list_saves(self.folder))
+
+        for path in set(self.entries) - paths:
+            self.remove_entry(path)
+
+        changed = set()
+        for path in paths:
+            entry = self.entries.get(path)
+            if entry is None or path in self.dirty:
+                changed.add(path)
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_size, st.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+                changed.add(path)
+        self.dirty.clear()
+
+        # Fichiers remplacés (enregistrement par renommage) : à surveiller de nouveau
+        missing = sorted(paths - set(self.watcher.files()))
+        if missing:
+            self.watcher.addPaths(missing)
+
+        self.index(changed)
+
+    def index(self, paths):
+        """Indexe des fichiers (après l'indexation en cours s'il y en a une)"""
+        self.queued.update(paths)
+        if self.indexer is not None or not self.queued:
+            self.update_status()
+            return
+
+        paths, self.queued = sorted(self.queued), set()
+        self.indexer = LibraryIndexer(paths, self.schema, self.locator)
+        self.indexer.entries_ready.connect(self.add_entries)
+        self.indexer.progress.connect(self.on_progress)
+        for signal in (self.indexer.finished, self.indexer.failed, self.indexer.cancelled):
+            signal.connect(self.on_indexer_done)
+        start_loader(self.indexer, self)
+
+    def on_progress(self, done, total):
+        if self.sender() is self.indexer:
+            self.lbl_status.setText(f"Indexation : {done}/{total}")
+
+    def on_indexer_done(self, *args):
+        if self.sender() is not self.indexer:
+            return
+        self.indexer = None
+        if self.queued:
+            self.index(())
+        else:
+            self.update_status()
+
+    def update_status(self):
+        if self.indexer is None:
+            self.lbl_status.setText(f"{len(self.entries)} sauvegarde(s)")
+
+    # ------------------------------------------------------------------------
+    # Tableau
+    # ------------------------------------------------------------------------
+
+    def add_entries(self, entries):
+        """Ajoute ou met à jour des lignes (tri suspendu pendant l'insertion)"""
+        if self.sender() is not self.indexer:
+            return
+        self.table.setSortingEnabled(False)
+        added = []
+        for entry in entries:
+            # Fichier retiré ou autre dossier entre-temps
+            if os.path.dirname(entry['path']) != self.folder:
+                continue
+            self.remove_entry(entry['path'])
+            self.entries[entry['path']] = entry
+            added.append(self.insert_row(entry))
+        self.table.setSortingEnabled(True)
+        # Seules les nouvelles lignes sont filtrées
+        self.apply_filter(self.filter_input.text(), added)
+
+    def insert_row(self, entry):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+
+        money = entry['money']
+        mtime = datetime.fromtimestamp(entry['mtime_ns'] / 1e9)
+        name_item = QTableWidgetItem(entry['name'])
+        name_item.setData(Qt.ItemDataRole.UserRole, entry['path'])
+        if entry['error']:
+            name_item.setToolTip(entry['error'])
+
+        cells = (
+            name_item,
+            _SortItem(f"{money:,} €" if isinstance(money, int) else "?", money
+                      if isinstance(money, int) else None),
+            QTableWidgetItem(str(entry['company_name'] or "")),
+            QTableWidgetItem(str(entry['game_version'] or "")),
+            _SortItem(mtime.strftime("%Y-%m-%d %H:%M"), entry['mtime_ns']),
+            _SortItem(f"{entry['size'] / (1024 * 1024):,.1f} Mo", entry['size']),
+        )
+        for col, item in enumerate(cells):
+            self.table.setItem(row, col, item)
+        self.items[entry['path']] = name_item
+        return name_item
+
+    def remove_entry(self, path):
+        if self.entries.pop(path, None) is None:
+            return
+        item = self.items.pop(path, None)
+        if item is not None:
+            self.table.removeRow(item.row())
+
+    def apply_filter(self, text, items=None):
+        """Masque les lignes sans `text` (toutes, ou celles de `items`)"""
+        text = text.strip().lower()
+        rows = range(self.table.rowCount()) if items is None else [item.row() for item in items]
+        for row in rows:
+            name = self.table.item(row, 0).text().lower()
+            company = self.table.item(row, 2).text().lower()
+            self.table.setRowHidden(row, bool(text) and text not in name and text not in company)
+
+    def on_double_click(self, row, column):
+        item = self.table.item(row, 0)
+        if item is not None:
+            self.file_activated.emit(item.data(Qt.ItemDataRole.UserRole))
+
+    def shutdown(self):
+        """Arrête l'indexation en cours (fermeture de la fenêtre)"""
+        if self.indexer is not None:
+            self.indexer.cancel()
+            self.indexer = None
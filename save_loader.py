@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Chargement des sauvegardes en arrière-plan
+Développé par ROUTIER87
+"""
+
+import struct
+import hashlib
+import threading
+
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QProgressBar, QPushButton
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from save_buffer import CHUNK_SIZE
+from save_container import open_save
+from parse_cache import default_cache
+
+# ============================================================================
+# TRAVAILLEUR
+# ============================================================================
+
+class _Cancelled(Exception):
+    """Annulation demandée pendant la décompression"""
+
+class SaveLoader(QObject):
+    """Ouvre une sauvegarde hors du thread de l'interface.
+
+    L'argent est lu (et signalé) dès l'ouverture ; le fichier est ensuite
+    parcouru par blocs pour préchauffer le cache disque et calculer son
+    empreinte, avec une progression et une annulation possibles (fichier
+    inchangé depuis la dernière ouverture : empreinte reprise du cache de
+    lecture, sans relecture). Avec un `locator`, les champs ancrés sont
+    ensuite localisés (buffer.located).
+    """
+
+    money_ready = pyqtSignal('qint64')
+    progress = pyqtSignal('qint64', 'qint64')   # octets lus, taille totale
+    finished = pyqtSignal(object)               # SaveBuffer prêt
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, filepath, money_offset=None, use_mmap=True, locator=None):
+        super().__init__()
+        self.filepath = filepath
+        self.money_offset = money_offset
+        self.use_mmap = use_mmap
+        self.locator = locator
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Demande l'arrêt du chargement (pris en compte entre deux étapes
+        et entre deux blocs)"""
+        self._cancel.set()
+
+    def _stop(self, buffer):
+        """Ferme le buffer et signale l'annulation si elle est demandée"""
+        if not self._cancel.is_set():
+            return False
+        buffer.close()
+        self.cancelled.emit()
+        return True
+
+    def run(self):
+        buffer = None
+        try:
+            # Conteneur compressé : décompression en flux, avec progression
+            buffer = open_save(self.filepath, self.use_mmap, progress=self._decompress_progress)
+            size = len(buffer)
+            if self._stop(buffer):
+                return
+
+            # L'argent d'abord : l'interface l'affiche sans attendre la suite
+            # (argent ancré : son offset n'est connu qu'après la localisation)
+            anchored = self.locator is not None and 'money' in self.locator
+            offset = self.money_offset
+            if not anchored and offset is not None and offset + 8 <= size:
+                self.money_ready.emit(struct.unpack('<q', buffer[offset:offset + 8])[0])
+
+            cache = default_cache()
+            buffer.digest = cache.lookup(self.filepath)
+            if buffer.digest is None:
+                hasher = hashlib.blake2b(digest_size=16)
+                for pos in range(0, size, CHUNK_SIZE):
+                    if self._stop(buffer):
+                        return
+                    hasher.update(buffer.read(pos, pos + CHUNK_SIZE))
+                    self.progress.emit(min(pos + CHUNK_SIZE, size), size)
+
+                buffer.digest = hasher.hexdigest()
+                cache.remember(self.filepath, buffer.digest)
+            elif self._stop(buffer):
+                return
+            self.progress.emit(size, size)
+
+            # Champs ancrés (en cache pour une empreinte déjà vue)
+            if self.locator is not None and len(self.locator):
+                if self._stop(buffer):
+                    return
+                buffer.located = self.locator.locate(buffer)
+                offset = buffer.located.get('money')
+                if offset is not None and offset + 8 <= size:
+                    self.money_ready.emit(struct.unpack('<q', buffer[offset:offset + 8])[0])
+            self.finished.emit(buffer)
+
+        except _Cancelled:
+            # Décompression interrompue (fichier temporaire déjà supprimé)
+            self.cancelled.emit()
+        except Exception as e:
+            if buffer is not None:
+                buffer.close()
+            self.failed.emit(str(e))
+
+    def _decompress_progress(self, done, total):
+        if self._cancel.is_set():
+            raise _Cancelled()
+        self.progress.emit(done, total)
+
+def start_loader(loader, parent):
+    """Lance un SaveLoader (ou tout travailleur avec run() et les signaux
+    finished/failed/cancelled) dans son propre QThread et retourne le thread.
+
+    Le thread appartient à `parent` : il reste en vie même si un nouveau
+    chargement remplace celui-ci avant la fin.
+    """
+    thread = QThread(parent)
+    loader.moveToThread(thread)
+    thread.started.connect(loader.run)
+
+    for signal in (loader.finished, loader.failed, loader.cancelled):
+        signal.connect(thread.quit)
+    thread.finished.connect(loader.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+
+    thread.start()
+    return thread
+
+# ============================================================================
+# BARRE DE PROGRESSION
+# ============================================================================
+
+class LoadProgressWidget(QWidget):
+    """Progression et bouton d'annulation pour la barre de statut"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loader = None
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.bar = QProgressBar()
+        self.bar.setMaximumWidth(200)
+        self.bar.setMaximumHeight(16)
+        layout.addWidget(self.bar)
+
+        self.btn_cancel = QPushButton("Annuler")
+        self.btn_cancel.clicked.connect(self.cancel)
+        layout.addWidget(self.btn_cancel)
+
+        self.hide()
+
+    def attach(self, loader):
+        """Suit un chargement (à la place du précédent)"""
+        if self.loader is not None:
+            self._disconnect(self.loader)
+        self.loader = loader
+        self.bar.setRange(0, 100)
+        self.bar.setValue(0)
+        loader.progress.connect(self.on_progress)
+        for signal in (loader.finished, loader.failed, loader.cancelled):
+            signal.connect(self.detach)
+        self.show()
+
+    def _disconnect(self, loader):
+        try:
+            loader.progress.disconnect(self.on_progress)
+            for signal in (loader.finished, loader.failed, loader.cancelled):
+                signal.disconnect(self.detach)
+        except (TypeError, RuntimeError):
+            # Déjà déconnecté ou travailleur détruit
+            pass
+
+    def detach(self, *args):
+        if self.sender() is not self.loader:
+            # Signal en file d'attente d'un chargement remplacé
+            return
+        self.loader = None
+        self.hide()
+
+    def on_progress(self, done, total):
+        if self.sender() is not self.loader:
+            return
+        self.bar.setValue(done * 100 // total if total else 100)
+
+    def cancel(self):
+        if self.loader is not None:
+            self.loader.cancel()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Schéma déclaratif des champs d'une sauvegarde
+Développé par ROUTIER87
+
+Chaque champ a un nom, un type, un offset et (pour les textes) une
+longueur. Les champs proches sont lus en une seule zone, décodée par
+des struct.Struct précompilés (octets de remplissage entre les champs) :
+une lecture par zone et un unpack par couche de champs sans
+chevauchement, quel que soit le nombre de champs.
+
+Sources, dans l'ordre (les suivantes remplacent les précédentes) :
+    1. [Game] money_offset, company_name_offset, game_version_offset
+    2. [Fields] de config.ini :   nom = type, offset[, longueur]
+    3. Fichier JSON ou TOML désigné par [Paths] schema_file
+"""
+
+import json
+import struct
+import hashlib
+from collections import namedtuple
+from collections.abc import Mapping
+from pathlib import Path
+
+import settings
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Type -> code struct (little-endian)
+FIELD_TYPES = {
+    'i8': 'b', 'u8': 'B',
+    'i16': 'h', 'u16': 'H',
+    'i32': 'i', 'u32': 'I',
+    'i64': 'q', 'u64': 'Q',
+    'f32': 'f', 'f64': 'd',
+    'bool': '?',
+    'str': 's',      # texte UTF-8 terminé par un octet nul
+    'bytes': 's',
+}
+
+# Longueur par défaut des textes
+DEFAULT_STR_LENGTH = 64
+
+# Écart maximum entre deux champs lus d'un seul coup : copier 64 Ko coûte
+# à peu près autant qu'une lecture de plus dans le buffer
+GROUP_GAP = 64 * 1024
+
+Field = namedtuple('Field', 'name type offset length')
+
+# ============================================================================
+# SCHÉMA
+# ============================================================================
+
+def make_field(name, type_, offset, length=None):
+    """Crée un champ validé (ValueError si le type est inconnu)"""
+    type_ = type_.strip().lower()
+    if type_ not in FIELD_TYPES:
+        raise ValueError(f"Champ '{name}' : type inconnu '{type_}'")
+    offset = int(offset, 0) if isinstance(offset, str) else int(offset)
+    if FIELD_TYPES[type_] == 's':
+        length = int(length, 0) if isinstance(length, str) else int(length or DEFAULT_STR_LENGTH)
+    else:
+        length = struct.calcsize('<' + FIELD_TYPES[type_])
+    if offset < 0 or length <= 0:
+        raise ValueError(f"Champ '{name}' : offset ou longueur invalide")
+    return Field(name, type_, offset, length)
+
+class _Layer:
+    """Champs sans chevauchement décodés par un seul struct.Struct"""
+
+    def __init__(self, start):
+        self.start = start
+        self.stop = start
+        self.fields = []
+        self.codes = ['<']
+
+    def add(self, field):
+        if field.offset > self.stop:
+            self.codes.append(f"{field.offset - self.stop}x")
+        code = FIELD_TYPES[field.type]
+        self.codes.append(f"{field.length}s" if code == 's' else code)
+        self.fields.append(field)
+        self.stop = field.offset + field.length
+
+    def compile(self, window_start):
+        self.struct = struct.Struct("".join(self.codes))
+        self.position = self.start - window_start
+
+class _Window:
+    """Zone lue d'un seul coup ; ses champs sont répartis en couches
+    sans chevauchement (un champ peut en recouvrir un autre)"""
+
+    def __init__(self, fields):
+        self.start = fields[0].offset
+        self.stop = max(f.offset + f.length for f in fields)
+        self.fields = fields
+        self.layers = []
+        for f in fields:
+            layer = next((l for l in self.layers if l.stop <= f.offset), None)
+            if layer is None:
+                layer = _Layer(f.offset)
+                self.layers.append(layer)
+            layer.add(f)
+        for layer in self.layers:
+            layer.compile(self.start)
+
+class Schema:
+    """Ensemble de champs, compilé en zones de lecture à la construction"""
+
+    def __init__(self, fields, gap=GROUP_GAP):
+        self.fields = {f.name: f for f in fields}
+        self.windows = self._compile(sorted(self.fields.values(), key=lambda f: f.offset), gap)
+
+        # nom -> (numéro de couche, position dans le tuple décodé)
+        self._index = {}
+        layer_no = 0
+        for window in self.windows:
+            for layer in window.layers:
+                for position, f in enumerate(layer.fields):
+                    self._index[f.name] = (layer_no, position)
+                layer_no += 1
+
+        # Identifie le schéma dans le cache de lecture
+        spec = repr(sorted(self.fields.values())).encode('utf-8')
+        self.fingerprint = hashlib.blake2b(spec, digest_size=8).hexdigest()
+
+    @staticmethod
+    def _compile(fields, gap):
+        windows, current, stop = [], [], 0
+        for f in fields:
+            if current and f.offset - stop > gap:
+                windows.append(_Window(current))
+                current = []
+            current.append(f)
+            stop = max(stop, f.offset + f.length) if len(current) > 1 else f.offset + f.length
+        if current:
+            windows.append(_Window(current))
+        return windows
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __len__(self):
+        return len(self.fields)
+
+    def offsets(self):
+        return {name: f.offset for name, f in self.fields.items()}
+
+    def with_offsets(self, offsets):
+        """Nouveau schéma où les champs nommés dans `offsets` sont déplacés"""
+        return Schema([f._replace(offset=offsets[name])
+                       if offsets.get(name) is not None else f
+                       for name, f in self.fields.items()])
+
+    # ------------------------------------------------------------------------
+    # Décodage
+    # ------------------------------------------------------------------------
+
+    def decode(self, data):
+        """Décode tous les champs (FieldValues : nom -> valeur, None si hors du fichier).
+
+        Une lecture par zone et un unpack par couche ; les tuples décodés
+        sont gardés tels quels, sans dictionnaire intermédiaire.
+        """
+        size = len(data)
+        decoded, truncated = [], {}
+        for window in self.windows:
+            if window.stop > size:
+                # Zone coupée par la fin du fichier : champ par champ
+                for f in window.fields:
+                    truncated[f.name] = self.decode_field(data, f.name)
+                decoded.extend([None] * len(window.layers))
+                continue
+
+            raw = data[window.start:window.stop]
+            for layer in window.layers:
+                decoded.append(layer.struct.unpack_from(raw, layer.position))
+        return FieldValues(self, decoded, truncated)
+
+    def decode_field(self, data, name):
+        """Décode un seul champ (None si hors du fichier)"""
+        f = self.fields[name]
+        if f.offset + f.length > len(data):
+            return None
+        raw = data[f.offset:f.offset + f.length]
+        if FIELD_TYPES[f.type] == 's':
+            return _convert(f, bytes(raw))
+        return _convert(f, struct.unpack('<' + FIELD_TYPES[f.type], raw)[0])
+
+    def to_json(self, values):
+        """Valeurs décodées -> dict sérialisable (octets en hexadécimal)"""
+        return {name: value.hex() if isinstance(value, bytes) else value
+                for name, value in values.items()}
+
+    def from_json(self, data):
+        """Inverse de to_json (None si un champ manque)"""
+        if set(data) != set(self.fields):
+            return None
+        return {name: bytes.fromhex(value) if self.fields[name].type == 'bytes' and value is not None
+                else value for name, value in data.items()}
+
+    def encode_field(self, name, value):
+        """Octets à écrire pour `value` (les textes sont complétés par des zéros)"""
+        f = self.fields[name]
+        if f.type == 'str':
+            value = value.encode('utf-8')[:f.length]
+        if FIELD_TYPES[f.type] == 's':
+            return bytes(value[:f.length]).ljust(f.length, b'\x00')
+        return struct.pack('<' + FIELD_TYPES[f.type], value)
+
+class FieldValues(Mapping):
+    """Valeurs décodées, lues dans les tuples de Schema.decode à la demande"""
+
+    def __init__(self, schema, decoded, truncated):
+        self._schema = schema
+        self._decoded = decoded
+        self._truncated = truncated
+
+    def __getitem__(self, name):
+        if name in self._truncated:
+            return self._truncated[name]
+        layer_no, position = self._schema._index[name]
+        return _convert(self._schema.fields[name], self._decoded[layer_no][position])
+
+    def __iter__(self):
+        return iter(self._schema.fields)
+
+    def __len__(self):
+        return len(self._schema.fields)
+
+    def __repr__(self):
+        return f"FieldValues({dict(self)!r})"
+
+def _convert(field, value):
+    if field.type == 'str':
+        end = value.find(b'\x00')
+        if end != -1:
+            value = value[:end]
+        return value.decode('utf-8', errors='ignore')
+    return value
+
+# ============================================================================
+# CHARGEMENT
+# ============================================================================
+
+def _config_fields(config):
+    """Champs de [Game] (compatibilité) puis de [Fields] (lignes invalides ignorées)"""
+    fields = [
+        make_field('money', 'i64', settings.get_int('Game', 'money_offset', 1048600)),
+        make_field('company_name', 'str', settings.get_int('Game', 'company_name_offset', 1048500), 64),
+        make_field('game_version', 'str', settings.get_int('Game', 'game_version_offset', 100), 16),
+    ]
+    if config.has_section('Fields'):
+        for name, spec in config.items('Fields'):
+            try:
+                fields.append(make_field(name, *[part.strip() for part in spec.split(',')]))
+            except (TypeError, ValueError) as e:
+                print(f"Erreur schéma [Fields] {name}: {e}")
+    return fields
+
+def read_schema_file(path):
+    """Entrées d'un fichier JSON ou TOML : [{"name", "type", "offset", ...}, ...].
+
+    Liste d'entrées ou table {nom: {...}}, à la racine ou sous la clé "fields".
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            content = tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            content = json.load(f)
+
+    entries = content.get('fields', content) if isinstance(content, dict) else content
+    if isinstance(entries, dict):
+        entries = [dict(spec, name=name) for name, spec in entries.items()]
+    return entries
+
+def _file_fields(path):
+    """Champs d'un fichier JSON ou TOML (offset 0 si le champ est repéré par une ancre)"""
+    return [make_field(e['name'], e['type'], e.get('offset', 0), e.get('length'))
+            for e in read_schema_file(path)]
+
+def schema_file_path(config):
+    """Fichier désigné par [Paths] schema_file (None s'il n'y en a pas)"""
+    schema_file = config.get('Paths', 'schema_file', fallback=None)
+    if not schema_file:
+        return None
+    path = Path(schema_file)
+    if not path.is_absolute():
+        path = settings.APP_DIR / path
+    return path
+
+def load_schema():
+    """Schéma de config.ini (et du fichier schema_file s'il est défini)"""
+    config = settings.load_config()
+    fields = _config_fields(config)
+
+    path = schema_file_path(config)
+    if path is not None:
+        try:
+            fields.extend(_file_fields(path))
+        except Exception as e:
+            print(f"Erreur schéma {path}: {e}")
+
+    # Le dernier champ d'un nom donné l'emporte
+    return Schema(fields)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Lecture et écriture de config.ini
+Développé par ROUTIER87
+"""
+
+import re
+import sys
+import configparser
+from pathlib import Path
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Dossier de l'application (à côté de l'exécutable en mode PyInstaller)
+if getattr(sys, 'frozen', False):
+    APP_DIR = Path(sys.executable).parent
+else:
+    APP_DIR = Path(__file__).parent
+
+CONFIG_FILE = APP_DIR / "config.ini"
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+def load_config():
+    """Charge config.ini (un fichier absent donne une configuration vide)"""
+    config = configparser.ConfigParser(inline_comment_prefixes=(';', '#'))
+    config.read(CONFIG_FILE, encoding='utf-8')
+    return config
+
+def get_value(section, key, default=None):
+    """Lit une valeur texte"""
+    return load_config().get(section, key, fallback=default)
+
+def get_int(section, key, default=0):
+    """Lit une valeur entière (décimale ou 0x...)"""
+    value = get_value(section, key)
+    if value is None:
+        return default
+    try:
+        return int(value, 0)
+    except ValueError:
+        return default
+
+def get_bool(section, key, default=False):
+    """Lit une valeur booléenne"""
+    try:
+        return load_config().getboolean(section, key, fallback=default)
+    except ValueError:
+        return default
+
+def get_path(key, default):
+    """Lit un dossier de la section [Paths] (relatif au dossier de l'application)"""
+    path = Path(get_value('Paths', key, default))
+    if not path.is_absolute():
+        path = APP_DIR / path
+    return path
+
+# ============================================================================
+# ÉCRITURE
+# ============================================================================
+
+def set_value(section, key, value):
+    """Modifie une valeur en conservant les commentaires du fichier"""
+    lines = []
+    if CONFIG_FILE.exists():
+        lines = CONFIG_FILE.read_text(encoding='utf-8').splitlines()
+
+    key_re = re.compile(rf"^\s*{re.escape(key)}\s*=", re.IGNORECASE)
+    current = None
+    section_found = False
+    insert_at = None
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith('[') and stripped.endswith(']'):
+            current = stripped[1:-1]
+            section_found = section_found or current == section
+            continue
+
+        if current == section:
+            if key_re.match(line):
+                lines[i] = f"{key} = {value}"
+                break
+            if stripped and not stripped.startswith((';', '#')):
+                insert_at = i + 1
+    else:
+        # Clé absente : l'ajouter en fin de section (ou créer la section)
+        if not section_found:
+            if lines:
+                lines.append("")
+            lines.append(f"[{section}]")
+            lines.append(f"{key} = {value}")
+        else:
+            if insert_at is None:
+                insert_at = next(i for i, line in enumerate(lines)
+                                 if line.strip() == f"[{section}]") + 1
+            lines.insert(insert_at, f"{key} = {value}")
+
+    CONFIG_FILE.write_text("\n".join(lines) + "\n", encoding='utf-8')
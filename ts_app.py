@@ -4,17 +4,28 @@ TS_Tool_Routier - Application complète
 Éditeur de sauvegardes Transport Fever 2
 """
 
+import time
+
+# Début du démarrage (mesure du temps jusqu'à la fenêtre interactive)
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
-import struct
-import json
+import traceback
 from pathlib import Path
 from datetime import datetime
 
-# PyQt6
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
-from PyQt6.QtGui import *
+# PyQt6 (les modules rarement utilisés sont importés à la première utilisation)
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QSplashScreen, QWidget, QFrame, QLabel,
+                             QPushButton, QLineEdit, QSpinBox, QTextEdit, QGroupBox, QTabWidget,
+                             QStatusBar, QProgressBar, QDialog, QMessageBox, QFileDialog,
+                             QVBoxLayout, QHBoxLayout, QGridLayout, QFormLayout)
+from PyQt6.QtCore import Qt, QSize, QThread
+from PyQt6.QtGui import QAction, QColor, QFont, QIcon, QPalette, QPixmap
+
+from game_save import GameSave
+from hex_format import format_dump
+from save_loader import LoadProgressWidget, SaveLoader, start_loader
 
 # ============================================================================
 # CONFIGURATION
@@ -32,81 +43,6 @@ else:
     # Mode développement
     BASE_DIR = Path(__file__).parent
 
-# ============================================================================
-# CLASSES MÉTIER
-# ============================================================================
-
-class GameSave:
-    """Représente une sauvegarde du jeu"""
-    
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.filename = os.path.basename(filepath)
-        self.data = None
-        self.money = 0
-        self.company_name = ""
-        self.game_version = ""
-        
-        # Offsets connus (à adapter selon tes recherches)
-        self.offsets = {
-            'money': 1048600,      # Offset exemple - À MODIFIER
-            'company_name': 1048500, # Offset exemple - À MODIFIER
-            'game_version': 100     # Offset exemple - À MODIFIER
-        }
-    
-    def load(self):
-        """Charge le fichier de sauvegarde"""
-        try:
-            with open(self.filepath, 'rb') as f:
-                self.data = bytearray(f.read())
-            
-            # Lire l'argent
-            money_offset = self.offsets['money']
-            if money_offset + 8 <= len(self.data):
-                money_bytes = self.data[money_offset:money_offset+8]
-                self.money = struct.unpack('<q', money_bytes)[0]
-            
-            # Lire le nom de la compagnie
-            name_offset = self.offsets['company_name']
-            if name_offset + 64 <= len(self.data):
-                name_bytes = self.data[name_offset:name_offset+64]
-                # Trouver le premier null byte
-                end = name_bytes.find(b'\x00')
-                if end != -1:
-                    self.company_name = name_bytes[:end].decode('utf-8', errors='ignore')
-            
-            return True
-            
-        except Exception as e:
-            print(f"Erreur chargement: {e}")
-            return False
-    
-    def save(self, new_filepath=None):
-        """Sauvegarde les modifications"""
-        try:
-            if new_filepath is None:
-                new_filepath = self.filepath
-            
-            # Mettre à jour l'argent
-            money_offset = self.offsets['money']
-            if money_offset + 8 <= len(self.data):
-                money_bytes = struct.pack('<q', self.money)
-                self.data[money_offset:money_offset+8] = money_bytes
-            
-            # Écrire le fichier
-            with open(new_filepath, 'wb') as f:
-                f.write(self.data)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Erreur sauvegarde: {e}")
-            return False
-    
-    def set_money(self, amount):
-        """Modifie l'argent"""
-        self.money = amount
-
 # ============================================================================
 # INTERFACE UTILISATEUR
 # ============================================================================
@@ -176,18 +112,32 @@ class SplashScreen(QSplashScreen):
         version_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         version_label.setStyleSheet("color: #7f8c8d;")
         layout.addWidget(version_label)
+    
+    def step(self, value, message):
+        """Affiche une étape réelle de l'initialisation"""
+        self.progress.setValue(value)
+        self.message.setText(message)
+        QApplication.processEvents()
 
 class MainWindow(QMainWindow):
     """Fenêtre principale"""
     
-    def __init__(self):
+    def __init__(self, progress=None):
         super().__init__()
         self.current_save = None
+        self.loader = None
+        
+        # Étapes affichées par l'écran de démarrage
+        progress = progress or (lambda value, message: None)
+        
+        progress(20, "Préparation de l'interface...")
         self.setup_ui()
+        progress(60, "Création des menus...")
         self.setup_menu()
         self.setup_toolbar()
         
         # Charger la configuration
+        progress(80, "Chargement de la configuration...")
         self.load_config()
         
         # Centre la fenêtre
@@ -320,33 +270,11 @@ class MainWindow(QMainWindow):
         editor_tab.setLayout(editor_layout)
         tab_widget.addTab(editor_tab, "Éditeur")
         
-        # Onglet 2: Éditeur hexadécimal
-        hex_tab = QWidget()
-        hex_layout = QVBoxLayout()
-        
-        # Toolbar hex
-        hex_toolbar = QHBoxLayout()
-        
-        self.hex_input = QLineEdit()
-        self.hex_input.setPlaceholderText("Offset (ex: 0x1234)")
-        hex_toolbar.addWidget(self.hex_input)
-        
-        goto_btn = QPushButton("Aller à")
-        goto_btn.clicked.connect(self.goto_offset)
-        hex_toolbar.addWidget(goto_btn)
-        
-        hex_toolbar.addStretch()
-        
-        hex_layout.addLayout(hex_toolbar)
-        
-        # Zone d'affichage hex
-        self.hex_display = QTextEdit()
-        self.hex_display.setFont(QFont("Courier New", 10))
-        self.hex_display.setReadOnly(True)
-        hex_layout.addWidget(self.hex_display)
-        
-        hex_tab.setLayout(hex_layout)
-        tab_widget.addTab(hex_tab, "🔧 Hexadécimal")
+        # Onglet 2: Éditeur hexadécimal (construit à la première ouverture)
+        self.hex_tab = QWidget()
+        self.hex_tab_built = False
+        tab_widget.addTab(self.hex_tab, "🔧 Hexadécimal")
+        tab_widget.currentChanged.connect(self.on_tab_changed)
         
         # Onglet 3: À propos
         about_tab = QWidget()
@@ -394,10 +322,48 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Prêt")
         
+        # Progression du chargement
+        self.load_progress = LoadProgressWidget()
+        self.status_bar.addPermanentWidget(self.load_progress)
+        
         # Indicateur de modification
         self.modified_label = QLabel()
         self.status_bar.addPermanentWidget(self.modified_label)
     
+    def build_hex_tab(self):
+        """Construit l'onglet hexadécimal (à sa première ouverture)"""
+        self.hex_tab_built = True
+        hex_layout = QVBoxLayout()
+        
+        # Toolbar hex
+        hex_toolbar = QHBoxLayout()
+        
+        self.hex_input = QLineEdit()
+        self.hex_input.setPlaceholderText("Offset (ex: 0x1234)")
+        hex_toolbar.addWidget(self.hex_input)
+        
+        goto_btn = QPushButton("Aller à")
+        goto_btn.clicked.connect(self.goto_offset)
+        hex_toolbar.addWidget(goto_btn)
+        
+        hex_toolbar.addStretch()
+        
+        hex_layout.addLayout(hex_toolbar)
+        
+        # Zone d'affichage hex
+        self.hex_display = QTextEdit()
+        self.hex_display.setFont(QFont("Courier New", 10))
+        self.hex_display.setReadOnly(True)
+        hex_layout.addWidget(self.hex_display)
+        
+        self.hex_tab.setLayout(hex_layout)
+        self.update_hex_display()
+    
+    def on_tab_changed(self, index):
+        """Construit l'onglet hexadécimal la première fois qu'il est affiché"""
+        if index == 1 and not self.hex_tab_built:
+            self.build_hex_tab()
+    
     def setup_menu(self):
         """Configure le menu"""
         menubar = self.menuBar()
@@ -432,6 +398,18 @@ class MainWindow(QMainWindow):
         # Menu Édition
         edit_menu = menubar.addMenu("✏️ Édition")
         
+        undo_action = QAction("↩️ Annuler", self)
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo_edit)
+        edit_menu.addAction(undo_action)
+        
+        redo_action = QAction("↪️ Rétablir", self)
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(self.redo_edit)
+        edit_menu.addAction(redo_action)
+        
+        edit_menu.addSeparator()
+        
         money_action = QAction("💰 Modifier l'argent...", self)
         money_action.triggered.connect(self.edit_money_dialog)
         edit_menu.addAction(money_action)
@@ -522,35 +500,82 @@ class MainWindow(QMainWindow):
             self.load_save_file(filepath)
     
     def load_save_file(self, filepath):
-        """Charge et affiche une sauvegarde"""
-        self.current_save = GameSave(filepath)
-        
-        if self.current_save.load():
-            # Mettre à jour l'interface
-            self.file_label.setText(self.current_save.filename)
-            self.money_label.setText(f"{self.current_save.money:,} €")
-            self.company_label.setText(self.current_save.company_name)
-            
-            # Activer les contrôles
-            self.money_spin.setValue(self.current_save.money)
-            self.money_spin.setEnabled(True)
-            self.save_btn.setEnabled(True)
-            
-            # Mettre à jour l'affichage hex
-            self.update_hex_display()
-            
-            # Message de statut
-            self.status_bar.showMessage(f"Chargé: {self.current_save.filename}")
-            self.modified_label.setText("")
-            
-            QMessageBox.information(self, "Succès", 
-                                  f"Sauvegarde chargée avec succès!\n\n"
-                                  f"Fichier: {self.current_save.filename}\n"
-                                  f"Argent: {self.current_save.money:,} €")
-        else:
-            QMessageBox.critical(self, "Erreur", 
-                               "Impossible de charger le fichier de sauvegarde.")
-            self.current_save = None
+        """Charge et affiche une sauvegarde (en arrière-plan)"""
+        if self.loader is not None:
+            self.loader.cancel()
+        
+        save = GameSave(filepath)
+        loader = SaveLoader(filepath, save.offsets['money'], locator=save.locator)
+        self.loader = loader
+        self.loader.money_ready.connect(lambda money: self.show_loading_money(loader, money))
+        self.loader.finished.connect(lambda buffer: self.on_save_loaded(loader, save, buffer))
+        self.loader.failed.connect(self.on_load_failed)
+        self.loader.cancelled.connect(self.on_load_cancelled)
+        self.load_progress.attach(self.loader)
+        
+        self.status_bar.showMessage(f"Chargement: {save.filename}...")
+        start_loader(self.loader, self)
+    
+    def show_loading_money(self, loader, money):
+        """Argent lu au début du chargement (ignoré si celui-ci a été remplacé)"""
+        if loader is self.loader:
+            self.money_label.setText(f"{money:,} €")
+    
+    def on_save_loaded(self, loader, save, buffer):
+        """Quand le chargement en arrière-plan est terminé"""
+        if loader is not self.loader:
+            # Chargement remplacé par un plus récent
+            buffer.close()
+            return
+        self.loader = None
+        
+        if self.current_save and self.current_save.data is not None:
+            self.current_save.data.close()
+        self.current_save = save
+        self.current_save.attach(buffer)
+        
+        # Mettre à jour l'interface
+        self.file_label.setText(self.current_save.filename)
+        self.money_label.setText(f"{self.current_save.money:,} €")
+        self.company_label.setText(self.current_save.company_name)
+        
+        # Activer les contrôles
+        self.money_spin.setValue(self.current_save.money)
+        self.money_spin.setEnabled(True)
+        self.save_btn.setEnabled(True)
+        
+        # Mettre à jour l'affichage hex
+        self.update_hex_display()
+        
+        # Message de statut
+        self.status_bar.showMessage(f"Chargé: {self.current_save.filename}")
+        self.modified_label.setText("")
+        
+        QMessageBox.information(self, "Succès", 
+                              f"Sauvegarde chargée avec succès!\n\n"
+                              f"Fichier: {self.current_save.filename}\n"
+                              f"Argent: {self.current_save.money:,} €")
+    
+    def on_load_failed(self, error):
+        """Quand le chargement a échoué"""
+        if self.sender() is not self.loader:
+            return
+        self.loader = None
+        self.restore_money_label()
+        QMessageBox.critical(self, "Erreur", 
+                           f"Impossible de charger le fichier de sauvegarde.\n{error}")
+    
+    def on_load_cancelled(self):
+        """Quand le chargement a été annulé"""
+        if self.sender() is self.loader:
+            self.loader = None
+            self.restore_money_label()
+            self.status_bar.showMessage("Chargement annulé", 3000)
+    
+    def restore_money_label(self):
+        """Réaffiche l'argent de la sauvegarde encore ouverte"""
+        money = self.current_save.money if self.current_save else 0
+        self.money_label.setText(f"{money:,} €")
     
     def on_money_changed(self, value):
         """Quand l'argent est modifié"""
@@ -564,23 +589,42 @@ class MainWindow(QMainWindow):
         """Définit un montant prédéfini"""
         self.money_spin.setValue(amount)
     
+    def undo_edit(self):
+        """Annule la dernière modification"""
+        if self.current_save and self.current_save.undo() is not None:
+            self.refresh_after_history("Modification annulée")
+    
+    def redo_edit(self):
+        """Rétablit la dernière modification annulée"""
+        if self.current_save and self.current_save.redo() is not None:
+            self.refresh_after_history("Modification rétablie")
+    
+    def refresh_after_history(self, message):
+        """Réaffiche l'argent relu dans le buffer (sans nouvelle étape)"""
+        money = self.current_save.money
+        self.money_spin.blockSignals(True)
+        self.money_spin.setValue(money)
+        self.money_spin.blockSignals(False)
+        self.money_label.setText(f"{money:,} €")
+        self.modified_label.setText("[MODIFIÉ]")
+        self.modified_label.setStyleSheet("color: red; font-weight: bold;")
+        self.update_hex_display()
+        self.status_bar.showMessage(message, 3000)
+    
     def save_file(self):
         """Enregistre le fichier courant"""
         if not self.current_save:
             return
         
-        # Créer une sauvegarde
-        backup_file = f"{self.current_save.filepath}.backup"
-        import shutil
-        shutil.copy2(self.current_save.filepath, backup_file)
-        
-        # Sauvegarder
-        if self.current_save.save():
+        # Sauvegarder (backup dédupliqué de l'état précédent)
+        from backup_store import default_store
+        if self.current_save.save(backup_store=default_store()):
             self.modified_label.setText("")
             self.status_bar.showMessage("Fichier enregistré avec succès", 3000)
+            backup = self.current_save.last_backup
             QMessageBox.information(self, "Succès", 
                                   f"Fichier enregistré!\n\n"
-                                  f"Backup créé: {os.path.basename(backup_file)}")
+                                  f"Backup créé: {os.path.basename(backup['path'])}")
         else:
             QMessageBox.critical(self, "Erreur", "Erreur lors de l'enregistrement.")
     
@@ -603,8 +647,48 @@ class MainWindow(QMainWindow):
     
     def restore_backup(self):
         """Restaure une sauvegarde"""
-        # À implémenter
-        QMessageBox.information(self, "Info", "Fonction à venir...")
+        from backup_store import default_store
+        from dialogs import BackupManagerDialog
+        
+        source = self.current_save.filepath if self.current_save else None
+        store = default_store()
+        dialog = BackupManagerDialog(self, store, source=source,
+                                     release_file=self.release_file)
+        try:
+            dialog.exec()
+        finally:
+            store.close()
+        
+        # Fichier libéré pour la restauration : le recharger
+        if self.current_save and self.current_save.data is None:
+            self.load_save_file(source)
+    
+    def release_file(self, filepath):
+        """Libère le fichier mappé avant sa restauration (modifications non
+        enregistrées : enregistrer, abandonner ou annuler ; False si annulé)"""
+        if not (self.current_save and self.current_save.data is not None and
+                os.path.abspath(filepath) == os.path.abspath(self.current_save.filepath)):
+            return True
+        
+        if self.modified_label.text():
+            reply = QMessageBox.question(
+                self, "Modifications non enregistrées",
+                "La sauvegarde contient des modifications non enregistrées.\n"
+                "Les enregistrer avant de la remplacer ?",
+                QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Discard
+                | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Cancel
+            )
+            if reply == QMessageBox.StandardButton.Cancel:
+                return False
+            if reply == QMessageBox.StandardButton.Save:
+                self.save_file()
+                if self.modified_label.text():
+                    return False
+        
+        self.current_save.close()
+        self.modified_label.setText("")
+        return True
     
     def show_stats(self):
         """Affiche les statistiques"""
@@ -628,24 +712,19 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Statistiques", stats)
     
     def find_offset(self):
-        """Trouve un offset"""
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Recherche d'offset")
-        dialog.resize(400, 300)
+        """Trouve l'offset de l'argent en comparant plusieurs sauvegardes"""
+        from dialogs import OffsetFinderDialog
         
-        layout = QVBoxLayout()
-        
-        layout.addWidget(QLabel("Cette fonctionnalité permet de trouver\n"
-                              "les offsets en comparant deux sauvegardes."))
-        
-        layout.addStretch()
+        current = self.current_save.offsets['money'] if self.current_save else None
+        dialog = OffsetFinderDialog(self, current_offset=current)
         
-        btn_close = QPushButton("Fermer")
-        btn_close.clicked.connect(dialog.close)
-        layout.addWidget(btn_close)
-        
-        dialog.setLayout(layout)
-        dialog.exec()
+        if dialog.exec() and dialog.selected_offset is not None:
+            self.status_bar.showMessage(
+                f"Offset argent enregistré: 0x{dialog.selected_offset:X}", 3000)
+            
+            # Relire la sauvegarde courante avec le nouvel offset
+            if self.current_save:
+                self.load_save_file(self.current_save.filepath)
     
     def export_json(self):
         """Exporte en JSON"""
@@ -661,10 +740,15 @@ class MainWindow(QMainWindow):
         )
         
         if filepath:
+            import json
+            
             data = {
                 "filename": self.current_save.filename,
                 "money": self.current_save.money,
                 "company_name": self.current_save.company_name,
+                "game_version": self.current_save.game_version,
+                "fields": {name: value.hex() if isinstance(value, bytes) else value
+                           for name, value in self.current_save.fields.items()},
                 "file_size": len(self.current_save.data),
                 "export_date": datetime.now().isoformat()
             }
@@ -726,6 +810,10 @@ class MainWindow(QMainWindow):
     
     def update_hex_display(self):
         """Met à jour l'affichage hexadécimal"""
+        if not self.hex_tab_built:
+            # Onglet jamais ouvert : il sera rempli à sa construction
+            return
+        
         if not self.current_save or not self.current_save.data:
             self.hex_display.setText("Aucune donnée à afficher")
             return
@@ -733,36 +821,7 @@ class MainWindow(QMainWindow):
         # Afficher les premiers 1024 octets
         data = self.current_save.data[:1024]
         
-        hex_text = ""
-        ascii_text = ""
-        
-        for i in range(0, len(data), 16):
-            # Offset
-            hex_text += f"{i:08X}: "
-            
-            # Hex
-            for j in range(16):
-                if i + j < len(data):
-                    hex_text += f"{data[i+j]:02X} "
-                else:
-                    hex_text += "   "
-            
-            hex_text += " "
-            
-            # ASCII
-            for j in range(16):
-                if i + j < len(data):
-                    byte = data[i+j]
-                    if 32 <= byte < 127:
-                        hex_text += chr(byte)
-                    else:
-                        hex_text += "."
-                else:
-                    hex_text += " "
-            
-            hex_text += "\n"
-        
-        self.hex_display.setText(hex_text)
+        self.hex_display.setText(format_dump(data))
     
     def goto_offset(self):
         """Va à un offset spécifique"""
@@ -825,6 +884,13 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         
+        # Arrêter un chargement en cours et attendre les threads
+        if self.loader is not None:
+            self.loader.cancel()
+        for thread in self.findChildren(QThread):
+            thread.quit()
+            thread.wait()
+        
         # Sauvegarder la configuration
         self.save_config()
         
@@ -904,28 +970,17 @@ def main():
     splash = SplashScreen()
     splash.show()
     
-    # Simuler un chargement
-    for i in range(1, 101):
-        splash.progress.setValue(i)
-        if i < 30:
-            splash.message.setText("Initialisation...")
-        elif i < 60:
-            splash.message.setText("Chargement des modules...")
-        elif i < 90:
-            splash.message.setText("Préparation de l'interface...")
-        else:
-            splash.message.setText("Démarrage...")
-        
-        QApplication.processEvents()
-        QThread.msleep(20)
-    
-    # Créer la fenêtre principale
-    window = MainWindow()
+    # Créer la fenêtre principale (les onglets lourds sont construits plus tard)
+    window = MainWindow(progress=splash.step)
     
     # Fermer le splash et afficher la fenêtre
+    splash.step(100, "Démarrage...")
     splash.finish(window)
     window.show()
     
+    startup_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+    window.status_bar.showMessage(f"Prêt (démarrage en {startup_ms:.0f} ms)", 5000)
+    
     # Exécuter l'application
     sys.exit(app.exec())
 
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+TS_Tool_Routier - Mode ligne de commande (traitement par lots)
+Développé par ROUTIER87
+
+N'importe jamais PyQt6 : utilisable sur un serveur ou dans un script.
+
+Exemples :
+    python ts_tool.py info saves/*.save
+    python ts_tool.py batch --set-money 5000000 saves/*.save
+    python ts_tool.py batch --add-money -250000 --workers 4 saves/*.save
+"""
+
+import sys
+import os
+import glob
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from game_save import GameSave
+
+# ============================================================================
+# TRAVAIL PAR FICHIER
+# ============================================================================
+
+def process_file(filepath, set_money=None, add_money=None, backup=True, dry_run=False):
+    """Traite une sauvegarde (exécuté dans un processus du pool).
+
+    Retourne un dict sérialisable : fichier, argent avant/après, erreur.
+    """
+    result = {'file': filepath, 'before': None, 'after': None, 'error': None}
+    save = GameSave(filepath)
+    try:
+        if not save.load():
+            result['error'] = save.error
+            return result
+        if save.fields['money'] is None:
+            result['error'] = "Fichier trop court pour l'offset de l'argent"
+            return result
+
+        result['before'] = save.money
+        if set_money is None and add_money is None:
+            return result
+
+        money = set_money if set_money is not None else save.money
+        if add_money is not None:
+            money += add_money
+        result['after'] = money
+
+        if dry_run or money == save.money:
+            return result
+
+        store = None
+        if backup:
+            from backup_store import default_store
+            store = default_store()
+        save.set_money(money)
+        if not save.save(backup_store=store):
+            result['error'] = save.error
+        return result
+
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+    finally:
+        save.close()
+
+# ============================================================================
+# COMMANDES
+# ============================================================================
+
+def expand_paths(patterns):
+    """Développe les jokers (l'invite Windows ne le fait pas elle-même)"""
+    filepaths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        filepaths.extend(matches)
+    # Sans doublons, dans l'ordre donné
+    return list(dict.fromkeys(filepaths))
+
+def run_batch(filepaths, workers=None, **options):
+    """Traite les fichiers en parallèle et retourne les résultats dans l'ordre"""
+    if workers == 1 or len(filepaths) <= 1:
+        return [process_file(filepath, **options) for filepath in filepaths]
+
+    workers = min(workers or os.cpu_count() or 1, len(filepaths))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, filepath, **options) for filepath in filepaths]
+        return [future.result() for future in futures]
+
+def print_summary(results, changing):
+    """Une ligne par fichier puis le bilan"""
+    width = max(len(os.path.basename(r['file'])) for r in results)
+    failed = 0
+
+    for r in results:
+        name = os.path.basename(r['file']).ljust(width)
+        if r['error']:
+            failed += 1
+            print(f"ERREUR  {name}  {r['error']}")
+        elif changing:
+            print(f"OK      {name}  {r['before']:>16,} -> {r['after']:>16,}")
+        else:
+            print(f"OK      {name}  {r['before']:>16,}")
+
+    print(f"\n{len(results)} fichier(s), {len(results) - failed} OK, {failed} erreur(s)")
+    return failed
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="ts_tool",
+        description="TS_Tool_Routier - édition de sauvegardes sans interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info = commands.add_parser("info", help="Affiche l'argent de chaque sauvegarde")
+    info.add_argument("files", nargs="+", help="Sauvegardes (jokers acceptés)")
+    info.add_argument("--workers", type=int, default=None,
+                      help="Nombre de processus (défaut : un par cœur)")
+
+    batch = commands.add_parser("batch", help="Modifie l'argent de plusieurs sauvegardes")
+    money = batch.add_mutually_exclusive_group(required=True)
+    money.add_argument("--set-money", type=int, help="Nouvel argent")
+    money.add_argument("--add-money", type=int, help="Montant à ajouter (négatif pour retirer)")
+    batch.add_argument("files", nargs="+", help="Sauvegardes (jokers acceptés)")
+    batch.add_argument("--workers", type=int, default=None,
+                       help="Nombre de processus (défaut : un par cœur)")
+    batch.add_argument("--no-backup", action="store_true",
+                       help="Ne pas sauvegarder l'état précédent dans le dossier des backups")
+    batch.add_argument("--dry-run", action="store_true",
+                       help="Afficher les changements sans écrire")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    filepaths = expand_paths(args.files)
+    if not filepaths:
+        print("Aucun fichier trouvé", file=sys.stderr)
+        return 2
+
+    if args.command == "info":
+        results = run_batch(filepaths, args.workers)
+        changing = False
+    else:
+        results = run_batch(filepaths, args.workers,
+                            set_money=args.set_money, add_money=args.add_money,
+                            backup=not args.no_backup, dry_run=args.dry_run)
+        changing = True
+        if args.dry_run:
+            print("(simulation : aucun fichier modifié)\n")
+
+    return 1 if print_summary(results, changing) else 0
+
+if __name__ == "__main__":
+    # Requis pour le pool de processus dans un exécutable PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())